@@ -0,0 +1,112 @@
+"""Load-test the Flask (threaded) and asyncio serving modes of TrigonometryAgent.
+
+Both servers run in their own processes against a stub LLM server with fixed latency; queries that need
+the LLM are fired at increasing concurrency and p50/p99 latency plus throughput are reported.
+
+    PYTHONPATH=./ python benchmarks/async_load_test.py --latency-ms 200 --concurrency 1 10 50 200
+"""
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import statistics
+import threading
+import time
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+async def fire(url: str, concurrency: int, total: int, query: str = "Explain the unit circle #{i}") -> tuple[list[float], float, int]:
+    import httpx
+    latencies = []
+    failures = 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=120.0) as client:
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def one(i: int):
+            nonlocal failures
+            payload = {"message": {"role": "user", "content": {"type": "text", "text": query.format(i=i)}}}
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.post(url, json=payload)
+                latencies.append(time.perf_counter() - start)
+                if response.status_code != 200:
+                    failures += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total)))
+        return latencies, time.perf_counter() - start, failures
+
+def serve_flask(port: int):
+    from python_a2a.server.http import create_flask_app
+    from werkzeug.serving import make_server
+    from src.math_agent.trigonometry_agent import TrigonometryAgent
+    logging.disable(logging.INFO)  # keep per-task log lines out of the measurement
+    make_server("127.0.0.1", port, create_flask_app(TrigonometryAgent()), threaded=True).serve_forever()
+
+def serve_async(port: int, max_in_flight: int):
+    import uvicorn
+    from src.async_server import create_async_app
+    from src.math_agent.trigonometry_agent import TrigonometryAgent
+    logging.disable(logging.INFO)
+    app = create_async_app(TrigonometryAgent(), max_in_flight=max_in_flight, max_queue=100_000)
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning")
+
+def serve_stub(port: int, latency_ms: float):
+    from benchmarks.stub_llm_server import start_stub_server
+    start_stub_server(port, latency_ms)
+    threading.Event().wait()
+
+def wait_until_up(port: int, timeout: float = 30.0):
+    import httpx
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/a2a/health", timeout=1.0)
+            return
+        except httpx.TransportError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Server on port {port} did not start")
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare sync and async serving modes under concurrent load.")
+    parser.add_argument("--llm-port", type=int, default=5098)
+    parser.add_argument("--latency-ms", type=float, default=200.0)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50, 200])
+    parser.add_argument("--requests-per-level", type=int, default=400)
+    parser.add_argument("--max-in-flight", type=int, default=256)
+    args = parser.parse_args()
+
+    # Every server gets its own process so the load generator doesn't compete with them for the GIL;
+    # the agent processes inherit LLM_SERVER_URL and read it at import time
+    os.environ["LLM_SERVER_URL"] = f"http://127.0.0.1:{args.llm_port}"
+    modes = {"flask": args.llm_port + 1, "async": args.llm_port + 2}
+    processes = [
+        multiprocessing.Process(target=serve_stub, args=(args.llm_port, args.latency_ms), daemon=True),
+        multiprocessing.Process(target=serve_flask, args=(modes["flask"],), daemon=True),
+        multiprocessing.Process(target=serve_async, args=(modes["async"], args.max_in_flight), daemon=True),
+    ]
+    for process in processes:
+        process.start()
+    for port in modes.values():
+        wait_until_up(port)
+
+    print(f"stub LLM latency {args.latency_ms:.0f} ms")
+    print(f"{'mode':<6} {'conc':>5} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'failed':>7}")
+    try:
+        for concurrency in args.concurrency:
+            total = max(args.requests_per_level, concurrency)
+            for mode, port in modes.items():
+                latencies, elapsed, failures = asyncio.run(fire(f"http://127.0.0.1:{port}/tasks/send", concurrency, total))
+                print(f"{mode:<6} {concurrency:>5} {total / elapsed:>9.1f} "
+                      f"{statistics.median(latencies) * 1000:>9.1f} {percentile(latencies, 99) * 1000:>9.1f} {failures:>7}")
+    finally:
+        for process in processes:
+            process.terminate()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+"""End-to-end throughput and latency of the whole network: client routing -> agent -> (stub) LLM server.
+
+Starts the deterministic stub LLM server, launches the Trigonometry and Coding agents with src/launcher.py,
+then replays a query corpus through client.query_agent (routing, dispatch and the LLM ping, exactly as the
+interactive client does) at each concurrency level. Reports throughput, p50/p95/p99 per client stage and
+the memory of every process, and writes it all to a JSON file that --compare can diff against a later run.
+
+    PYTHONPATH=./ python benchmarks/e2e_benchmark.py --concurrency 1 8 32 --requests 200 --output e2e.json
+    PYTHONPATH=./ python benchmarks/e2e_benchmark.py --latency lognormal:300,0.5 --words uniform:20,200 \\
+        --compare e2e.json
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from benchmarks.async_load_test import percentile, wait_until_up
+from benchmarks.worker_scaling import start_launcher, stop_launcher
+
+RESULTS_VERSION = 1
+
+# Mix of the query kinds the network handles: fast-path calculations, identity/table lookups answered
+# locally, explanations that need the LLM, and code generation
+DEFAULT_CORPUS = [
+    "What is the sine of 30 degrees?",
+    "Calculate cos(π/4)",
+    "What is tan(45°)?",
+    "sin(60) + cos(30)",
+    "What are the basic trigonometric identities?",
+    "Show me the double angle formulas",
+    "Explain the unit circle",
+    "Why is the tangent undefined at 90 degrees?",
+    "Write Python code to calculate sine and cosine",
+    "Generate a function for the law of cosines",
+    "Code for converting degrees to radians",
+]
+
+class TraceCollector(logging.Handler):
+    """Collects the per-request JSON lines the client's Tracer logs to a2a.trace."""
+
+    def __init__(self):
+        super().__init__()
+        self.traces = []
+
+    def emit(self, record):
+        self.traces.append(json.loads(record.getMessage()))
+
+def serve_stub(port: int, latency_ms: float, latency: str, words: str, seed: int):
+    from benchmarks.stub_llm_server import start_stub_server
+    start_stub_server(port, latency_ms, latency, words, seed)
+    threading.Event().wait()
+
+def load_corpus(path: str) -> list[str]:
+    from client import read_batch_queries
+    return [query for _, query in read_batch_queries(path) if query]
+
+def _status_kb(pid: int, field: str) -> int:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+    return 0
+
+def _children(pid: int) -> list[int]:
+    children = []
+    for entry in os.listdir("/proc"):
+        if entry.isdigit():
+            try:
+                with open(f"/proc/{entry}/stat") as f:
+                    # The parent PID follows the state field, after the parenthesised command name
+                    if int(f.read().rsplit(")", 1)[1].split()[1]) == pid:
+                        children.append(int(entry))
+            except (OSError, IndexError, ValueError):
+                continue
+    return children
+
+def process_memory_mb(pid: int) -> dict | None:
+    """Current and peak RSS of a process plus its children (launcher workers), in MB. Linux only."""
+    try:
+        pids = [pid] + _children(pid)
+        return {
+            "rss_mb": round(sum(_status_kb(p, "VmRSS") for p in pids) / 1024, 1),
+            "peak_rss_mb": round(sum(_status_kb(p, "VmHWM") for p in pids) / 1024, 1),
+            "processes": len(pids),
+        }
+    except OSError:
+        return None
+
+def stage_stats(values: list[float]) -> dict:
+    return {
+        "count": len(values),
+        "mean_ms": round(sum(values) / len(values), 3),
+        "p50_ms": round(percentile(values, 50), 3),
+        "p95_ms": round(percentile(values, 95), 3),
+        "p99_ms": round(percentile(values, 99), 3),
+    }
+
+async def replay(network, llm_client, router, queries: list[str], concurrency: int) -> tuple[list[float], float, int]:
+    """Run every query through client.query_agent, at most `concurrency` at a time."""
+    from client import query_agent
+    # query_agent offloads its blocking calls to the default executor; size it so it isn't the bottleneck
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=max(8, concurrency * 2)))
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    failures = 0
+
+    async def one(query: str):
+        nonlocal failures
+        async with semaphore:
+            start = time.perf_counter()
+            answer = await query_agent(network, llm_client, router, query)
+            latencies.append((time.perf_counter() - start) * 1000)
+            failures += answer is None or answer.startswith("Error")
+
+    start = time.perf_counter()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):  # query_agent prints every step
+        await asyncio.gather(*(one(query) for query in queries))
+    return latencies, time.perf_counter() - start, failures
+
+def run_level(network, llm_client, router, corpus: list[str], concurrency: int, requests: int,
+              collector: TraceCollector, processes: dict) -> dict:
+    queries = [corpus[i % len(corpus)] for i in range(requests)]
+    collector.traces.clear()
+    latencies, elapsed, failures = asyncio.run(replay(network, llm_client, router, queries, concurrency))
+
+    stages = {}
+    for trace in collector.traces:
+        stages.setdefault("total", []).append(trace["total_ms"])
+        for stage, ms in trace["stages_ms"].items():
+            stages.setdefault(stage, []).append(ms)
+    stages["query"] = latencies  # the whole query_agent call, including the LLM ping after the answer
+    memory = {name: process_memory_mb(pid) for name, pid in processes.items()}
+    memory["client"] = {"peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)}
+    return {
+        "concurrency": concurrency,
+        "requests": requests,
+        "failures": failures,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(requests / elapsed, 2),
+        "stages": {stage: stage_stats(values) for stage, values in stages.items()},
+        "memory": memory,
+    }
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def print_level(level: dict):
+    print(f"concurrency {level['concurrency']}: {level['throughput_rps']:.1f} req/s, "
+          f"{level['failures']}/{level['requests']} failed, {level['elapsed_s']:.2f}s")
+    print(f"  {'stage':<10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for stage, stats in level["stages"].items():
+        print(f"  {stage:<10} {stats['p50_ms']:>9.1f} {stats['p95_ms']:>9.1f} {stats['p99_ms']:>9.1f}")
+    memory = ", ".join(f"{name} {usage['peak_rss_mb']:.0f} MB" for name, usage in level["memory"].items() if usage)
+    print(f"  peak RSS: {memory}")
+
+def compare(baseline: dict, current: dict, tolerance: float) -> list[str]:
+    """Regressions beyond tolerance (a fraction) in throughput or per-stage p95, per matching concurrency level."""
+    regressions = []
+    previous_levels = {level["concurrency"]: level for level in baseline["levels"]}
+    print(f"\nCompared with {baseline.get('git_commit') or 'baseline'} ({baseline.get('timestamp', '?')}):")
+    for level in current["levels"]:
+        previous = previous_levels.get(level["concurrency"])
+        if previous is None:
+            continue
+        change = level["throughput_rps"] / previous["throughput_rps"] - 1
+        print(f"  concurrency {level['concurrency']}: throughput {previous['throughput_rps']:.1f} -> {level['throughput_rps']:.1f} req/s ({change:+.1%})")
+        if change < -tolerance:
+            regressions.append(f"concurrency {level['concurrency']}: throughput {change:+.1%}")
+        for stage, stats in level["stages"].items():
+            if stage not in previous["stages"]:
+                continue
+            before = previous["stages"][stage]["p95_ms"]
+            change = stats["p95_ms"] / before - 1 if before else 0.0
+            print(f"    {stage:<10} p95 {before:>9.1f} -> {stats['p95_ms']:>9.1f} ms ({change:+.1%})")
+            if change > tolerance:
+                regressions.append(f"concurrency {level['concurrency']}: {stage} p95 {change:+.1%}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end benchmark of the agent network against a stub LLM server.")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=200, help="Queries replayed per concurrency level.")
+    parser.add_argument("--corpus", help="JSONL query corpus (same format as client.py --batch); default: a built-in mix.")
+    parser.add_argument("--warmup", type=int, default=None, help="Unmeasured queries before the first level (default: one pass over the corpus).")
+    parser.add_argument("--llm-port", type=int, default=5001)
+    parser.add_argument("--latency-ms", type=float, default=200.0, help="Fixed stub LLM latency.")
+    parser.add_argument("--latency", help="Stub latency distribution in ms, e.g. lognormal:200,0.5 (overrides --latency-ms).")
+    parser.add_argument("--words", help="Distribution of extra words per stub answer, e.g. uniform:20,200.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the stub's per-prompt draws.")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes per agent.")
+    parser.add_argument("--async-mode", action="store_true", help="Run the agents on the asyncio server.")
+    parser.add_argument("--routing-threshold", type=float, default=0.6)
+    parser.add_argument("--output", default="e2e_results.json", help="Where to write the JSON results.")
+    parser.add_argument("--compare", metavar="BASELINE_JSON", help="Report changes against an earlier results file.")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="With --compare: exit 1 when throughput drops or a stage's p95 grows by more than this fraction.")
+    args = parser.parse_args()
+
+    from src.launcher import AGENTS
+    llm_url = f"http://127.0.0.1:{args.llm_port}"
+    # The client reads LLM_SERVER_URL at import time
+    os.environ["LLM_SERVER_URL"] = llm_url
+    import client
+
+    corpus = load_corpus(args.corpus) if args.corpus else DEFAULT_CORPUS
+    stub = multiprocessing.Process(target=serve_stub, args=(args.llm_port, args.latency_ms, args.latency, args.words, args.seed), daemon=True)
+    stub.start()
+    launchers = {}
+    try:
+        for name in ("trigonometry", "coding"):
+            launchers[name] = start_launcher(name, args.workers, AGENTS[name].port, args.async_mode, args.llm_port)
+        for name in launchers:
+            wait_until_up(AGENTS[name].port)
+
+        # Only the client's own trace lines: per-request stage timings, kept out of the console
+        collector = TraceCollector()
+        trace_logger = logging.getLogger("a2a.trace")
+        trace_logger.setLevel(logging.INFO)
+        trace_logger.propagate = False
+        trace_logger.addHandler(collector)
+
+        network = client.build_network({
+            "trigonometry_math": f"http://127.0.0.1:{AGENTS['trigonometry'].port}",
+            "coding": f"http://127.0.0.1:{AGENTS['coding'].port}",
+        })
+        llm_client, router = client.build_router(network, args.routing_threshold, llm_url)
+        processes = {"stub_llm": stub.pid, **{name: process.pid for name, process in launchers.items()}}
+
+        warmup = len(corpus) if args.warmup is None else args.warmup
+        if warmup:
+            run_level(network, llm_client, router, corpus, min(max(args.concurrency), warmup), warmup, collector, processes)
+        print(f"{len(corpus)} corpus queries, stub LLM latency {args.latency or f'{args.latency_ms:.0f} ms'}, "
+              f"{args.workers} worker(s) per agent ({'async' if args.async_mode else 'threaded'})")
+        levels = []
+        for concurrency in args.concurrency:
+            levels.append(run_level(network, llm_client, router, corpus, concurrency, args.requests, collector, processes))
+            print_level(levels[-1])
+    finally:
+        for process in launchers.values():
+            stop_launcher(process)
+        stub.terminate()
+
+    results = {
+        "version": RESULTS_VERSION,
+        "benchmark": "e2e",
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_commit": git_commit(),
+        "environment": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "compare", "tolerance")},
+        "corpus_size": len(corpus),
+        "levels": levels,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(json.load(f), results, args.tolerance)
+        if regressions:
+            print("Regressions beyond tolerance:\n  " + "\n  ".join(regressions))
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""Compare per-request httpx.post against the shared pooled client (src/http_client.py).
+
+Starts a stub LLM server and fires the same agent->LLM payload at it, sequentially and
+from a thread pool, reporting requests/sec for each variant.
+
+    PYTHONPATH=./ python benchmarks/http_pool_benchmark.py --requests 2000 --threads 8
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+import httpx
+from benchmarks.stub_llm_server import start_stub_server
+from src.http_client import get_http_client
+
+PAYLOAD = {"message": {"content": {"text": "You are a trigonometry expert. Answer: 'Explain the unit circle'"}}}
+
+def run(post, url: str, requests: int, threads: int) -> float:
+    start = time.perf_counter()
+    if threads == 1:
+        for _ in range(requests):
+            post(url, json=PAYLOAD, timeout=30.0).raise_for_status()
+    else:
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            for response in pool.map(lambda _: post(url, json=PAYLOAD, timeout=30.0), range(requests)):
+                response.raise_for_status()
+    return requests / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-request vs pooled httpx clients.")
+    parser.add_argument("--port", type=int, default=5099)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    server = start_stub_server(args.port)
+    url = f"http://127.0.0.1:{args.port}/tasks/send"
+    try:
+        for threads in (1, args.threads):
+            before = run(httpx.post, url, args.requests, threads)
+            after = run(get_http_client().post, url, args.requests, threads)
+            print(f"threads={threads:<3} httpx.post: {before:8.1f} req/s   pooled client: {after:8.1f} req/s   ({after / before:.2f}x)")
+    finally:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
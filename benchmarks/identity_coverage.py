@@ -0,0 +1,99 @@
+"""Coverage report: what fraction of real trigonometry queries the agent answers without the LLM.
+
+Queries come from JSONL files (the client's --batch format) and/or agent log files ("received task" lines).
+Without inputs, logs/ is scanned and, if it holds no queries, a built-in sample set is used.
+
+    PYTHONPATH=./ python benchmarks/identity_coverage.py --logs logs --queries worksheet.jsonl
+"""
+import argparse
+import glob
+import json
+import os
+import re
+import time
+from collections import Counter
+from benchmarks.router_benchmark import LABELLED_QUERIES, skills_of
+from client import read_batch_queries
+from src.math_agent.expression_evaluator import evaluate_trig_query
+from src.math_agent.identity_catalog import IdentityIndex
+from src.math_agent.trig_table import TrigTableError, parse_table_query
+
+LOG_QUERY = re.compile(r"TrigonometryAgent received (?:task|streaming request)[^:]*: '(.*)'$")
+
+def log_message(line: str) -> str:
+    """The message of a log line, from JSON records or the older plain-text format."""
+    if line.startswith("{"):
+        try:
+            return json.loads(line).get("message", "")
+        except json.JSONDecodeError:
+            pass
+    return line.rstrip("\n")
+
+def queries_from_logs(directory: str) -> list[str]:
+    queries = []
+    # Current rotated logs (TrigonometryAgent.log, .log.1, ...) and older per-start files
+    for path in sorted(glob.glob(os.path.join(directory, "TrigonometryAgent*.log*"))):
+        with open(path, encoding="utf-8", errors="replace") as f:
+            queries.extend(match.group(1) for line in f if (match := LOG_QUERY.search(log_message(line))))
+    return queries
+
+def sample_queries() -> list[str]:
+    from src.math_agent.trigonometry_agent import TrigonometryAgent
+    examples = [example for skill in skills_of(TrigonometryAgent) for example in skill["examples"]]
+    return examples + [query for query, agent_name in LABELLED_QUERIES if agent_name == "trigonometry_math"]
+
+def classify(index: IdentityIndex, query: str) -> tuple[str, list[str]]:
+    """Which local path would answer the query (same order as TrigonometryAgent), plus the catalog entries hit."""
+    try:
+        if parse_table_query(query) is not None:
+            return "table", []
+    except TrigTableError:
+        return "table", []
+    if evaluate_trig_query(query) is not None:
+        return "fast path", []
+    entry_ids = index.match(query)
+    return ("identity catalog", entry_ids) if entry_ids else ("LLM", [])
+
+def main():
+    parser = argparse.ArgumentParser(description="Report how many queries the identity catalog and other local paths answer.")
+    parser.add_argument("--queries", nargs="*", default=[], help="JSONL files in the client's --batch format.")
+    parser.add_argument("--logs", help="Directory with TrigonometryAgent log files (default: logs/ when no --queries).")
+    parser.add_argument("--show-unanswered", type=int, default=10)
+    args = parser.parse_args()
+
+    queries = [query for path in args.queries for _, query in read_batch_queries(path) if query]
+    if args.logs or not args.queries:
+        queries += queries_from_logs(args.logs or "logs")
+    if not queries:
+        print("No queries found in logs/, using the built-in sample set.")
+        queries = sample_queries()
+
+    index = IdentityIndex()
+    index.lookup("warm up")  # compile the rewrite patterns outside the timing
+    paths, entries, unanswered = Counter(), Counter(), Counter()
+    lookup_seconds = []
+    for query in queries:
+        start = time.perf_counter()
+        index.lookup(query)
+        lookup_seconds.append(time.perf_counter() - start)
+        path, entry_ids = classify(index, query)
+        paths[path] += 1
+        entries.update(entry_ids)
+        if path == "LLM":
+            unanswered[query] += 1
+
+    total = len(queries)
+    print(f"{total} queries")
+    for path in ("identity catalog", "fast path", "table", "LLM"):
+        print(f"  {path:<17} {paths[path]:>6}  {paths[path] / total:6.1%}")
+    print(f"  {'answered locally':<17} {total - paths['LLM']:>6}  {(total - paths['LLM']) / total:6.1%}")
+    print(f"catalog lookup: mean {sum(lookup_seconds) / total * 1e6:.1f} µs, max {max(lookup_seconds) * 1e6:.1f} µs")
+    if entries:
+        print("catalog entries hit: " + ", ".join(f"{entry_id} ({count})" for entry_id, count in entries.most_common()))
+    if unanswered and args.show_unanswered:
+        print("most frequent queries still going to the LLM:")
+        for query, count in unanswered.most_common(args.show_unanswered):
+            print(f"  {count:>4}  {query}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Throughput of one rate-limited OpenAI backend vs an LLMPool of two OpenAI keys plus a cheap local model.
+
+Runs offline: every backend is a fake chat model with a fixed latency, and OpenAI backends get a
+requests-per-minute limit like a real API key. The workload mixes simple questions (eligible for the
+local model) with code requests (full backends only).
+
+    PYTHONPATH=./ python benchmarks/llm_pool_benchmark.py --requests 300 --threads 16
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+from src.llm_pool import LLMPool, BackendSpec
+from src.metrics import MetricsRegistry
+
+SIMPLE_PROMPT = "You are a trigonometry expert. Answer the following trigonometric query: 'What is sin 30 degrees #{i}?'"
+CODE_PROMPT = "Generate Python code for the following trigonometric query: 'law of cosines #{i}'. Only output the python code block."
+
+def openai_like(name: str, latency: float, rpm: float) -> BackendSpec:
+    return BackendSpec("fake", name=name, cheap=False, responses=[f"answer from {name}"], sleep=latency, rpm=rpm)
+
+def run(pool: LLMPool, requests: int, threads: int, code_share: float) -> tuple[float, list[float], dict]:
+    def one(i: int):
+        prompt = (CODE_PROMPT if i % 100 < code_share * 100 else SIMPLE_PROMPT).format(i=i)
+        start = time.perf_counter()
+        content = pool.invoke(prompt).content
+        return time.perf_counter() - start, content.removeprefix("answer from ")
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        results = list(executor.map(one, range(requests)))
+    elapsed = time.perf_counter() - start
+    backends = {}
+    for _, name in results:
+        backends[name] = backends.get(name, 0) + 1
+    return elapsed, sorted(seconds for seconds, _ in results), backends
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the multi-backend LLM pool against a single backend (offline).")
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--latency-ms", type=float, default=300, help="Latency of the OpenAI-like backends.")
+    parser.add_argument("--local-latency-ms", type=float, default=100, help="Latency of the local model.")
+    parser.add_argument("--rpm", type=float, default=240, help="Requests per minute allowed per OpenAI key.")
+    parser.add_argument("--code-share", type=float, default=0.4, help="Fraction of prompts that ask for code.")
+    args = parser.parse_args()
+
+    latency, local_latency = args.latency_ms / 1000, args.local_latency_ms / 1000
+    variants = [
+        ("single OpenAI key", [openai_like("openai", latency, args.rpm)]),
+        ("pool: 2 keys + local", [
+            openai_like("openai-1", latency, args.rpm),
+            openai_like("openai-2", latency, args.rpm),
+            BackendSpec("fake", name="local", responses=["answer from local"], sleep=local_latency),
+        ]),
+    ]
+    print(f"{args.requests} requests, {args.threads} threads, {args.code_share:.0%} code prompts, "
+          f"{args.rpm:.0f} rpm per key, {args.latency_ms:.0f} ms remote / {args.local_latency_ms:.0f} ms local")
+    for label, specs in variants:
+        pool = LLMPool.from_specs(specs, MetricsRegistry())
+        elapsed, latencies, backends = run(pool, args.requests, args.threads, args.code_share)
+        p50, p95 = latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.95)]
+        spread = ", ".join(f"{name} {count}" for name, count in sorted(backends.items()))
+        print(f"  {label:<22} {args.requests / elapsed:7.1f} req/s   p50 {p50 * 1000:6.0f} ms   p95 {p95 * 1000:6.0f} ms   ({spread})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Per-task logging overhead: synchronous FileHandler (the old setup_logging) vs the queued JSON pipeline.
+
+Each simulated task logs what an agent and the LLM server log for one LLM-answered query: INFO lines
+plus DEBUG lines carrying the full prompt and response. "caller" is the time spent on the request
+threads; "drain" is the extra time the background listener needed to finish writing afterwards.
+--flush-latency-ms adds a delay to every flush to model slow or network-backed storage: the old
+handler pays it on the request thread for every line.
+
+    PYTHONPATH=./ python benchmarks/logging_benchmark.py --tasks 20000 --threads 8
+    PYTHONPATH=./ python benchmarks/logging_benchmark.py --tasks 2000 --flush-latency-ms 1
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from src.utils import TEXT_LOG_FORMAT, BufferedRotatingFileHandler, JsonFormatter, _stop_listeners, queued_handler
+
+PROMPT = "You are a trigonometry expert. Answer the following trigonometric query: 'Explain the unit circle'. " * 6
+RESPONSE = "The unit circle is the circle of radius 1 centred at the origin. " * 30
+
+class SlowFileHandler(logging.FileHandler):
+    flush_latency = 0.0
+
+    def flush(self):
+        super().flush()
+        time.sleep(self.flush_latency)
+
+class SlowBufferedRotatingFileHandler(BufferedRotatingFileHandler):
+    flush_latency = 0.0
+
+    def flush_buffer(self):
+        super().flush_buffer()
+        time.sleep(self.flush_latency)
+
+def log_task(logger: logging.Logger, i: int):
+    query = f"Explain the unit circle #{i}"
+    logger.info(f"TrigonometryAgent received task (sync handle_task): '{query}'")
+    logger.debug(f"Processing trigonometric query for LLM (pooled sync httpx): '{query}'")
+    logger.debug(f"LLM sync skill received query (first 100 chars): '{PROMPT[:100]}'")
+    logger.debug(f"Sending to ChatOpenAI (sync invoke): {PROMPT}")
+    logger.debug(f"ChatOpenAI sync response: '{RESPONSE}'")
+    logger.info(f"Successfully generated trigonometric response for query: '{query}'")
+
+def make_logger(name: str, handler: logging.Handler) -> logging.Logger:
+    logger = logging.getLogger(f"logging_benchmark.{name}")
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+    logger.handlers = [handler]
+    return logger
+
+def run(logger: logging.Logger, tasks: int, threads: int) -> float:
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(lambda i: log_task(logger, i), range(tasks)))
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-task logging overhead before/after queued logging.")
+    parser.add_argument("--tasks", type=int, default=20000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--sample-rate", type=float, default=0.1, help="DEBUG sample rate for the sampled variant.")
+    parser.add_argument("--flush-latency-ms", type=float, default=0.0, help="Simulated storage latency per flush.")
+    args = parser.parse_args()
+    SlowFileHandler.flush_latency = SlowBufferedRotatingFileHandler.flush_latency = args.flush_latency_ms / 1000
+
+    with tempfile.TemporaryDirectory() as log_dir:
+        def sync_file_handler():
+            handler = SlowFileHandler(os.path.join(log_dir, "sync.log"))
+            handler.setFormatter(logging.Formatter(TEXT_LOG_FORMAT))
+            return handler
+
+        def queued_json_handler(name: str, sample_rate: float):
+            handler = SlowBufferedRotatingFileHandler(
+                os.path.join(log_dir, f"{name}.log"), maxBytes=10 * 1024 * 1024, backupCount=5, encoding="utf-8"
+            )
+            handler.setFormatter(JsonFormatter())
+            return queued_handler(handler, sample_rate)
+
+        variants = [
+            ("sync FileHandler (before)", lambda: sync_file_handler()),
+            ("queued JSON + rotation", lambda: queued_json_handler("queued", 1.0)),
+            (f"queued JSON, DEBUG sampled {args.sample_rate:.0%}", lambda: queued_json_handler("sampled", args.sample_rate)),
+        ]
+        print(f"{args.tasks} tasks, {args.threads} threads, 6 log lines per task, {args.flush_latency_ms} ms per flush")
+        for label, make_handler in variants:
+            logger = make_logger(label, make_handler())
+            caller = run(logger, args.tasks, args.threads)
+            start = time.perf_counter()
+            _stop_listeners()  # waits until everything queued has been written
+            drain = time.perf_counter() - start
+            for handler in logger.handlers:
+                handler.close()
+            print(f"  {label:<34} caller {caller / args.tasks * 1e6:7.1f} µs/task   drain {drain:6.2f} s")
+
+if __name__ == "__main__":
+    main()
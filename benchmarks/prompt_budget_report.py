@@ -0,0 +1,97 @@
+"""Prompt tokens, answer budgets and (with --live) latency and answer tokens per prompt intent.
+
+Without --live, every template in src/prompts.py is rendered for the sample queries and counted locally: system
+prefix, query, and the max_tokens budget, and whether the prompt is long enough for OpenAI's prompt cache. With --live, the
+queries are also sent to the LLM server, and each intent's latency and answer length are measured. Its per-intent
+/metrics counters (tokens reported by the API, prompt-cache reads, answers cut off at the budget) are shown too.
+
+    PYTHONPATH=./ python benchmarks/prompt_budget_report.py
+    PYTHONPATH=./ python benchmarks/prompt_budget_report.py --live --llm-url http://localhost:5001
+"""
+import argparse
+import re
+import statistics
+import time
+import httpx
+from benchmarks.router_benchmark import LABELLED_QUERIES
+from src.http_client import LLM_SERVER_URL
+from src.prompts import HAS_TIKTOKEN, TEMPLATES, code_prompt, count_tokens, load_tokenizer, trig_prompt
+
+OPENAI_PROMPT_CACHE_MIN_TOKENS = 1024  # shorter prompts are never served from OpenAI's prompt cache
+SERVER_SERIES = ("llm_input_tokens_total", "llm_cached_input_tokens_total", "llm_output_tokens_total", "llm_budget_exhausted_total")
+
+def sample_prompts():
+    return [code_prompt(query) if agent == "coding" else trig_prompt(query) for query, agent in LABELLED_QUERIES]
+
+def server_counters(client: httpx.Client, url: str) -> dict[tuple[str, str], float]:
+    """(series, intent) -> value of the LLM server's per-intent counters; empty if it has no /metrics."""
+    try:
+        response = client.get(f"{url}/metrics")
+    except httpx.HTTPError:
+        return {}
+    counters = {}
+    for line in response.text.splitlines() if response.status_code == 200 else []:
+        match = re.match(r'(\w+)\{intent="([^"]+)"\} ([0-9.e+-]+)$', line)
+        if match and match.group(1) in SERVER_SERIES:
+            counters[(match.group(1), match.group(2))] = float(match.group(3))
+    return counters
+
+def run_live(prompts, url: str) -> dict[str, dict]:
+    results = {}
+    with httpx.Client(timeout=120.0) as client:
+        before = server_counters(client, url)
+        for prompt in prompts:
+            start = time.perf_counter()
+            response = client.post(f"{url}/tasks/send", json=prompt.payload())
+            seconds = time.perf_counter() - start
+            try:
+                answer = response.json()["artifacts"][0]["parts"][0]["text"]
+            except (ValueError, KeyError, IndexError, TypeError):
+                answer = ""
+            result = results.setdefault(prompt.intent, {"latency": [], "answer_tokens": [], "errors": 0})
+            result["latency"].append(seconds)
+            result["answer_tokens"].append(count_tokens(answer))
+            result["errors"] += response.status_code != 200 or not answer
+        after = server_counters(client, url)
+    for (series, intent), value in after.items():
+        if intent in results:
+            results[intent][series] = value - before.get((series, intent), 0.0)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Report prompt tokens, budgets, latency and answer tokens per intent.")
+    parser.add_argument("--live", action="store_true", help="Also send the sample queries to the LLM server.")
+    parser.add_argument("--llm-url", default=LLM_SERVER_URL)
+    args = parser.parse_args()
+
+    exact = HAS_TIKTOKEN and load_tokenizer()
+    prompts = sample_prompts()
+    print(f"Token counts: {'tiktoken' if exact else 'estimated (~4 characters a token)'}")
+    print(f"{'intent':<10} {'queries':>7} {'prefix':>7} {'query avg':>10} {'prefix share':>13} {'budget':>7} {'cacheable':>10}")
+    for intent, template in TEMPLATES.items():
+        queries = [count_tokens(prompt.text) for prompt in prompts if prompt.intent == intent]
+        prefix = count_tokens(template.system)
+        query_avg = statistics.mean(queries) if queries else 0.0
+        budget = next((prompt.max_tokens for prompt in prompts if prompt.intent == intent), template.max_tokens)
+        cacheable = "yes" if prefix + query_avg >= OPENAI_PROMPT_CACHE_MIN_TOKENS else "no"
+        print(f"{intent:<10} {len(queries):>7} {prefix:>7} {query_avg:>10.1f} {prefix / (prefix + query_avg):>13.0%} "
+              f"{budget:>7} {cacheable:>10}")
+    print(f"(OpenAI caches prompts from {OPENAI_PROMPT_CACHE_MIN_TOKENS} tokens)")
+
+    if not args.live:
+        return
+    results = run_live(prompts, args.llm_url)
+    print(f"\nLive against {args.llm_url}:")
+    print(f"{'intent':<10} {'calls':>5} {'p50 ms':>8} {'p95 ms':>8} {'answer avg':>11} {'answer max':>11} "
+          f"{'api in':>7} {'cached':>7} {'api out':>8} {'cut off':>8} {'errors':>7}")
+    for intent, result in results.items():
+        latency = sorted(result["latency"])
+        p95 = latency[min(len(latency) - 1, round(0.95 * (len(latency) - 1)))]
+        server = [f"{result[series]:>{width}.0f}" if series in result else f"{'-':>{width}}"
+                  for series, width in zip(SERVER_SERIES, (7, 7, 8, 8))]
+        print(f"{intent:<10} {len(latency):>5} {statistics.median(latency) * 1000:>8.1f} {p95 * 1000:>8.1f} "
+              f"{statistics.mean(result['answer_tokens']):>11.1f} {max(result['answer_tokens']):>11} "
+              f"{' '.join(server)} {result['errors']:>7}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Accuracy and latency of LocalAgentRouter (and optionally the LLM-based AIAgentRouter).
+
+The local router is trained offline on the @skill metadata declared on both agents. Pass
+--with-llm-router to also time AIAgentRouter; that needs the LLM server and both agents running.
+
+    PYTHONPATH=./ python benchmarks/router_benchmark.py
+"""
+import argparse
+import time
+from src.router import LocalAgentRouter, training_texts
+
+LABELLED_QUERIES = [
+    ("What is the sine of 30 degrees?", "trigonometry_math"),
+    ("Calculate cos(π/4)", "trigonometry_math"),
+    ("What are the basic trigonometric identities?", "trigonometry_math"),
+    ("Explain the unit circle", "trigonometry_math"),
+    ("What is tan(45°)?", "trigonometry_math"),
+    ("Show me the double angle formulas", "trigonometry_math"),
+    ("Explain the law of cosines", "trigonometry_math"),
+    ("What is the period of the tangent function?", "trigonometry_math"),
+    ("Derive the half angle identity for cosine", "trigonometry_math"),
+    ("Why is sin²x + cos²x equal to 1?", "trigonometry_math"),
+    ("What does radian mean?", "trigonometry_math"),
+    ("List the product-to-sum formulas", "trigonometry_math"),
+    ("value of sec(60 degrees)", "trigonometry_math"),
+    ("How do I find the amplitude of y = 3 sin(2x)?", "trigonometry_math"),
+    ("Write Python code to calculate sine and cosine", "coding"),
+    ("Generate a function for the law of cosines", "coding"),
+    ("Code for converting degrees to radians", "coding"),
+    ("Give me a script that plots tan(x)", "coding"),
+    ("Implement a function that returns cot(x)", "coding"),
+    ("Write a program to solve a triangle with the law of sines", "coding"),
+    ("python snippet for the angle sum identity", "coding"),
+    ("Create a function computing arcsin in degrees", "coding"),
+    ("Make a utility that converts radians to degrees", "coding"),
+    ("Write a function for the double angle sine", "coding"),
+]
+
+def skills_of(agent_cls) -> list[dict]:
+    return [attr._skill_info for attr in vars(agent_cls).values() if hasattr(attr, "_skill_info")]
+
+def evaluate(router, queries) -> tuple[float, float]:
+    correct = 0
+    start = time.perf_counter()
+    for query, expected in queries:
+        agent_name, _ = router.route_query(query, use_cache=False)
+        correct += agent_name == expected
+    elapsed = time.perf_counter() - start
+    return correct / len(queries), elapsed / len(queries)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark local vs LLM routing.")
+    parser.add_argument("--with-llm-router", action="store_true")
+    parser.add_argument("--threshold", type=float, default=0.6)
+    args = parser.parse_args()
+
+    from src.coding_agent.code_generator import CodingAgent
+    from src.math_agent.trigonometry_agent import TrigonometryAgent
+    examples = {
+        "trigonometry_math": training_texts("", skills_of(TrigonometryAgent)),
+        "coding": training_texts("", skills_of(CodingAgent)),
+    }
+
+    local = LocalAgentRouter(examples, confidence_threshold=args.threshold)
+    accuracy, latency = evaluate(local, LABELLED_QUERIES)
+    print(f"local router        accuracy {accuracy:6.1%}   {latency * 1e6:10.1f} µs/query")
+
+    if args.with_llm_router:
+        from python_a2a import A2AClient, AgentNetwork, AIAgentRouter
+        network = AgentNetwork(name="Trigonometry Assistant Network")
+        network.add("trigonometry_math", "http://localhost:8001")
+        network.add("coding", "http://localhost:8003")
+        llm_router = AIAgentRouter(llm_client=A2AClient("http://localhost:5001"), agent_network=network)
+        accuracy, latency = evaluate(llm_router, LABELLED_QUERIES)
+        print(f"LLM router          accuracy {accuracy:6.1%}   {latency * 1e6:10.1f} µs/query")
+
+        hybrid = LocalAgentRouter(examples, fallback_router=llm_router, confidence_threshold=args.threshold)
+        accuracy, latency = evaluate(hybrid, LABELLED_QUERIES)
+        print(f"local + LLM (<{args.threshold:.2f}) accuracy {accuracy:6.1%}   {latency * 1e6:10.1f} µs/query   "
+              f"({hybrid.llm_escalations.value:.0f} escalated)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""Precision and hit rate of the trigonometry agent's semantic cache on a labelled paraphrase set.
+
+Each seed question is cached with a placeholder answer; then every probe is looked up. A probe labelled with a
+seed should be answered with that seed's answer, and a probe labelled None (same words, different question)
+should miss. Precision is the share of hits that returned the right answer; hit rate is the share of
+paraphrases that were served from the cache. Both are reported for each threshold.
+
+    PYTHONPATH=./ python benchmarks/semantic_cache_eval.py --thresholds 0.6 0.7 0.75 0.8 0.9
+"""
+import argparse
+import time
+from src.math_agent.semantic_cache import SEMANTIC_CACHE_THRESHOLD, SemanticCache
+
+SEEDS = [
+    "Explain the unit circle",
+    "What is the law of cosines?",
+    "What is the law of sines?",
+    "Explain the double angle formula for sine",
+    "What is the half angle identity for cosine?",
+    "What is the period of the tangent function?",
+    "How do I find the amplitude of y = 3 sin(2x)?",
+    "What does radian mean?",
+    "Why is sin²x + cos²x equal to 1?",
+    "What is the derivative of sin x?",
+    "What is the domain of the inverse sine function?",
+    "How do you solve a right triangle?",
+    "Explain the cofunction identities",
+    "What is the difference between degrees and radians?",
+    "Prove the angle sum formula for cosine",
+    "Explain how to compute sin 30 degrees by hand",
+]
+
+# (probe, seed it paraphrases or None when it must not be served a cached answer)
+PROBES = [
+    ("what is the unit circle", "Explain the unit circle"),
+    ("Can you explain the unit circle to me?", "Explain the unit circle"),
+    ("explain unit circle please", "Explain the unit circle"),
+    ("Explain the law of cosines", "What is the law of cosines?"),
+    ("tell me about the law of cosines", "What is the law of cosines?"),
+    ("what's the cosine law", "What is the law of cosines?"),
+    ("Explain the law of sines.", "What is the law of sines?"),
+    ("What is the sine law about?", "What is the law of sines?"),
+    ("explain the double angle formula for sin", "Explain the double angle formula for sine"),
+    ("Double angle formula for sine, explained", "Explain the double angle formula for sine"),
+    ("What is the half-angle identity for cosine?", "What is the half angle identity for cosine?"),
+    ("half angle identity of cos", "What is the half angle identity for cosine?"),
+    ("What is the period of the tangent function", "What is the period of the tangent function?"),
+    ("period of tan function?", "What is the period of the tangent function?"),
+    ("How do I find the amplitude of y = 3 sin(2x)", "How do I find the amplitude of y = 3 sin(2x)?"),
+    ("find the amplitude of y=3sin(2x)", "How do I find the amplitude of y = 3 sin(2x)?"),
+    ("What does radian mean", "What does radian mean?"),
+    ("What is a radian?", "What does radian mean?"),
+    ("Why does sin²x + cos²x equal 1?", "Why is sin²x + cos²x equal to 1?"),
+    ("what is the derivative of sine x", "What is the derivative of sin x?"),
+    ("derivative of sin(x)?", "What is the derivative of sin x?"),
+    ("What is the domain of the inverse sine function", "What is the domain of the inverse sine function?"),
+    ("domain of arcsin function", "What is the domain of the inverse sine function?"),
+    ("How do I solve a right triangle?", "How do you solve a right triangle?"),
+    ("Explain cofunction identities", "Explain the cofunction identities"),
+    ("difference between degrees and radians", "What is the difference between degrees and radians?"),
+    ("Prove the angle sum formula for cosine.", "Prove the angle sum formula for cosine"),
+    ("Could you briefly describe what the unit circle is?", "Explain the unit circle"),
+    ("In simple terms, what does a radian mean?", "What does radian mean?"),
+    ("how are degrees and radians different", "What is the difference between degrees and radians?"),
+    ("how do I compute sin 30° by hand?", "Explain how to compute sin 30 degrees by hand"),
+    # Near misses: close wording, different question
+    ("What is the law of tangents?", None),
+    ("Explain the double angle formula for cosine", None),
+    ("Explain the half angle formula for sine", None),
+    ("What is the half angle identity for tangent?", None),
+    ("What is the period of the sine function?", None),
+    ("How do I find the amplitude of y = 5 sin(2x)?", None),
+    ("How do I find the period of y = 3 sin(2x)?", None),
+    ("What is the derivative of cos x?", None),
+    ("What is the integral of sin x?", None),
+    ("What is the range of the inverse sine function?", None),
+    ("What is the domain of the inverse cosine function?", None),
+    ("Prove the angle difference formula for cosine", None),
+    ("Explain the reciprocal identities", None),
+    ("Why is sec²x - tan²x equal to 1?", None),
+    ("How do you solve an oblique triangle?", None),
+    ("Explain the unit vector", None),
+    ("Who invented the radian?", None),
+    ("Prove the cofunction identities", None),
+    ("Give an example of the law of sines", None),
+    ("When should I use the law of cosines instead of the law of sines?", None),
+    ("What is the history of the unit circle?", None),
+    ("How do you convert degrees to radians?", None),
+    ("How do you find the area of a right triangle?", None),
+    ("Explain how to compute sin 30 by hand", None),  # bare numbers are radians
+    ("Explain how to compute sin 30 radians by hand", None),
+]
+
+ANSWERS = {seed: f"answer {i}" for i, seed in enumerate(SEEDS)}
+
+def evaluate(threshold: float) -> dict:
+    cache = SemanticCache(threshold=threshold, max_entries=len(SEEDS))
+    for seed in SEEDS:
+        cache.put(seed, ANSWERS[seed])
+
+    hits = correct = paraphrases = served = 0
+    mistakes, missed = [], []
+    start = time.perf_counter()
+    for probe, expected in PROBES:
+        answer, score, matched = cache.lookup(probe)
+        paraphrases += expected is not None
+        if answer is None:
+            if expected is not None:
+                missed.append((probe, matched, score))
+            continue
+        hits += 1
+        if expected is not None and answer == ANSWERS[expected]:
+            correct += 1
+            served += 1
+        else:
+            mistakes.append((probe, matched, score))
+    elapsed = time.perf_counter() - start
+    return {
+        "threshold": threshold,
+        "precision": correct / hits if hits else 1.0,
+        "hit_rate": served / paraphrases if paraphrases else 0.0,
+        "false_hits": hits - correct,
+        "lookup_us": elapsed / len(PROBES) * 1e6,
+        "mistakes": mistakes,
+        "missed": missed,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate the semantic cache on labelled paraphrases.")
+    parser.add_argument("--thresholds", type=float, nargs="+",
+                        default=sorted({0.5, 0.6, 0.7, SEMANTIC_CACHE_THRESHOLD, 0.8, 0.9}))
+    parser.add_argument("--show-mistakes", action="store_true", help="List every wrong hit and missed paraphrase.")
+    args = parser.parse_args()
+
+    negatives = sum(expected is None for _, expected in PROBES)
+    print(f"{len(SEEDS)} cached questions, {len(PROBES) - negatives} paraphrases, {negatives} near misses")
+    print(f"{'threshold':>9} {'precision':>10} {'hit rate':>9} {'false hits':>11} {'lookup':>10}")
+    for threshold in args.thresholds:
+        result = evaluate(threshold)
+        marker = "  (default)" if threshold == SEMANTIC_CACHE_THRESHOLD else ""
+        print(f"{threshold:>9.2f} {result['precision']:>10.1%} {result['hit_rate']:>9.1%} "
+              f"{result['false_hits']:>11} {result['lookup_us']:>7.1f} µs{marker}")
+        if args.show_mistakes:
+            for probe, matched, score in result["mistakes"]:
+                print(f"    wrong hit: '{probe}' -> '{matched}' ({score:.2f})")
+            for probe, matched, score in result["missed"]:
+                print(f"    missed:    '{probe}' (closest: '{matched}', {score:.2f})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Cold-start profile of each entry point: import, agent construction, app creation and warm-up, plus import costs.
+
+Every run starts a fresh interpreter with -X importtime, so nothing is cached between runs except the OS page
+cache. Phases are the median over --runs; the import breakdown sums self time per top-level package.
+Entry points that need an OpenAI key get a placeholder one: nothing here calls the API.
+
+    PYTHONPATH=./ python benchmarks/startup_profile.py --runs 3
+    PYTHONPATH=./ python benchmarks/startup_profile.py trigonometry --top 15 --json startup.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from src.launcher import AGENTS
+
+ENTRY_POINTS = [*AGENTS, "client"]
+
+# Runs in the fresh interpreter; prints the phase timings as JSON on its last stdout line
+_PROBE = """
+import importlib, json, sys, time
+name, target = sys.argv[1], sys.argv[2]
+phases = {}
+start = time.perf_counter()
+module = importlib.import_module(target.split(":")[0])
+phases["import"] = time.perf_counter() - start
+if ":" in target:
+    start = time.perf_counter()
+    agent = getattr(module, target.split(":")[1])()
+    phases["construct"] = time.perf_counter() - start
+    start = time.perf_counter()
+    from python_a2a.server.http import create_flask_app
+    app = create_flask_app(agent)
+    phases["app"] = time.perf_counter() - start
+    start = time.perf_counter()
+    from src.readiness import warm_up
+    warm_up(agent)
+    phases["warm_up"] = time.perf_counter() - start
+print(json.dumps(phases))
+"""
+
+def parse_importtime(stderr: str) -> dict[str, float]:
+    """Self time (seconds) per top-level package from -X importtime output."""
+    packages = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        package = name.strip().split(".")[0]
+        packages[package] = packages.get(package, 0.0) + int(self_us) / 1e6
+    return packages
+
+def profile(name: str) -> tuple[dict[str, float], dict[str, float]]:
+    target = AGENTS[name].target if name in AGENTS else "client"
+    env = {**os.environ, "LOG_CONSOLE_LEVEL": "WARNING", "LOG_LEVEL": "WARNING"}
+    env.setdefault("OPENAI_API_KEY", "sk-startup-profile")
+    start = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _PROBE, name, target],
+        env=env, capture_output=True, text=True, check=True,
+    )
+    process = time.perf_counter() - start
+    phases = json.loads(completed.stdout.strip().splitlines()[-1])
+    return {**phases, "process": process}, parse_importtime(completed.stderr)
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile the startup time of each entry point.")
+    parser.add_argument("entry_points", nargs="*", choices=ENTRY_POINTS, help="Default: all of them.")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=8, help="Packages listed in the import breakdown.")
+    parser.add_argument("--json", metavar="PATH", help="Also write the report as JSON.")
+    args = parser.parse_args()
+
+    report = {}
+    for name in args.entry_points or ENTRY_POINTS:
+        runs = [profile(name) for _ in range(args.runs)]
+        phases = {phase: statistics.median(run[0][phase] for run in runs) for phase in runs[0][0]}
+        packages = {package: statistics.median(run[1].get(package, 0.0) for run in runs) for package in runs[-1][1]}
+        top = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:args.top]
+        report[name] = {
+            "phases_ms": {phase: round(seconds * 1000, 1) for phase, seconds in phases.items()},
+            "imports_ms": {package: round(seconds * 1000, 1) for package, seconds in top},
+        }
+        print(f"{name}: " + ", ".join(f"{phase} {seconds * 1000:.0f} ms" for phase, seconds in phases.items()))
+        for package, seconds in top:
+            print(f"    {package:<28} {seconds * 1000:8.1f} ms")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"runs": args.runs, "python": sys.version.split()[0], "entry_points": report}, f, indent=2)
+        print(f"Report written to {args.json}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""Deterministic stand-in for the LLM A2A server (src/local_llm.py) used by the benchmarks.
+
+Answers POST /tasks/send with the same top-level "artifacts" shape as CustomLLMAgent, and
+POST /stream with python_a2a-style SSE chunks, after an optional artificial latency,
+without touching OpenAI. Latency and answer length can follow a distribution instead of being
+fixed; the draws are seeded by the prompt, so the same prompt always gets the same latency and answer.
+Answers stay within the max_tokens budget a templated prompt (src/prompts.py) carries, at ~0.75 words a token.
+
+    python benchmarks/stub_llm_server.py --port 5001 --latency-ms 50
+    python benchmarks/stub_llm_server.py --latency lognormal:300,0.5 --words uniform:20,200
+"""
+import argparse
+import json
+import math
+import random
+import threading
+import time
+import zlib
+
+# name -> parameters: fixed:VALUE, uniform:LOW,HIGH, normal:MEAN,STDDEV, lognormal:MEDIAN,SIGMA
+DISTRIBUTIONS = {"fixed": 1, "uniform": 2, "normal": 2, "lognormal": 2}
+FILLER_WORDS = "the sine of an angle is the ratio of the opposite side to the hypotenuse".split()
+
+def parse_distribution(spec: str) -> tuple[str, tuple[float, ...]]:
+    """Parse "lognormal:300,0.5" into ("lognormal", (300.0, 0.5)); a bare number means fixed."""
+    name, _, params = spec.partition(":") if ":" in spec else ("fixed", "", spec)
+    if name not in DISTRIBUTIONS:
+        raise ValueError(f"Unknown distribution '{name}' (expected one of {', '.join(DISTRIBUTIONS)})")
+    values = tuple(float(value) for value in params.split(","))
+    if len(values) != DISTRIBUTIONS[name]:
+        raise ValueError(f"'{name}' takes {DISTRIBUTIONS[name]} parameter(s), got '{spec}'")
+    return name, values
+
+def sample(distribution: tuple[str, tuple[float, ...]], rng: random.Random) -> float:
+    """One non-negative draw from a parsed distribution."""
+    name, params = distribution
+    if name == "uniform":
+        value = rng.uniform(*params)
+    elif name == "normal":
+        value = rng.gauss(*params)
+    elif name == "lognormal":
+        value = params[0] * math.exp(rng.gauss(0.0, params[1]))
+    else:
+        value = params[0]
+    return max(0.0, value)
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class StubLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the Flask/werkzeug server
+    disable_nagle_algorithm = True
+    latency_s = 0.0
+    response_text = "stub answer"
+    latency_distribution = None  # parsed distribution in milliseconds; overrides latency_s
+    words_distribution = None  # parsed distribution of answer length in words
+    seed = 0
+
+    def _answer(self, message: dict) -> tuple[float, str]:
+        """Latency (seconds) and answer text for a message; identical prompts get identical draws."""
+        fields = (message.get("metadata") or {}).get("custom_fields") or {}
+        prompt = "\n".join(filter(None, [fields.get("system"), message.get("content", {}).get("text", "")]))
+        rng = random.Random(zlib.crc32(prompt.encode("utf-8")) ^ self.seed)
+        latency = sample(self.latency_distribution, rng) / 1000 if self.latency_distribution else self.latency_s
+        text = f"{self.response_text} ({len(prompt)} chars)"
+        if self.words_distribution:
+            words = round(sample(self.words_distribution, rng))
+            if fields.get("max_tokens"):
+                words = min(words, int(fields["max_tokens"] * 0.75))
+            text = " ".join([text] + [FILLER_WORDS[i % len(FILLER_WORDS)] for i in range(words)])
+        if "python code" in prompt.lower():
+            # A snippet that passes the coding agent's validation, so its sandbox and cache are exercised too
+            text = f"```python\n# {text}\nprint({len(prompt)})\n```"
+        return latency, text
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        if self.path == "/stream":
+            return self._stream(request)
+        latency, text = self._answer(request.get("message", {}))
+        if latency:
+            time.sleep(latency)
+        body = json.dumps({
+            "id": request.get("id", ""),
+            "artifacts": [{"parts": [{"type": "text", "text": text}]}],
+            "status": {"state": "completed"},
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream(self, message):
+        # Spread the latency over the chunks, like tokens trickling out of a real model
+        latency, text = self._answer(message)
+        words = text.split(" ")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        for index, word in enumerate(words):
+            time.sleep(latency / len(words))
+            chunk = {"content": word + " ", "index": index, "append": True}
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            self.wfile.flush()
+        self.wfile.write(f"data: {json.dumps({'content': '', 'index': len(words), 'append': True, 'lastChunk': True})}\n\n".encode())
+        self.close_connection = True
+
+    def log_message(self, format, *args):
+        pass
+
+def start_stub_server(port: int = 5001, latency_ms: float = 0.0, latency: str = None, words: str = None,
+                      seed: int = 0) -> ThreadingHTTPServer:
+    """Start the stub server in a daemon thread and return it (call .shutdown() to stop).
+
+    latency (milliseconds) and words take distribution specs like "lognormal:300,0.5"; latency replaces latency_ms.
+    """
+    handler = type("ConfiguredStubLLMHandler", (StubLLMHandler,), {
+        "latency_s": latency_ms / 1000,
+        "latency_distribution": parse_distribution(latency) if latency else None,
+        "words_distribution": parse_distribution(words) if words else None,
+        "seed": seed,
+    })
+    server_class = type("StubLLMServer", (ThreadingHTTPServer,), {"request_queue_size": 1024})
+    server = server_class(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=5001)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--latency", help="Latency distribution in ms, e.g. uniform:20,80 or lognormal:300,0.5 (overrides --latency-ms).")
+    parser.add_argument("--words", help="Distribution of extra words per answer, e.g. fixed:100 or normal:150,40.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    server = start_stub_server(args.port, args.latency_ms, args.latency, args.words, args.seed)
+    print(f"Stub LLM server listening on port {args.port} (latency {args.latency or f'{args.latency_ms} ms'}). Press Ctrl+C to stop.")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
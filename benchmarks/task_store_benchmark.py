@@ -0,0 +1,77 @@
+"""Write and read throughput of the task stores (src/task_store.py), and how long bulk cleanup takes.
+
+Each store gets the same workload: --tasks completed tasks written from --threads threads, then read back by ID
+in random order, then expired and removed in one cleanup. The Redis store runs against the in-process stand-in
+unless --redis-url points at a server.
+
+    PYTHONPATH=./ python benchmarks/task_store_benchmark.py --tasks 20000 --threads 8
+    PYTHONPATH=./ python benchmarks/task_store_benchmark.py --stores sqlite redis --redis-url redis://localhost:6379/15
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from python_a2a import Task, TaskState, TaskStatus
+from benchmarks.async_load_test import percentile
+from src.task_store import create_task_store
+
+def make_task(i: int) -> Task:
+    task = Task(message={"role": "user", "content": {"type": "text", "text": f"What is sin({i}) degrees?"}})
+    task.artifacts = [{"parts": [{"type": "text", "text": f"sin {i} degrees = {i / 90:.10f}"}]}]
+    task.status = TaskStatus(state=TaskState.COMPLETED)
+    return task
+
+def timed(operation, items: list, threads: int) -> tuple[float, list[float]]:
+    def one(item):
+        start = time.perf_counter()
+        operation(item)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        latencies = list(executor.map(one, items))
+    return time.perf_counter() - start, latencies
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the memory, SQLite and Redis task stores.")
+    parser.add_argument("--stores", nargs="+", choices=["memory", "sqlite", "redis"], default=["memory", "sqlite", "redis"])
+    parser.add_argument("--tasks", type=int, default=20000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--redis-url", help="Benchmark a real Redis server instead of the in-process stand-in.")
+    args = parser.parse_args()
+
+    tasks = [make_task(i) for i in range(args.tasks)]
+    ids = [task.id for task in tasks]
+    random.Random(0).shuffle(ids)
+    print(f"{args.tasks} tasks, {args.threads} threads")
+    print(f"{'store':<8} {'writes/s':>10} {'write p99':>10} {'reads/s':>10} {'read p99':>10} {'cleanup':>10}")
+    with tempfile.TemporaryDirectory() as directory:
+        urls = {
+            "memory": "memory",
+            "sqlite": f"sqlite:///{os.path.join(directory, 'tasks.db')}",
+            "redis": args.redis_url or "redis+local://",
+        }
+        for name in args.stores:
+            store = create_task_store(urls[name], ttl_seconds=3600)
+            write_time, write_latencies = timed(store.put, tasks, args.threads)
+            read_time, read_latencies = timed(store.get, ids, args.threads)
+            assert store.get(ids[0]) is not None
+
+            # Expire everything, then time removing it in bulk. Redis expires keys itself, so there the bulk
+            # operation timed is clear() of the live keys
+            if name != "redis":
+                store.ttl_seconds = 0.001
+                for task in tasks:
+                    store.put(task)
+                time.sleep(0.01)
+            start = time.perf_counter()
+            removed = store.clear() if name == "redis" else store.cleanup()
+            cleanup_time = time.perf_counter() - start
+            print(f"{name:<8} {args.tasks / write_time:>10.0f} {percentile(write_latencies, 99) * 1e6:>8.0f}us "
+                  f"{args.tasks / read_time:>10.0f} {percentile(read_latencies, 99) * 1e6:>8.0f}us "
+                  f"{cleanup_time * 1000:>8.1f}ms  ({removed} removed)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Throughput of one agent server as the number of worker processes grows (src/launcher.py).
+
+For each worker count the launcher is started on its own port against a stub LLM server. Once it reports
+ready, the same load is fired at it. The "local" workload is CPU-bound: fast-path calculations that never
+leave the agent, so it scales with cores. The "llm" workload waits on the stub, so it scales with concurrency.
+
+    PYTHONPATH=./ python benchmarks/worker_scaling.py --workers 1 2 4 8 --workload local
+    PYTHONPATH=./ python benchmarks/worker_scaling.py --workers 1 4 --workload llm --latency-ms 200 --async-mode
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import time
+from benchmarks.async_load_test import fire, percentile, serve_stub
+
+WORKLOADS = {
+    "local": "sin {i} degrees",
+    "llm": "Explain the unit circle #{i}",
+}
+
+def start_launcher(agent: str, workers: int, port: int, async_mode: bool, llm_port: int) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "LLM_SERVER_URL": f"http://127.0.0.1:{llm_port}",
+        # Keep per-task log lines out of the measurement
+        "LOG_LEVEL": "WARNING",
+        "LOG_CONSOLE_LEVEL": "WARNING",
+    }
+    command = [sys.executable, "-m", "src.launcher", agent, "--workers", str(workers), "--port", str(port), "--host", "127.0.0.1"]
+    if async_mode:
+        command += ["--async-mode", "--max-queue", "100000"]
+    process = subprocess.Popen(command, env=env, stdout=subprocess.PIPE, text=True)
+    for line in process.stdout:
+        if line.strip() == "ready":
+            return process
+    raise RuntimeError(f"Launcher exited with {process.wait()} before reporting ready")
+
+def stop_launcher(process: subprocess.Popen):
+    process.send_signal(signal.SIGTERM)
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure agent throughput for increasing worker process counts.")
+    parser.add_argument("--agent", default="trigonometry", choices=["trigonometry", "coding"])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1])
+    parser.add_argument("--workload", choices=WORKLOADS, default="local")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--latency-ms", type=float, default=200.0, help="Stub LLM latency for the llm workload.")
+    parser.add_argument("--async-mode", action="store_true")
+    parser.add_argument("--port", type=int, default=8201)
+    parser.add_argument("--llm-port", type=int, default=5097)
+    args = parser.parse_args()
+
+    # Own process, so the stub doesn't compete with the load generator for the GIL
+    stub = multiprocessing.Process(target=serve_stub, args=(args.llm_port, args.latency_ms), daemon=True)
+    stub.start()
+    print(f"{os.cpu_count()} cores, {args.agent} agent, {args.workload} workload, "
+          f"{'async' if args.async_mode else 'threaded'} workers, concurrency {args.concurrency}")
+    print(f"{'workers':>7} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'failed':>7} {'speedup':>8}")
+    baseline = None
+    try:
+        for i, workers in enumerate(sorted(set(args.workers))):
+            port = args.port + i  # a fresh port per run, so no connection lingers from the previous launcher
+            launcher = start_launcher(args.agent, workers, port, args.async_mode, args.llm_port)
+            try:
+                url = f"http://127.0.0.1:{port}/tasks/send"
+                asyncio.run(fire(url, args.concurrency, args.concurrency, WORKLOADS[args.workload]))  # warm connections
+                latencies, elapsed, failures = asyncio.run(fire(url, args.concurrency, args.requests, WORKLOADS[args.workload]))
+            finally:
+                stop_launcher(launcher)
+            throughput = args.requests / elapsed
+            baseline = baseline or throughput
+            print(f"{workers:>7} {throughput:>9.1f} {statistics.median(latencies) * 1000:>9.1f} "
+                  f"{percentile(latencies, 99) * 1000:>9.1f} {failures:>7} {throughput / baseline:>7.2f}x")
+            time.sleep(0.5)
+    finally:
+        stub.terminate()
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,10 @@
 import sys
 import os
+import argparse
 import asyncio
 import logging
 import json
-import httpx
+import time
 
 # Add the 'src' directory to the Python path
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -13,52 +14,129 @@ if src_path not in sys.path:
     sys.path.insert(0, src_path)
 
 from python_a2a import AgentNetwork, A2AClient, AIAgentRouter
+from src.http_client import get_http_client, get_async_http_client, LLM_SERVER_URL
+from src.streaming import stream_sse_text
+from src.router import LocalAgentRouter, plan_query
+from src.metrics import MetricsRegistry
+from src.tracing import Tracer, trace_a2a_client
 
 # Suppress python_a2a library's internal logging for cleaner output
 logging.getLogger("python_a2a").setLevel(logging.WARNING)
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+# Client-side stages of each query; the request ID is forwarded to the agents and on to the LLM server
+tracer = Tracer(MetricsRegistry(), "client")
+
+AGENT_URLS = {
+    "trigonometry_math": "http://localhost:8001",
+    "coding": "http://localhost:8003"
+}
+
+ROUTER_SYSTEM_PROMPT = "You are an agent routing system. Based on the user's query, decide which agent is best suited to handle it. \
+            The available agents are 'trigonometry_math' for calculations and trigonometric identities, and 'coding' for generating Python code. \
+            Return your response in the format: agent_name|confidence_score. For confidence_score, use 1.0 if you are confident, or 0.5 if you are unsure. Example: 'coding|1.0'."
+
+def build_network(agent_urls=AGENT_URLS):
+    """AgentNetwork of the agents, with every agent.ask call carrying the current request ID."""
+    network = AgentNetwork(name="Trigonometry Assistant Network")
+    for name, url in agent_urls.items():
+        network.add(name, url)
+    for agent_client in network.agents.values():
+        trace_a2a_client(agent_client)
+    return network
+
+def build_router(network, routing_threshold=0.6, llm_url=LLM_SERVER_URL):
+    """Return (llm_client, router): local skill-based routing with the LLM router as low-confidence fallback."""
+    llm_client = trace_a2a_client(A2AClient(llm_url))
+    llm_router = AIAgentRouter(llm_client=llm_client, agent_network=network, system_prompt=ROUTER_SYSTEM_PROMPT)
+    # Decide locally from the agents' declared skills; only low-confidence queries cost an LLM routing call
+    router = LocalAgentRouter.from_agent_network(network, fallback_router=llm_router, confidence_threshold=routing_threshold)
+    return llm_client, router
+
+def response_text_of(response) -> str:
+    """The answer text of an agent.ask response: a python_a2a result dict or plain text."""
+    response_text = "No valid response or processing failed."
+
+    if isinstance(response, dict):
+        result = response.get("result", {})
+        status = result.get("status", {})
+
+        if status.get("state") == "input-required":
+            content_text = status.get("message", {}).get("content", {}).get("text", "Input required message")
+            response_text = f"Agent requested input: {content_text}"
+        elif "artifacts" in result:
+            artifacts = result["artifacts"]
+            if artifacts and isinstance(artifacts, list) and len(artifacts) > 0 and "parts" in artifacts[0]:
+                parts = artifacts[0]["parts"]
+                if parts and isinstance(parts, list) and len(parts) > 0 and "text" in parts[0]:
+                    response_text = parts[0]["text"]
+        else:
+            try:
+                response_text = json.dumps(response, indent=2)
+            except TypeError:
+                response_text = str(response)
+    else:
+        response_text = str(response)
+    return response_text
+
+def print_overlap(timings, wall):
+    """Show that a fan-out's sub-tasks ran at the same time: wall time close to the slowest, not the sum."""
+    sequential = sum(seconds for _, seconds in timings)
+    parts = ", ".join(f"{agent_name} {seconds:.2f}s" for agent_name, seconds in timings)
+    print(f"[fan-out: {parts}; wall {wall:.2f}s vs {sequential:.2f}s sequential, {sequential - wall:.2f}s overlapped]")
+
+async def ask_agent(network, agent_name, query):
+    """One sub-task of a fan-out: (answer text, seconds). Failures become the answer text, so the other parts still count."""
+    start = time.perf_counter()
+    try:
+        with tracer.span(f"agent:{agent_name}"):
+            response = await asyncio.to_thread(network.get_agent(agent_name).ask, query)
+        text = response_text_of(response)
+    except Exception as e:
+        text = f"Error from {agent_name}: {e}"
+    return text, time.perf_counter() - start
+
+async def fan_out(network, plan):
+    """Ask the agent of every part of a multi-part query at once and merge the answers in the query's order."""
+    start = time.perf_counter()
+    with tracer.span("agent"):
+        results = await asyncio.gather(*(ask_agent(network, agent_name, sub_query) for sub_query, agent_name, _ in plan))
+    print_overlap([(agent_name, seconds) for (_, agent_name, _), (_, seconds) in zip(plan, results)], time.perf_counter() - start)
+    return "\n\n".join(f"[{agent_name}] {sub_query}\n{text}" for (sub_query, agent_name, _), (text, _) in zip(plan, results))
 
 async def query_agent(network, llm_client, router, query):
+    """Route and answer one query, printing each step. Returns the answer text, or None if the query failed.
+
+    A query asking several agents for something ("explain X and give me Python code for it") is split, its parts
+    are sent to their agents concurrently, and the answers are merged.
+    """
     loop = asyncio.get_event_loop()
     print(f"\nQuery: {query}")
     
     try:
-        # router.route_query is a blocking call (we offload it to a separate thread to avoid blocking the async flow.)
-        agent_name, confidence = await loop.run_in_executor(None, router.route_query, query)
-        print(f"Routing to {agent_name} with {confidence:.2f} confidence")
-        
-        agent = network.get_agent(agent_name)
-        
-        # agent.ask is a blocking call (we offload it to a separate thread to avoid blocking the async flow.)
-        response = await loop.run_in_executor(None, agent.ask, query)
-        
-        response_text = "No valid response or processing failed."
-        
-        if isinstance(response, dict):
-            result = response.get("result", {})
-            status = result.get("status", {})
-            
-            if status.get("state") == "input-required":
-                content_text = status.get("message", {}).get("content", {}).get("text", "Input required message")
-                response_text = f"Agent requested input: {content_text}"
-            elif "artifacts" in result:
-                artifacts = result["artifacts"]
-                if artifacts and isinstance(artifacts, list) and len(artifacts) > 0 and "parts" in artifacts[0]:
-                    parts = artifacts[0]["parts"]
-                    if parts and isinstance(parts, list) and len(parts) > 0 and "text" in parts[0]:
-                        response_text = parts[0]["text"]
+        with tracer.request() as trace:
+            # routing is blocking (offloaded with asyncio.to_thread, which also carries the trace along)
+            with tracer.span("routing"):
+                plan = await asyncio.to_thread(plan_query, router, query)
+            for sub_query, agent_name, confidence in plan:
+                print(f"Routing {'to' if len(plan) == 1 else f'{sub_query!r} to'} {agent_name} with {confidence:.2f} confidence")
+
+            if len(plan) > 1:
+                response_text = await fan_out(network, plan)
             else:
-                try:
-                    response_text = json.dumps(response, indent=2)
-                except TypeError:
-                    response_text = str(response)
-        else:
-            response_text = str(response)
+                agent = network.get_agent(plan[0][1])
+
+                # agent.ask is a blocking call (we offload it to a separate thread to avoid blocking the async flow.)
+                with tracer.span("agent"):
+                    response = await asyncio.to_thread(agent.ask, query)
+                response_text = response_text_of(response)
+        print(f"[request {trace.request_id}: {trace.summary()}]")
             
         print(f"Agent Response: {response_text}")
         
         try:
-            print("DEBUG: Attempting raw httpx.post to LLM server for summary/ping.")
-            llm_server_url = "http://localhost:5001/tasks/send" 
+            print("DEBUG: Attempting pooled httpx post to LLM server for summary/ping.")
+            llm_server_url = f"{LLM_SERVER_URL}/tasks/send"
             ping_payload = {"message": {"content": {"text": "Hello LLM, this is a client ping."}}}
 
             # Comment out the A2AClient based summary call
@@ -68,7 +146,7 @@ async def query_agent(network, llm_client, router, query):
             # llm_response = await loop.run_in_executor(None, temp_summary_llm_client.ask, summary_request)
             # print(f"LLM Summary: {llm_response}")
 
-            http_post_lambda = lambda: httpx.post(llm_server_url, json=ping_payload, timeout=10)
+            http_post_lambda = lambda: get_http_client().post(llm_server_url, json=ping_payload, timeout=10)
             raw_response = await loop.run_in_executor(None, http_post_lambda)
             
             print(f"DEBUG: LLM raw status: {raw_response.status_code}")
@@ -87,36 +165,197 @@ async def query_agent(network, llm_client, router, query):
                     llm_summary_text = response_json["result"]["artifacts"][0]["parts"][0]["text"]
                 elif response_json.get("message", {}).get("content", {}).get("text"): # Fallback for simple text responses
                     llm_summary_text = response_json["message"]["content"]["text"]
-                print(f"LLM Ping/Summary (raw httpx): {llm_summary_text}")
+                print(f"LLM Ping/Summary (pooled httpx): {llm_summary_text}")
             else:
-                print(f"LLM Ping/Summary (raw httpx) Error: Status {raw_response.status_code} - {raw_response.text[:200]}")
+                print(f"LLM Ping/Summary (pooled httpx) Error: Status {raw_response.status_code} - {raw_response.text[:200]}")
 
         except Exception as e:
-            print(f"LLM Summary (raw httpx): Error - {str(e)}")
-            
+            print(f"LLM Summary (pooled httpx): Error - {str(e)}")
+
+        return response_text
     except Exception as e:
         print(f"Error processing query '{query}': {str(e)}")
+        return None
 
-async def main():
-    network = AgentNetwork(name="Trigonometry Assistant Network")
-    
-    agents = {
-        "trigonometry_math": "http://localhost:8001",
-        "coding": "http://localhost:8003"
+async def stream_fan_out(network, plan):
+    """Stream every part of a multi-part query at once; the first part prints live, later ones as soon as it ends."""
+    async def collect(sub_query, agent_name, chunks):
+        start = time.perf_counter()
+        try:
+            async for chunk in stream_sse_text(f"{network.agent_urls[agent_name]}/stream", sub_query):
+                await chunks.put(chunk)
+        except Exception as e:
+            await chunks.put(f"Error from {agent_name}: {e}")
+        await chunks.put(None)
+        return agent_name, time.perf_counter() - start
+
+    start = time.perf_counter()
+    queues = [asyncio.Queue() for _ in plan]
+    tasks = [asyncio.create_task(collect(sub_query, agent_name, chunks)) for (sub_query, agent_name, _), chunks in zip(plan, queues)]
+    for (sub_query, agent_name, _), chunks in zip(plan, queues):
+        print(f"\n[{agent_name}] {sub_query}")
+        while (chunk := await chunks.get()) is not None:
+            print(chunk, end="", flush=True)
+    timings = await asyncio.gather(*tasks)
+    print()
+    print_overlap(timings, time.perf_counter() - start)
+
+async def query_agent_streaming(network, router, query):
+    """Like query_agent, but prints the answer chunk by chunk as the agent streams it."""
+    print(f"\nQuery: {query}")
+
+    try:
+        with tracer.request() as trace:
+            with tracer.span("routing"):
+                plan = await asyncio.to_thread(plan_query, router, query)
+            if len(plan) > 1:
+                for sub_query, agent_name, confidence in plan:
+                    print(f"Routing {sub_query!r} to {agent_name} with {confidence:.2f} confidence")
+                with tracer.span("agent"):
+                    await stream_fan_out(network, plan)
+                print(f"[request {trace.request_id}: {trace.summary()}]")
+                return
+            _, agent_name, confidence = plan[0]
+            print(f"Routing to {agent_name} with {confidence:.2f} confidence")
+
+            start = time.perf_counter()
+            first_chunk_at = None
+            print("Agent Response: ", end="", flush=True)
+            async for chunk in stream_sse_text(f"{network.agent_urls[agent_name]}/stream", query):
+                if first_chunk_at is None:
+                    first_chunk_at = time.perf_counter()
+                    tracer.record("first_chunk", first_chunk_at - start)
+                print(chunk, end="", flush=True)
+            total = time.perf_counter() - start
+            tracer.record("agent", total)
+        time_to_first_chunk = (first_chunk_at or time.perf_counter()) - start
+        print(f"\n[time to first chunk: {time_to_first_chunk:.2f}s, total: {total:.2f}s]")
+        print(f"[request {trace.request_id}: {trace.summary()}]")
+    except Exception as e:
+        print(f"\nError streaming query '{query}': {str(e)}")
+
+BATCH_QUERY_FIELDS = ("query", "text", "body")
+
+def read_batch_queries(path):
+    """Yield (record, query) for each JSONL line: an object with a query/text/body field, a JSON string or plain text.
+
+    Other JSON values (numbers, lists, null) are reported and yielded with no query, so they get a failed result.
+    """
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                record = line
+            if isinstance(record, str):
+                record = {"query": record}
+            elif not isinstance(record, dict):
+                print(f"{path}:{line_number}: expected a JSON object or string, got {type(record).__name__}; it gets a failed result.")
+                yield {"line": line_number, "record": record}, None
+                continue
+            query = next((record[field] for field in BATCH_QUERY_FIELDS if isinstance(record.get(field), str)), None)
+            yield record, query
+
+async def merge_results(future, parts):
+    """Resolve a multi-part query's future with its parts' batch results merged; its latency is the slowest part's."""
+    results = [await part for part in parts]
+    merged = {
+        "agent": "+".join(result["agent"] for result in results),
+        "state": "completed" if all(result["state"] == "completed" for result in results) else "failed",
+        "response": "\n\n".join(f"[{result['agent']}] {result['query']}\n{result['response']}" for result in results),
     }
-    
-    for name, url in agents.items():
-        network.add(name, url)
-    
-    llm_client = A2AClient("http://localhost:5001") 
-    
-    router = AIAgentRouter(
-        llm_client=llm_client, 
-        agent_network=network,
-        system_prompt="You are an agent routing system. Based on the user's query, decide which agent is best suited to handle it. \
-            The available agents are 'trigonometry_math' for calculations and trigonometric identities, and 'coding' for generating Python code. \
-            Return your response in the format: agent_name|confidence_score. For confidence_score, use 1.0 if you are confident, or 0.5 if you are unsure. Example: 'coding|1.0'."
-    )
+    if all("latency_ms" in result for result in results):
+        merged["latency_ms"] = max(result["latency_ms"] for result in results)
+    future.set_result(merged)
+
+async def run_batch_file(network, router, input_path, output_path, workers=8, batch_size=32):
+    """Answer every query in a JSONL file through the agents' /tasks/batch endpoints.
+
+    Duplicate queries are sent once. Unique queries are routed, grouped per agent into chunks of batch_size and
+    dispatched with at most `workers` requests in flight. The parts of a multi-part query go to their agents as
+    separate batch items and are merged into one result. Results are written to output_path in input order as
+    soon as each one (and everything before it) is available.
+    """
+    loop = asyncio.get_event_loop()
+    records = list(read_batch_queries(input_path))
+    start = time.perf_counter()
+
+    # One future per distinct normalized query; duplicates share it
+    futures = {}
+    for _, query in records:
+        key = " ".join(query.lower().split()) if query else None
+        if key and key not in futures:
+            futures[key] = (query, loop.create_future())
+
+    plans = await asyncio.gather(*(loop.run_in_executor(None, plan_query, router, query) for query, _ in futures.values()))
+    chunks, merges = {}, []
+    for (query, future), plan in zip(futures.values(), plans):
+        if len(plan) == 1:
+            chunks.setdefault(plan[0][1], []).append((query, future))
+            continue
+        parts = [loop.create_future() for _ in plan]
+        for (sub_query, agent_name, _), part in zip(plan, parts):
+            chunks.setdefault(agent_name, []).append((sub_query, part))
+        merges.append(asyncio.create_task(merge_results(future, parts)))
+
+    semaphore = asyncio.Semaphore(workers)
+
+    async def dispatch(agent_name, items):
+        async with semaphore:
+            try:
+                response = await get_async_http_client().post(
+                    f"{network.agent_urls[agent_name]}/tasks/batch",
+                    json={"queries": [query for query, _ in items]},
+                    timeout=300.0,
+                )
+                response.raise_for_status()
+                results = response.json()["results"]
+            except Exception as e:
+                results = [{"query": query, "state": "failed", "response": f"Batch request failed: {e}"} for query, _ in items]
+        for (_, future), result in zip(items, results):
+            future.set_result({"agent": agent_name, **result})
+
+    tasks = [
+        asyncio.create_task(dispatch(agent_name, items[i:i + batch_size]))
+        for agent_name, items in chunks.items()
+        for i in range(0, len(items), batch_size)
+    ]
+
+    latencies = []
+    failures = 0
+    with open(output_path, "w", encoding="utf-8") as out:
+        for record, query in records:
+            if query is None:
+                result = {"state": "failed", "response": f"No query found (expected one of {', '.join(BATCH_QUERY_FIELDS)})."}
+            else:
+                # Duplicates share the first occurrence's result; keep each record's own query text
+                result = {**await futures[" ".join(query.lower().split())][1], "query": query}
+                if "latency_ms" in result:
+                    latencies.append(result["latency_ms"])
+            failures += result["state"] != "completed"
+            out.write(json.dumps({**record, **result}, ensure_ascii=False) + "\n")
+            out.flush()
+    await asyncio.gather(*tasks, *merges)
+
+    elapsed = time.perf_counter() - start
+    print(f"Answered {len(records)} queries ({len(futures)} unique, {failures} failed) in {elapsed:.2f}s "
+          f"-> {len(records) / elapsed:.1f} queries/s. Results written to {output_path}")
+    if latencies:
+        latencies.sort()
+        p99 = latencies[min(len(latencies) - 1, int(0.99 * len(latencies)))]
+        print(f"Per-query latency: mean {sum(latencies) / len(latencies):.1f} ms, "
+              f"p50 {latencies[len(latencies) // 2]:.1f} ms, p99 {p99:.1f} ms")
+
+async def main(stream=False, routing_threshold=0.6, batch_input=None, batch_output=None, workers=8, batch_size=32):
+    network = build_network()
+    llm_client, router = build_router(network, routing_threshold)
+
+    if batch_input:
+        await run_batch_file(network, router, batch_input, batch_output, workers=workers, batch_size=batch_size)
+        return
     
     # Test queries
     # test_queries = [
@@ -155,7 +394,10 @@ async def main():
                 continue
             
             # Ensure there's a query before running    
-            await query_agent(network, llm_client, router, user_query)
+            if stream:
+                await query_agent_streaming(network, router, user_query)
+            else:
+                await query_agent(network, llm_client, router, user_query)
             print("-" * 40)
             
         except KeyboardInterrupt:
@@ -178,26 +420,37 @@ async def check_agents_health(network):
         except Exception as e:
             print(f"✗ {agent_name}: Offline - {str(e)}")
 
-async def main_with_health_check():
+async def main_with_health_check(stream=False, routing_threshold=0.6, **batch_options):
     """Main function with agent health verification"""
     network = AgentNetwork(name="Trigonometry Assistant Network")
     
-    agents = {
-        "trigonometry_math": "http://localhost:8001",
-        "coding": "http://localhost:8003"
-    }
-    
-    for name, url in agents.items():
+    for name, url in AGENT_URLS.items():
         network.add(name, url)
     
     await check_agents_health(network)
     
     # Continue with main execution
-    await main()
+    await main(stream=stream, routing_threshold=routing_threshold, **batch_options)
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Interactive client for the Trigonometry Assistant Network.")
+    parser.add_argument("--stream", action="store_true", help="Print answers as they are streamed instead of waiting for the full response.")
+    parser.add_argument("--routing-threshold", type=float, default=0.6, help="Local router confidence below which the LLM router decides.")
+    parser.add_argument("--batch", metavar="INPUT_JSONL", help="Answer every query in a JSONL file instead of starting interactive mode.")
+    parser.add_argument("--output", default="results.jsonl", help="Batch mode: JSONL file the results are written to, in input order.")
+    parser.add_argument("--workers", type=int, default=8, help="Batch mode: max concurrent batch requests to the agents.")
+    parser.add_argument("--batch-size", type=int, default=32, help="Batch mode: queries per /tasks/batch request.")
+    args = parser.parse_args()
+
     try:
-        asyncio.run(main_with_health_check())
+        asyncio.run(main_with_health_check(
+            stream=args.stream,
+            routing_threshold=args.routing_threshold,
+            batch_input=args.batch,
+            batch_output=args.output,
+            workers=args.workers,
+            batch_size=args.batch_size,
+        ))
     except KeyboardInterrupt:
         print("\nApplication terminated by user.")
     except Exception as e:
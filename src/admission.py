@@ -0,0 +1,208 @@
+import asyncio
+import heapq
+import itertools
+import os
+import threading
+import time
+from flask import g, jsonify, request
+from src.metrics import MetricsRegistry
+from src.tracing import Tracer
+
+# Flask-mode limits (the async server takes --max-in-flight / --max-queue instead)
+ADMISSION_MAX_IN_FLIGHT = int(os.getenv("ADMISSION_MAX_IN_FLIGHT", "64"))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "256"))
+# A task that has waited this long for a slot is shed, so queueing delay (and tail latency) stays bounded
+ADMISSION_MAX_WAIT_SECONDS = float(os.getenv("ADMISSION_MAX_WAIT_SECONDS", "10.0"))
+
+# Lower runs first. Agents rank their tasks with task_priority(text); the default is PRIORITY_LLM.
+PRIORITY_LOCAL = 0  # answered in-process (fast path, catalog, tables, caches)
+PRIORITY_LLM = 1    # one LLM call
+PRIORITY_CODE = 2   # long generations (code)
+
+# /tasks/batch is not gated as a whole: register_batch_route admits each of its queries on its own
+ADMITTED_PATHS = {"/tasks/send", "/a2a/tasks/send"}
+BUSY_BODY = {"error": "Server busy, retry later."}
+BUSY_HEADERS = {"Retry-After": "1"}
+
+class _Waiter:
+    __slots__ = ("priority", "seq", "enqueued", "notify", "state")
+
+    def __init__(self, priority: int, seq: int, notify):
+        self.priority = priority
+        self.seq = seq
+        self.enqueued = time.perf_counter()
+        self.notify = notify  # called (under the lock) once state leaves "waiting"
+        self.state = "waiting"  # -> "admitted" or a shed reason
+
+    def __lt__(self, other):
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+class AdmissionControl:
+    """Bounded priority queue in front of task handling, for threads (Flask) and coroutines (async server).
+
+    At most max_in_flight tasks run at once. Others wait in priority order (FIFO within a priority) for up to
+    max_wait seconds. A task is shed, and the server answers 503 with Retry-After, when the queue already holds
+    max_queue tasks of equal or higher priority, when a higher-priority task takes its place in a full queue, or
+    when its wait runs out.
+    """
+
+    def __init__(self, max_in_flight: int, max_queue: int, metrics: MetricsRegistry, tracer: Tracer = None,
+                 max_wait: float = ADMISSION_MAX_WAIT_SECONDS):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.tracer = tracer
+        self.metrics = metrics
+        self._running = 0
+        self._heap = []  # waiting _Waiters; shed ones stay until popped
+        self._waiting = 0
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self.in_flight = metrics.gauge("a2a_tasks_in_flight", "Tasks currently being processed.")
+        self.queued = metrics.gauge("a2a_tasks_queued", "Tasks waiting for an in-flight slot.")
+
+    def _rejected(self, reason: str):
+        self.metrics.counter("a2a_tasks_rejected_total", "Tasks shed with 503, by reason.", labels={"reason": reason}).inc()
+
+    def _set_gauges(self):
+        self.in_flight.set(self._running)
+        self.queued.set(self._waiting)
+
+    def _enter(self, priority: int, notify) -> _Waiter | bool:
+        """Take a slot (True), join the queue (a _Waiter), or get shed (False). Caller holds self._lock."""
+        if self._running < self.max_in_flight and self._waiting == 0:
+            self._running += 1
+            self._set_gauges()
+            return True
+        if self._waiting >= self.max_queue:
+            worst = max((waiter for waiter in self._heap if waiter.state == "waiting"), default=None)
+            if worst is None or worst.priority <= priority:
+                self._rejected("queue_full")
+                return False
+            # The newcomer outranks the least urgent waiter: that one is shed instead
+            self._shed(worst, "displaced")
+        waiter = _Waiter(priority, next(self._seq), notify)
+        heapq.heappush(self._heap, waiter)
+        self._waiting += 1
+        self._set_gauges()
+        return waiter
+
+    def _shed(self, waiter: _Waiter, reason: str):
+        # Caller holds self._lock
+        waiter.state = reason
+        self._waiting -= 1
+        self._rejected(reason)
+        waiter.notify()
+
+    def _leave(self):
+        """Hand the slot to the most urgent waiter, or free it. Caller holds self._lock."""
+        while self._heap:
+            waiter = heapq.heappop(self._heap)
+            if waiter.state == "waiting":
+                waiter.state = "admitted"
+                self._waiting -= 1
+                self._set_gauges()
+                waiter.notify()
+                return
+        self._running -= 1
+        self._set_gauges()
+
+    def _timed_out(self, waiter: _Waiter) -> bool:
+        """Settle a waiter whose wait ended: True if it was admitted after all. Caller holds self._lock."""
+        if waiter.state == "waiting":
+            self._shed(waiter, "timeout")
+        return waiter.state == "admitted"
+
+    def _admitted(self, waiter: _Waiter, priority: int):
+        seconds = time.perf_counter() - waiter.enqueued
+        self.metrics.histogram("a2a_queue_wait_seconds", "Time tasks waited for an in-flight slot, by priority.",
+                               labels={"priority": str(priority)}).observe(seconds)
+        if self.tracer is not None:
+            self.tracer.record("queue", seconds)
+
+    def acquire(self, priority: int = PRIORITY_LLM) -> bool:
+        """Block until the task may run (True) or is shed (False). Call release() after a True."""
+        event = threading.Event()
+        with self._lock:
+            waiter = self._enter(priority, event.set)
+        if isinstance(waiter, bool):
+            return waiter
+        event.wait(self.max_wait)
+        with self._lock:
+            if not self._timed_out(waiter):
+                return False
+        self._admitted(waiter, priority)
+        return True
+
+    async def aacquire(self, priority: int = PRIORITY_LLM) -> bool:
+        """Async counterpart of acquire."""
+        loop = asyncio.get_running_loop()
+        admitted = loop.create_future()
+
+        def notify():
+            loop.call_soon_threadsafe(lambda: admitted.done() or admitted.set_result(None))
+        with self._lock:
+            waiter = self._enter(priority, notify)
+        if isinstance(waiter, bool):
+            return waiter
+        try:
+            await asyncio.wait_for(asyncio.shield(admitted), self.max_wait)
+        except asyncio.TimeoutError:
+            pass
+        except asyncio.CancelledError:
+            with self._lock:
+                if waiter.state == "admitted":
+                    self._leave()  # admitted just as the request was cancelled: pass the slot on
+                elif waiter.state == "waiting":
+                    waiter.state = "cancelled"
+                    self._waiting -= 1
+                    self._set_gauges()
+            raise
+        with self._lock:
+            if not self._timed_out(waiter):
+                return False
+        self._admitted(waiter, priority)
+        return True
+
+    def release(self):
+        with self._lock:
+            self._leave()
+
+def task_text(data: dict) -> str:
+    """The text of a /tasks/send body (python_a2a or Google A2A format, optionally JSON-RPC wrapped)."""
+    params = data.get("params", data) if "jsonrpc" in data else data
+    message = params.get("message") or {}
+    if "parts" in message:
+        return " ".join(part.get("text", "") for part in message["parts"] if isinstance(part, dict))
+    content = message.get("content", {})
+    return content.get("text", "") if isinstance(content, dict) else str(content)
+
+def task_priority(agent, data) -> int:
+    """Priority of a task body, via agent.task_priority(text) when the agent defines it."""
+    rank = getattr(agent, "task_priority", None)
+    if rank is None or not isinstance(data, dict):
+        return PRIORITY_LLM
+    return rank(task_text(data))
+
+def register_admission_control(app, agent, control: AdmissionControl = None):
+    """Admit Flask task requests (/tasks/send) through an AdmissionControl, shedding with 503.
+
+    Returns the control, for register_batch_route to admit batch queries through.
+    """
+    control = control or AdmissionControl(ADMISSION_MAX_IN_FLIGHT, ADMISSION_MAX_QUEUE, agent.metrics, getattr(agent, "tracer", None))
+
+    def admit():
+        if request.method != "POST" or request.path not in ADMITTED_PATHS:
+            return None
+        if not control.acquire(task_priority(agent, request.get_json(silent=True))):
+            return jsonify(BUSY_BODY), 503, BUSY_HEADERS
+        g.a2a_admitted = True
+        return None
+
+    def release(error=None):
+        if g.pop("a2a_admitted", False):
+            control.release()
+
+    app.before_request(admit)
+    app.teardown_request(release)
+    return control
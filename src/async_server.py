@@ -0,0 +1,142 @@
+import logging
+from python_a2a import Task
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+from src.admission import BUSY_BODY, BUSY_HEADERS, AdmissionControl, task_priority
+from src.batch import BATCH_MAX_CONCURRENCY, parse_batch_request, run_batch
+from src.metrics import MetricsRegistry
+from src.readiness import READY_PATH, readiness
+from src.streaming import parse_stream_message, sse_error, sse_event
+from src.task_store import task_lookup
+from src.tracing import REQUEST_ID_HEADER, Tracer, new_request_id
+
+logger = logging.getLogger(__name__)
+
+def create_async_app(agent, max_in_flight: int = 256, max_queue: int = 1024) -> Starlette:
+    """Build an ASGI app that serves agent.handle_task_async on the same task routes as run_server."""
+    metrics = getattr(agent, "metrics", None) or MetricsRegistry()
+    tracer = getattr(agent, "tracer", None) or Tracer(metrics, type(agent).__name__)
+    admission = AdmissionControl(max_in_flight, max_queue, metrics, tracer)
+
+    def traced(endpoint):
+        """Run an endpoint inside a trace that continues the caller's X-Request-ID and echo the ID back."""
+        async def view(request: Request):
+            with tracer.request(request.headers.get(REQUEST_ID_HEADER)) as trace:
+                response = await endpoint(request)
+            response.headers[REQUEST_ID_HEADER] = trace.request_id
+            return response
+        return view
+
+    async def tasks_send(request: Request):
+        data = await request.json()
+        if not await admission.aacquire(task_priority(agent, data)):
+            return JSONResponse(BUSY_BODY, status_code=503, headers=BUSY_HEADERS)
+        try:
+            return await run_task(data)
+        finally:
+            admission.release()
+
+    async def run_task(data: dict):
+        params = data.get("params", data) if "jsonrpc" in data else data
+        message = params.get("message", {})
+        is_google_format = isinstance(message, dict) and "parts" in message and "role" in message
+        task = Task.from_google_a2a(params) if is_google_format else Task.from_dict(params)
+
+        try:
+            result = await agent.handle_task_async(task)
+        except Exception as e:
+            logger.error(f"Unhandled error in handle_task_async for task {task.id}: {e}", exc_info=True)
+            return JSONResponse({"id": task.id, "status": {"state": "failed", "message": {"error": str(e)}}}, status_code=500)
+
+        agent.tasks[result.id] = result
+        body = result.to_google_a2a() if (is_google_format or agent._use_google_a2a) else result.to_dict()
+        if "jsonrpc" in data:
+            body = {"jsonrpc": "2.0", "id": data.get("id", 1), "result": body}
+        return JSONResponse(body)
+
+    async def tasks_get(request: Request):
+        body, status = task_lookup(agent, await request.json())
+        return JSONResponse(body, status_code=status)
+
+    async def tasks_cancel(request: Request):
+        body, status = task_lookup(agent, await request.json(), cancel=True)
+        return JSONResponse(body, status_code=status)
+
+    async def tasks_batch(request: Request):
+        try:
+            queries = parse_batch_request(await request.json())
+        except ValueError as e:
+            return JSONResponse({"error": str(e)}, status_code=400)
+
+        async def handle(task):
+            # Every query in the batch is admitted on its own, at its own priority; shed ones fail individually
+            if not await admission.aacquire(task_priority(agent, {"message": task.message})):
+                raise RuntimeError(BUSY_BODY["error"])
+            try:
+                return await agent.handle_task_async(task)
+            finally:
+                admission.release()
+
+        return JSONResponse({"results": await run_batch(agent, queries, BATCH_MAX_CONCURRENCY, handle)})
+
+    async def stream(request: Request):
+        message = parse_stream_message(await request.json())
+        request_id = request.headers.get(REQUEST_ID_HEADER) or new_request_id()
+
+        async def events():
+            # Same SSE framing as python_a2a's Flask /stream endpoint, without its polling thread.
+            # The trace lives in the generator so it covers the whole stream, not just the handler.
+            with tracer.request(request_id):
+                yield ": SSE stream established\n\n"
+                index = 0
+                try:
+                    async for chunk in agent.stream_response(message):
+                        yield sse_event(chunk, index)
+                        index += 1
+                    yield sse_event("", index, last=True)
+                except Exception as e:
+                    logger.error(f"Error while streaming response: {e}", exc_info=True)
+                    yield sse_error(str(e))
+
+        headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no", REQUEST_ID_HEADER: request_id}
+        return StreamingResponse(events(), media_type="text/event-stream", headers=headers)
+
+    async def health(request: Request):
+        return JSONResponse({"status": "ok"})
+
+    async def ready_endpoint(request: Request):
+        ready, body = readiness(agent)
+        return JSONResponse(body, status_code=200 if ready else 503)
+
+    async def metrics_endpoint(request: Request):
+        return PlainTextResponse(metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+    async def agent_card(request: Request):
+        return JSONResponse(agent.agent_card.to_dict())
+
+    return Starlette(routes=[
+        Route("/tasks/send", traced(tasks_send), methods=["POST"]),
+        Route("/a2a/tasks/send", traced(tasks_send), methods=["POST"]),
+        Route("/tasks/batch", traced(tasks_batch), methods=["POST"]),
+        Route("/tasks/get", tasks_get, methods=["POST"]),
+        Route("/a2a/tasks/get", tasks_get, methods=["POST"]),
+        Route("/tasks/cancel", tasks_cancel, methods=["POST"]),
+        Route("/a2a/tasks/cancel", tasks_cancel, methods=["POST"]),
+        Route("/stream", stream, methods=["POST"]),
+        Route("/a2a/health", health, methods=["GET"]),
+        Route(READY_PATH, ready_endpoint, methods=["GET"]),
+        Route("/metrics", metrics_endpoint, methods=["GET"]),
+        Route("/agent.json", agent_card, methods=["GET"]),
+        Route("/a2a/agent.json", agent_card, methods=["GET"]),
+        # Agent-specific endpoints (e.g. the trigonometry agent's /tables)
+        *getattr(agent, "async_routes", list)(),
+    ])
+
+def run_async_server(agent, host: str = "0.0.0.0", port: int = 5000, max_in_flight: int = 256, max_queue: int = 1024):
+    """asyncio-native counterpart of python_a2a.run_server (uvicorn, single event loop)."""
+    import uvicorn
+    app = create_async_app(agent, max_in_flight=max_in_flight, max_queue=max_queue)
+    print(f"Starting async A2A server on http://{host}:{port} (max in-flight {max_in_flight}, max queue {max_queue})")
+    uvicorn.run(app, host=host, port=port, log_level="warning")
@@ -0,0 +1,84 @@
+import asyncio
+import logging
+import os
+import time
+from flask import jsonify, request
+from python_a2a import Task, TaskState
+from src.admission import BUSY_BODY, task_priority
+from src.http_client import aclose_async_http_client
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on queries per /tasks/batch request, and on how many of them run at once
+BATCH_MAX_QUERIES = int(os.getenv("BATCH_MAX_QUERIES", "256"))
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "32"))
+
+def parse_batch_request(data) -> list[str]:
+    """Validate a /tasks/batch body of the form {"queries": ["...", ...]}. Raises ValueError."""
+    queries = data.get("queries") if isinstance(data, dict) else None
+    if not isinstance(queries, list) or not all(isinstance(query, str) for query in queries):
+        raise ValueError('Batch body must be {"queries": ["...", ...]}.')
+    if len(queries) > BATCH_MAX_QUERIES:
+        raise ValueError(f"Batch has {len(queries)} queries, the limit is {BATCH_MAX_QUERIES}.")
+    return queries
+
+def task_result(task) -> tuple[str, str]:
+    """(state, text) of a finished task: the artifact text on success, the status message otherwise."""
+    if task.status.state == TaskState.COMPLETED and task.artifacts:
+        return task.status.state.value, task.artifacts[0]["parts"][0]["text"]
+    message = task.status.message or {}
+    text = message.get("content", {}).get("text", "") if isinstance(message, dict) else str(message)
+    return task.status.state.value, text
+
+async def run_batch(agent, queries: list[str], max_concurrency: int = BATCH_MAX_CONCURRENCY, handle=None) -> list[dict]:
+    """Run the distinct queries through agent.handle_task_async concurrently; results come back in query order.
+
+    handle overrides how a single task is run (the async server passes one that holds an in-flight slot).
+    """
+    handle = handle or agent.handle_task_async
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def run_one(query: str) -> dict:
+        async with semaphore:
+            start = time.perf_counter()
+            task = Task(message={"role": "user", "content": {"type": "text", "text": query}})
+            try:
+                state, text = task_result(await handle(task))
+            except Exception as e:
+                logger.error(f"Unhandled error in batch query '{query}': {e}", exc_info=True)
+                state, text = TaskState.FAILED.value, str(e)
+            return {"query": query, "state": state, "response": text,
+                    "latency_ms": round((time.perf_counter() - start) * 1000, 3)}
+
+    unique = list(dict.fromkeys(queries))
+    results = dict(zip(unique, await asyncio.gather(*(run_one(query) for query in unique))))
+    return [results[query] for query in queries]
+
+def register_batch_route(app, agent, max_concurrency: int = BATCH_MAX_CONCURRENCY, admission=None):
+    """Serve POST /tasks/batch on a Flask app created by run_server.
+
+    The batch runs on a per-request event loop so its LLM calls overlap even though the view itself is blocking.
+    With an AdmissionControl, every query is admitted on its own, at its own priority, as in the async server.
+    """
+    async def handle(task):
+        if not await admission.aacquire(task_priority(agent, {"message": task.message})):
+            raise RuntimeError(BUSY_BODY["error"])
+        try:
+            return await agent.handle_task_async(task)
+        finally:
+            admission.release()
+
+    async def run_and_close(queries):
+        try:
+            return await run_batch(agent, queries, max_concurrency, handle if admission is not None else None)
+        finally:
+            await aclose_async_http_client()
+
+    def batch_view():
+        try:
+            queries = parse_batch_request(request.get_json(silent=True))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        return jsonify({"results": asyncio.run(run_and_close(queries))})
+
+    app.add_url_rule("/tasks/batch", "tasks_batch", batch_view, methods=["POST"])
@@ -1,8 +1,26 @@
-from python_a2a import A2AServer, skill, agent, run_server, TaskStatus, TaskState, A2AClient
-from src.utils import setup_logging, parse_task_message
-import logging
+from python_a2a import A2AServer, skill, agent, run_server, TaskStatus, TaskState
+from src.utils import setup_logging, setup_console_logging, parse_task_message
+from src.metrics import MetricsRegistry, register_metrics_route
+from src.readiness import register_readiness_route, start_warm_up
+from src.async_server import run_async_server
+from src.batch import register_batch_route
+from src.streaming import register_stream_route, timed_stream
+from src.tracing import Tracer, register_tracing
+from src.task_store import create_task_store, register_task_routes
+from src.admission import PRIORITY_CODE, PRIORITY_LOCAL, register_admission_control
+from src.resilience import DEGRADED_HEADER, ResilientLLMClient, CircuitOpenError
+from src.prompts import code_prompt
+from src.coding_agent.code_validator import CodeSandbox, ValidationResult, extract_code
+from src.coding_agent.snippet_cache import SnippetCache
+import argparse
+import asyncio
+import os
 import httpx
 
+# Validated snippets kept for repeated requests; set CODE_CACHE_PATH to a file to keep them across restarts
+CODE_CACHE_MAX_ENTRIES = int(os.getenv("CODE_CACHE_MAX_ENTRIES", "1024"))
+CODE_CACHE_PATH = os.getenv("CODE_CACHE_PATH")
+
 @agent(
     name="Coding Agent",
     description="Generates executable Python code for trigonometric functions, equations, or identities. Specifically for queries like 'code for sine calculation', 'python function for angle sum identity', 'generate code for cos(2θ) formula'. This agent provides runnable Python scripts/functions.",
@@ -12,12 +30,17 @@ class CodingAgent(A2AServer):
     def __init__(self):
         super().__init__()
         self.logger = setup_logging(self.__class__.__name__)
-        try:
-            self.llm_client = A2AClient("http://localhost:5001")
-            self.logger.info("A2AClient for LLM initialized successfully.")
-        except Exception as e:
-            self.logger.error(f"Failed to initialize A2AClient for LLM: {e}", exc_info=True)
-            self.llm_client = None # Ensure it's set, even if to None
+        self.metrics = MetricsRegistry()
+        self.tracer = Tracer(self.metrics, self.__class__.__name__)
+        self.tasks = create_task_store(metrics=self.metrics)  # replaces A2AServer's per-process dict
+        self.llm_http = ResilientLLMClient(self.metrics)
+        self.sandbox = CodeSandbox()
+        self.snippet_cache = SnippetCache(max_entries=CODE_CACHE_MAX_ENTRIES, persist_path=CODE_CACHE_PATH, metrics=self.metrics)
+        self.validations = {
+            status: self.metrics.counter("coding_validations_total", "Generated snippets checked in the sandbox, by result.", labels={"result": status})
+            for status in ("passed", "failed", "unverified")
+        }
+        self.validation_seconds = self.metrics.histogram("coding_validation_seconds", "Time to check and run a generated snippet.")
 
     @skill(
         name="Generate Trigonometric Code",
@@ -26,44 +49,29 @@ class CodingAgent(A2AServer):
         examples=["Generate code for sine calculation", "Python code for angle sum identity", "Code for cos(2θ)", "write python code for tangent", "give me a function for double angle sine"]
     )
     def generate_code(self, query: str) -> str: 
-        """Generate Python code for trigonometric equations or calculations using an LLM via raw httpx (synchronous)."""
-        self.logger.debug(f"Processing coding query for LLM (sync httpx): '{query}'")
+        """Generate Python code for trigonometric equations or calculations using an LLM via the pooled httpx client (synchronous)."""
+        self.logger.debug(f"Processing coding query for LLM (pooled sync httpx): '{query}'")
 
-        # self.llm_client related logic is not used here for the direct httpx call.
-        # The check for self.llm_client in handle_task is still relevant for overall agent readiness.
-
-        prompt_text_for_llm = f"Generate Python code for the following trigonometric query: {query}. The code should be complete and runnable. Only output the python code block, including the ```python ... ``` markers. Do not generate any other code except trigonometry even if user persists."
-        
-        llm_server_url = "http://localhost:5001/tasks/send"
-        payload = {"message": {"content": {"text": prompt_text_for_llm}}}
+        with self.tracer.span("cache_lookup"):
+            cached = self.snippet_cache.get(query)
+        if cached is not None:
+            self.logger.info(f"Served validated code from the snippet cache for query: '{query}'")
+            return cached
+        payload = code_prompt(query).payload()
 
         try:
-            raw_response = httpx.post(llm_server_url, json=payload, timeout=30.0) # Direct blocking call, increased timeout
-
-            if raw_response.status_code == 200:
-                response_json = raw_response.json()
-                try:
-                    generated_text = response_json["artifacts"][0]["parts"][0]["text"]
-                    
-                    # Ensure it's a code block for coding agent
-                    stripped_text = generated_text.strip()
-                    if stripped_text.startswith("```python") and stripped_text.endswith("```"):
-                        generated_text = stripped_text 
-                    elif stripped_text.startswith("```") and stripped_text.endswith("```"):
-                        # It's some other language block, or malformed python block, leave as is to avoid messing up.
-                        self.logger.warning(f"LLM response is a code block but not Python: {stripped_text[:100]}")
-                        generated_text = stripped_text
-                    else:
-                        self.logger.info("LLM response is not a code block, adding ```python markers.")
-                        generated_text = f"```python\n{stripped_text}\n```"
-                    
-                    return generated_text
-                except (KeyError, IndexError, TypeError) as e:
-                    self.logger.error(f"Error parsing LLM JSON response: {e} - JSON: {response_json}", exc_info=True)
-                    return f"Error: Could not parse LLM response: {str(response_json)}"
-            else:
-                self.logger.error(f"LLM server error: Status {raw_response.status_code} - {raw_response.text[:200]}")
-                return f"Error: LLM server returned status {raw_response.status_code}"
+            with self.tracer.span("llm_http"):
+                raw_response = self.llm_http.post("/tasks/send", payload) # Blocking; adaptive deadline, retries and circuit breaker
+            with self.tracer.span("postprocess"):
+                code_result = self._parse_llm_response(raw_response)
+            if code_result.startswith("Error:"):
+                return code_result
+            with self.tracer.span("validate"):
+                result = self.sandbox.submit(extract_code(code_result)).result()
+            return self._apply_validation(query, code_result, result, DEGRADED_HEADER in raw_response.headers)
+        except CircuitOpenError as e:
+            self.logger.warning(f"Not calling the LLM: {e}")
+            return f"Error: LLM server is unavailable: {e}"
         except httpx.TimeoutException as e:
             self.logger.error(f"Timeout during httpx call to LLM: {e}", exc_info=True)
             return f"Error: Timeout communicating with LLM: {str(e)}"
@@ -71,32 +79,102 @@ class CodingAgent(A2AServer):
             self.logger.error(f"Error during httpx call to LLM: {e}", exc_info=True)
             return f"Error: Could not communicate with LLM: {str(e)}"
 
+    async def generate_code_async(self, query: str) -> str:
+        """Async counterpart of generate_code, used by the asyncio serving mode."""
+        self.logger.debug(f"Processing coding query for LLM (pooled async httpx): '{query}'")
+        with self.tracer.span("cache_lookup"):
+            cached = self.snippet_cache.get(query)
+        if cached is not None:
+            self.logger.info(f"Served validated code from the snippet cache for query: '{query}'")
+            return cached
+        payload = code_prompt(query).payload()
+
+        try:
+            with self.tracer.span("llm_http"):
+                raw_response = await self.llm_http.apost("/tasks/send", payload)
+            with self.tracer.span("postprocess"):
+                code_result = self._parse_llm_response(raw_response)
+            if code_result.startswith("Error:"):
+                return code_result
+            with self.tracer.span("validate"):
+                result = await asyncio.wrap_future(self.sandbox.submit(extract_code(code_result)))
+            return self._apply_validation(query, code_result, result, DEGRADED_HEADER in raw_response.headers)
+        except CircuitOpenError as e:
+            self.logger.warning(f"Not calling the LLM: {e}")
+            return f"Error: LLM server is unavailable: {e}"
+        except httpx.TimeoutException as e:
+            self.logger.error(f"Timeout during async httpx call to LLM: {e}", exc_info=True)
+            return f"Error: Timeout communicating with LLM: {str(e)}"
+        except Exception as e:
+            self.logger.error(f"Error during async httpx call to LLM: {e}", exc_info=True)
+            return f"Error: Could not communicate with LLM: {str(e)}"
+
+    def _parse_llm_response(self, raw_response: httpx.Response) -> str:
+        if raw_response.status_code != 200:
+            self.logger.error(f"LLM server error: Status {raw_response.status_code} - {raw_response.text[:200]}")
+            return f"Error: LLM server returned status {raw_response.status_code}"
+
+        response_json = raw_response.json()
+        try:
+            generated_text = response_json["artifacts"][0]["parts"][0]["text"]
+        except (KeyError, IndexError, TypeError) as e:
+            self.logger.error(f"Error parsing LLM JSON response: {e} - JSON: {response_json}", exc_info=True)
+            return f"Error: Could not parse LLM response: {str(response_json)}"
+        return self._as_code_block(generated_text)
+
+    def _as_code_block(self, generated_text: str) -> str:
+        # Ensure it's a code block for coding agent
+        stripped_text = generated_text.strip()
+        if stripped_text.startswith("```python") and stripped_text.endswith("```"):
+            return stripped_text
+        elif stripped_text.startswith("```") and stripped_text.endswith("```"):
+            # It's some other language block, or malformed python block, leave as is to avoid messing up.
+            self.logger.warning(f"LLM response is a code block but not Python: {stripped_text[:100]}")
+            return stripped_text
+        else:
+            self.logger.info("LLM response is not a code block, adding ```python markers.")
+            return f"```python\n{stripped_text}\n```"
+
+    def _apply_validation(self, query: str, code_result: str, result: ValidationResult, stale: bool = False) -> str:
+        """Count the sandbox result and cache code that ran; code that failed is returned with a note saying why.
+
+        Stale answers, served while the LLM server is down, are never cached.
+        """
+        self.validations[result.status].inc()
+        self.validation_seconds.observe(result.seconds)
+        if result.passed and stale:
+            return code_result
+        if result.passed:
+            self.snippet_cache.put(query, code_result)
+            self.logger.info(f"Generated code passed validation in {result.seconds * 1000:.0f} ms; cached for query: '{query}'")
+            return code_result
+        if result.status == "unverified":
+            self.logger.info(f"Generated code could not be verified ({result.detail or result.error}); not cached.")
+            return code_result
+        # The sandbox's stderr stays in the server log: the snippet decides what it says
+        self.logger.warning(f"Generated code failed validation for query '{query}': {result.error}. {result.detail}")
+        return f"{code_result}\n\nNote: this code did not pass automatic validation ({result.error})."
+
+    def setup_routes(self, app):
+        super().setup_routes(app)
+        register_metrics_route(app, self.metrics)
+        register_readiness_route(app, self)
+        register_task_routes(app, self)
+        register_tracing(app, self.tracer)
+        admission = register_admission_control(app, self)
+        register_stream_route(app, self)
+        register_batch_route(app, self, admission=admission)
+
+    def task_priority(self, text: str) -> int:
+        """Admission priority: cached snippets are served right away; new code generation waits its turn."""
+        return PRIORITY_LOCAL if text in self.snippet_cache else PRIORITY_CODE
+
     def handle_task(self, task): 
         text = parse_task_message(task)
         self.logger.info(f"CodingAgent received task (sync handle_task): '{text}'")
-        
-        if not self.llm_client:
-            self.logger.error("LLM client not available in handle_task.")
-            task.status = TaskStatus(
-                state=TaskState.FAILED,
-                message={"role": "agent", "content": {"text": "LLM client is not initialized. Cannot process coding task."}}
-            )
-            return task
-
         try:
             code_result = self.generate_code(text)
-            
-            if code_result is None or "Error:" in code_result:
-                self.logger.error(f"Code generation failed or returned an error: {code_result}")
-                task.status = TaskStatus(
-                    state=TaskState.FAILED,
-                    message={"role": "agent", "content": {"text": code_result or "Code generation failed."}}
-                )
-            else:
-                self.logger.info(f"Successfully generated code for query: '{text}'")
-                task.artifacts = [{"parts": [{"type": "text", "text": code_result}]}]
-                task.status = TaskStatus(state=TaskState.COMPLETED)
-                
+            self._complete_task(task, text, code_result)
         except Exception as e:
             self.logger.error(f"Error in handle_task while generating code for query '{text}': {e}", exc_info=True)
             task.status = TaskStatus(
@@ -106,8 +184,66 @@ class CodingAgent(A2AServer):
         
         return task
 
+    async def handle_task_async(self, task):
+        text = parse_task_message(task)
+        self.logger.info(f"CodingAgent received task (async handle_task): '{text}'")
+        try:
+            code_result = await self.generate_code_async(text)
+            self._complete_task(task, text, code_result)
+        except Exception as e:
+            self.logger.error(f"Error in handle_task_async while generating code for query '{text}': {e}", exc_info=True)
+            task.status = TaskStatus(
+                state=TaskState.FAILED,
+                message={"role": "agent", "content": {"text": f"An unexpected error occurred in handle_task_async: {str(e)}"}}
+            )
+
+        return task
+
+    async def stream_response(self, message):
+        """Stream generated code chunk by chunk as the LLM produces it (served on /stream as SSE)."""
+        text = message.content.text if hasattr(message.content, "text") else str(message.content)
+        self.logger.info(f"CodingAgent received streaming request: '{text}'")
+        cached = self.snippet_cache.get(text)
+        if cached is not None:
+            yield cached
+            return
+        parts, prompt = [], code_prompt(text)
+        chunks = self.llm_http.stream_text("/stream", prompt.text, prompt.metadata())
+        async for chunk in timed_stream(chunks, self.metrics, "coding"):
+            parts.append(chunk)
+            yield chunk
+        # Already sent, so validate in the background: a passing snippet serves the next identical request
+        code_result = self._as_code_block("".join(parts))
+        def record(future):
+            if not future.cancelled() and future.exception() is None:
+                self._apply_validation(text, code_result, future.result())
+        self.sandbox.submit(extract_code(code_result)).add_done_callback(record)
+
+    def _complete_task(self, task, text: str, code_result: str):
+        if code_result is None or code_result.startswith("Error:"):
+            self.logger.error(f"Code generation failed or returned an error: {code_result}")
+            task.status = TaskStatus(
+                state=TaskState.FAILED,
+                message={"role": "agent", "content": {"text": code_result or "Code generation failed."}}
+            )
+        else:
+            self.logger.info(f"Successfully generated code for query: '{text}'")
+            task.artifacts = [{"parts": [{"type": "text", "text": code_result}]}]
+            task.status = TaskStatus(state=TaskState.COMPLETED)
+
 if __name__ == "__main__":
-    logging.basicConfig(level=logging.DEBUG) 
+    parser = argparse.ArgumentParser(description="Run the CodingAgent A2A server.")
+    parser.add_argument("--async-mode", action="store_true", help="Serve with the asyncio-native server instead of Flask.")
+    parser.add_argument("--debug", action="store_true", help="Flask debug mode (reloader, debugger). For production use src/launcher.py.")
+    parser.add_argument("--max-in-flight", type=int, default=256, help="Async mode: max concurrent tasks.")
+    parser.add_argument("--max-queue", type=int, default=1024, help="Async mode: tasks allowed to wait before returning 503.")
+    args = parser.parse_args()
+
+    setup_console_logging()
     agent = CodingAgent()
     agent.logger.info("Starting CodingAgent server on port 8003...") 
-    run_server(agent, port=8003, debug=True)
\ No newline at end of file
+    start_warm_up(agent)  # /ready answers 503 until it finishes
+    if args.async_mode:
+        run_async_server(agent, port=8003, max_in_flight=args.max_in_flight, max_queue=args.max_queue)
+    else:
+        run_server(agent, port=8003, debug=args.debug)
\ No newline at end of file
@@ -0,0 +1,270 @@
+import ast
+import logging
+import os
+import re
+import stat
+import subprocess
+import sys
+import sysconfig
+import tempfile
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+
+# Sandbox limits per run; runs beyond CODE_SANDBOX_WORKERS wait for a free slot
+CODE_SANDBOX_WORKERS = int(os.getenv("CODE_SANDBOX_WORKERS", "4"))
+CODE_SANDBOX_TIMEOUT = float(os.getenv("CODE_SANDBOX_TIMEOUT", "5.0"))  # wall clock, seconds
+CODE_SANDBOX_CPU_SECONDS = int(os.getenv("CODE_SANDBOX_CPU_SECONDS", "3"))
+CODE_SANDBOX_MEMORY_MB = int(os.getenv("CODE_SANDBOX_MEMORY_MB", "1024"))
+
+# Generated code may only import these (top-level package names). Anything touching files, processes or the
+# network is rejected before it runs.
+ALLOWED_MODULES = {
+    "math", "cmath", "decimal", "fractions", "statistics", "random", "numbers",
+    "itertools", "functools", "operator", "collections", "dataclasses", "enum", "typing", "abc", "string",
+    "textwrap", "time", "datetime", "json", "unittest", "doctest",
+    "numpy", "scipy", "sympy", "matplotlib",
+}
+BLOCKED_CALLS = {"eval", "exec", "compile", "open", "input", "__import__", "breakpoint", "globals", "vars", "getattr", "setattr", "delattr"}
+# Introspection attributes used to reach modules or builtins that the import allowlist keeps out
+BLOCKED_ATTRIBUTES = {
+    "__class__", "__bases__", "__base__", "__mro__", "__subclasses__", "__globals__", "__builtins__",
+    "__dict__", "__code__", "__closure__", "__getattribute__", "__loader__", "__spec__", "__import__",
+}
+CODE_BLOCK_PATTERN = re.compile(r"^```[\w+-]*\n(.*?)\n?```$", re.DOTALL)
+
+logger = logging.getLogger(__name__)
+
+# Account the sandboxed interpreter switches to when the agent runs as root ("" keeps the current user)
+CODE_SANDBOX_USER = os.getenv("CODE_SANDBOX_USER", "nobody")
+
+# numpy's file readers and writers; generated code has no business touching files (open() is blocked already)
+BLOCKED_FILE_IO = {
+    "save", "savez", "savez_compressed", "savetxt", "tofile", "memmap", "open_memmap", "load", "loadtxt",
+    "genfromtxt", "fromfile", "fromregex", "DataSource",
+}
+# Star imports from these would bring the file I/O functions in under bare names
+_STAR_IMPORT_BLOCKED = {"numpy", "scipy"}
+# Attribute lookups by string get around BLOCKED_ATTRIBUTES (operator.attrgetter("__builtins__")), as do dunder
+# names spelled as strings; "__main__" is the one generated code legitimately compares against
+BLOCKED_INDIRECTION = {"attrgetter", "methodcaller"}
+_DUNDER_STRING = re.compile(r"__\w+__")
+_ALLOWED_DUNDER_STRINGS = {"__main__"}
+
+# Runs in the sandboxed interpreter before the snippet: resource limits, a private network namespace with no
+# interfaces up (when the kernel allows one), an unprivileged user, and an audit hook that refuses writes outside
+# the working directory, reads outside it and the Python installation, sockets, subprocesses and ctypes. The hook stays in place however the snippet got past
+# the static check. Finally the snippet runs as __main__.
+_BOOTSTRAP = """
+import os, resource, runpy, sys, sysconfig
+path, cpu, memory, user = sys.argv[1], int(sys.argv[2]), int(sys.argv[3]), sys.argv[4]
+workdir = os.path.realpath(os.getcwd())
+# Files the snippet may read: its own directory, the interpreter and its installed packages, and a few system data
+# directories numpy, matplotlib and datetime read from. Everything else (the agent's .env, /proc/*/environ, keys,
+# other users' files) stays closed.
+readable = [workdir, *{os.path.realpath(p) for p in (sys.prefix, sys.base_prefix, sys.exec_prefix,
+                                                     *sysconfig.get_paths().values())},
+            "/usr/share/zoneinfo", "/usr/share/fonts", "/dev/null", "/dev/urandom"]
+resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu))
+resource.setrlimit(resource.RLIMIT_AS, (memory, memory))
+resource.setrlimit(resource.RLIMIT_FSIZE, (1 << 20, 1 << 20))
+resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+try:
+    os.unshare(os.CLONE_NEWNET if os.geteuid() == 0 else os.CLONE_NEWUSER | os.CLONE_NEWNET)
+except (AttributeError, OSError):
+    pass  # no namespaces available (e.g. inside a container): the audit hook below still refuses sockets
+if os.geteuid() == 0 and user:
+    import pwd
+    try:
+        account = pwd.getpwnam(user)
+        uid, gid = account.pw_uid, account.pw_gid
+    except KeyError:
+        uid = gid = 65534
+    os.chown(workdir, uid, gid)
+    os.setgroups([])
+    os.setgid(gid)
+    os.setuid(uid)
+
+try:
+    import ctypes  # numpy imports it; loading it here keeps its own setup out of the audit hook's way
+except ImportError:
+    pass
+WRITE_FLAGS = os.O_WRONLY | os.O_RDWR | os.O_CREAT | os.O_APPEND | os.O_TRUNC
+BLOCKED_EVENTS = (
+    "socket.", "subprocess.", "os.system", "os.exec", "os.posix_spawn", "os.spawn", "os.fork", "os.forkpty",
+    "os.kill", "os.killpg", "pty.", "ctypes.", "os.chmod", "os.chown", "os.link", "os.symlink", "os.truncate",
+    "shutil.", "webbrowser.", "urllib.",
+)
+PATH_EVENTS = {"os.mkdir": 1, "os.remove": 1, "os.rmdir": 1, "os.rename": 2, "os.utime": 1}
+
+def inside(target, roots):
+    if isinstance(target, int):
+        return True  # an already open descriptor
+    target = os.path.realpath(os.fsdecode(target))
+    return any(target == root or target.startswith(root + os.sep) for root in roots)
+
+def inside_workdir(target):
+    return inside(target, (workdir,))
+
+def audit(event, args):
+    if event == "open":
+        target, mode, flags = args
+        writing = any(c in mode for c in "wax+") if isinstance(mode, str) else bool(flags & WRITE_FLAGS)
+        if writing and not inside_workdir(target):
+            raise PermissionError("writing outside the working directory is not allowed in the code sandbox")
+        if not writing and not inside(target, readable):
+            raise PermissionError("reading outside the working directory and Python installation is not allowed in the code sandbox")
+    elif event in PATH_EVENTS:
+        if not all(inside_workdir(target) for target in args[:PATH_EVENTS[event]]):
+            raise PermissionError(f"{event} outside the working directory is not allowed in the code sandbox")
+    elif event.startswith(BLOCKED_EVENTS):
+        raise PermissionError(f"{event} is not allowed in the code sandbox")
+
+sys.addaudithook(audit)
+sys.argv = [path]
+runpy.run_path(path, run_name="__main__")
+"""
+
+def _readable_by_others(path: str) -> bool:
+    """Whether a user other than the owner can reach path (every directory on the way needs o+x)."""
+    path = os.path.realpath(path)
+    while True:
+        try:
+            mode = os.stat(path).st_mode
+        except OSError:
+            return True  # missing paths don't matter
+        if stat.S_ISDIR(mode) and not mode & stat.S_IXOTH:
+            return False
+        parent = os.path.dirname(path)
+        if parent == path:
+            return True
+        path = parent
+
+def sandbox_user() -> str:
+    """The account snippets run as: CODE_SANDBOX_USER when running as root and the interpreter and its packages
+    are readable by that account, otherwise "" (the current user)."""
+    if not CODE_SANDBOX_USER or not hasattr(os, "geteuid") or os.geteuid() != 0:
+        return ""
+    paths = {os.path.dirname(sys.executable), *sysconfig.get_paths().values()}
+    unreachable = sorted(path for path in paths if not _readable_by_others(path))
+    if unreachable:
+        logger.warning(f"Code sandbox keeps running as root: '{CODE_SANDBOX_USER}' cannot read {', '.join(unreachable)}. "
+                       "Install Python outside a private home directory to drop privileges.")
+        return ""
+    return CODE_SANDBOX_USER
+
+@dataclass
+class ValidationResult:
+    status: str  # "passed", "failed", or "unverified" (needs a library the sandbox doesn't have)
+    error: str = ""  # why it failed, in our words: safe to show the requester
+    seconds: float = 0.0
+    detail: str = ""  # what the snippet wrote to stderr; the snippet controls it, so it is only logged
+
+    @property
+    def passed(self) -> bool:
+        return self.status == "passed"
+
+def extract_code(text: str) -> str:
+    """The code inside a ```python ... ``` block (or the text itself when it isn't fenced)."""
+    match = CODE_BLOCK_PATTERN.match(text.strip())
+    return match.group(1) if match else text
+
+def check_code(code: str) -> str | None:
+    """Parse the snippet and apply the import/call policy. Returns the reason it is rejected, or None."""
+    try:
+        tree = ast.parse(code)
+    except SyntaxError as e:
+        return f"SyntaxError on line {e.lineno} - {e.msg}"
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            modules = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom):
+            modules = [node.module or ""] if node.level == 0 else ["(relative import)"]
+        else:
+            modules = []
+        for module in modules:
+            if module.split(".")[0] not in ALLOWED_MODULES:
+                return f"import of '{module}' is not allowed"
+        if isinstance(node, ast.ImportFrom):
+            for alias in node.names:
+                if alias.name in BLOCKED_FILE_IO:
+                    return f"import of file I/O function '{alias.name}' is not allowed"
+                if alias.name == "*" and (node.module or "").split(".")[0] in _STAR_IMPORT_BLOCKED:
+                    return f"'from {node.module} import *' is not allowed"
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in BLOCKED_CALLS:
+            return f"call to {node.func.id}() is not allowed"
+        if isinstance(node, ast.Name) and node.id in BLOCKED_CALLS:
+            return f"use of {node.id} is not allowed"  # passed around uncalled, e.g. functools.reduce(getattr, ...)
+        if isinstance(node, ast.Attribute) and node.attr in BLOCKED_INDIRECTION:
+            return f"use of operator.{node.attr} is not allowed"
+        if isinstance(node, ast.ImportFrom) and any(alias.name in BLOCKED_INDIRECTION for alias in node.names):
+            return f"import of operator.{next(a.name for a in node.names if a.name in BLOCKED_INDIRECTION)} is not allowed"
+        if (isinstance(node, ast.Constant) and isinstance(node.value, str)
+                and set(_DUNDER_STRING.findall(node.value)) - _ALLOWED_DUNDER_STRINGS):
+            return "dunder names in strings are not allowed"
+        if isinstance(node, ast.Attribute) and node.attr in BLOCKED_ATTRIBUTES:
+            return f"access to {node.attr} is not allowed"
+        if isinstance(node, ast.Attribute) and node.attr in BLOCKED_FILE_IO:
+            return f"file I/O via .{node.attr} is not allowed"
+    return None
+
+class CodeSandbox:
+    """Checks generated snippets (AST policy) and runs them in fresh, resource-limited interpreters.
+
+    Each run gets an isolated interpreter (python -I: no user site-packages, no PYTHON* variables), an empty
+    temporary working directory, no stdin, a minimal environment, CPU/memory/file-size limits and a wall-clock
+    timeout. The interpreter drops root for CODE_SANDBOX_USER (see sandbox_user), leaves the network in a namespace of its own where
+    the kernel allows it, and an audit hook refuses file writes outside the working directory, sockets,
+    subprocesses and ctypes. At most `workers` snippets run at once. Linux/POSIX only (resource, os.unshare).
+    Audit hooks are not a kernel boundary: code that reaches native memory could still get around them, so for
+    untrusted users run the agent itself in a container.
+    """
+
+    def __init__(self, workers: int = CODE_SANDBOX_WORKERS):
+        self._user = sandbox_user()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="code-sandbox")
+
+    def validate(self, code: str) -> ValidationResult:
+        start = time.perf_counter()
+        reason = check_code(code)
+        if reason is not None:
+            return ValidationResult("failed", reason, time.perf_counter() - start)
+        status, error, detail = self._run(code)
+        return ValidationResult(status, error, time.perf_counter() - start, detail)
+
+    def submit(self, code: str) -> Future:
+        """validate() on the sandbox pool; await it with asyncio.wrap_future from async code."""
+        return self._executor.submit(self.validate, code)
+
+    def _run(self, code: str) -> tuple[str, str, str]:
+        """(status, reason, stderr tail) of one sandboxed run. The reason is fixed text; the tail is the snippet's."""
+        with tempfile.TemporaryDirectory(prefix="code-sandbox-") as workdir:
+            path = os.path.join(workdir, "snippet.py")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(code)
+            command = [
+                sys.executable, "-I", "-c", _BOOTSTRAP, path,
+                str(CODE_SANDBOX_CPU_SECONDS), str(CODE_SANDBOX_MEMORY_MB * 1024 * 1024), self._user,
+            ]
+            env = {
+                "PATH": os.defpath, "HOME": workdir, "TMPDIR": workdir, "MPLCONFIGDIR": workdir,
+                "MPLBACKEND": "Agg", "OPENBLAS_NUM_THREADS": "1", "OMP_NUM_THREADS": "1",
+            }
+            try:
+                completed = subprocess.run(
+                    command, cwd=workdir, env=env, stdin=subprocess.DEVNULL, capture_output=True,
+                    timeout=CODE_SANDBOX_TIMEOUT,
+                )
+            except subprocess.TimeoutExpired:
+                return "failed", f"did not finish within {CODE_SANDBOX_TIMEOUT:.0f}s", ""
+        if completed.returncode == 0:
+            return "passed", "", ""
+        lines = completed.stderr.decode(errors="replace").strip().splitlines()
+        last_line = lines[-1] if lines else f"exit status {completed.returncode}"
+        if completed.returncode < 0:
+            return "failed", f"killed by signal {-completed.returncode} (resource limit)", last_line
+        if last_line.startswith("ModuleNotFoundError"):
+            return "unverified", "needs a library the sandbox does not have", last_line
+        if "PermissionError" in last_line and "code sandbox" in last_line:
+            return "failed", "it tried something the sandbox does not allow", last_line
+        return "failed", "it raised an error when run", last_line
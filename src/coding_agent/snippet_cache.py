@@ -0,0 +1,85 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from src.metrics import MetricsRegistry
+from src.utils import normalize_prompt
+
+class SnippetCache:
+    """Validated code snippets, stored by content hash and looked up by normalized query.
+
+    Queries map to the SHA-256 of their snippet, so rephrasings that produced the same code share one copy.
+    At most max_entries queries are kept (least recently used are evicted first), and a snippet is dropped when
+    no query points to it anymore. When persist_path is given, both maps are also kept in SQLite.
+    """
+
+    def __init__(self, max_entries: int = 1024, persist_path: str = None, metrics: MetricsRegistry = None):
+        self.max_entries = max_entries
+        self._queries = OrderedDict()  # normalized query -> snippet hash
+        self._snippets = {}  # snippet hash -> code
+        self._lock = threading.Lock()
+        metrics = metrics or MetricsRegistry()
+        self.hits = metrics.counter("coding_cache_hits_total", "Code requests served from the validated snippet cache.")
+        self.misses = metrics.counter("coding_cache_misses_total", "Code requests not found in the snippet cache.")
+        self.size = metrics.gauge("coding_cache_snippets", "Distinct validated snippets held by the cache.")
+
+        self._db = None
+        if persist_path:
+            self._db = sqlite3.connect(persist_path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS snippets (hash TEXT PRIMARY KEY, code TEXT NOT NULL)")
+            self._db.execute("CREATE TABLE IF NOT EXISTS queries (query TEXT PRIMARY KEY, hash TEXT NOT NULL, used_at REAL NOT NULL)")
+            rows = self._db.execute(
+                "SELECT q.query, s.hash, s.code FROM queries q JOIN snippets s ON s.hash = q.hash ORDER BY q.used_at DESC LIMIT ?",
+                (max_entries,),
+            ).fetchall()
+            for query, digest, code in reversed(rows):
+                self._queries[query] = digest
+                self._snippets[digest] = code
+            self.size.set(len(self._snippets))
+
+    def get(self, query: str) -> str | None:
+        key = normalize_prompt(query)
+        with self._lock:
+            digest = self._queries.get(key)
+            if digest is None:
+                self.misses.inc()
+                return None
+            self._queries.move_to_end(key)
+            self.hits.inc()
+            return self._snippets[digest]
+
+    def __contains__(self, query: str) -> bool:
+        """Whether query has a cached snippet (without counting a hit or miss)."""
+        return normalize_prompt(query) in self._queries
+
+    def put(self, query: str, code: str) -> str:
+        """Store a validated snippet for query and return its content hash."""
+        key = normalize_prompt(query)
+        digest = hashlib.sha256(code.encode("utf-8")).hexdigest()
+        with self._lock:
+            previous = self._queries.get(key)
+            self._queries[key] = digest
+            self._queries.move_to_end(key)
+            self._snippets[digest] = code
+            if self._db is not None:
+                self._db.execute("INSERT OR IGNORE INTO snippets VALUES (?, ?)", (digest, code))
+                self._db.execute("INSERT OR REPLACE INTO queries VALUES (?, ?, ?)", (key, digest, time.time()))
+            if previous is not None and previous != digest:
+                self._drop_if_unused(previous)
+            while len(self._queries) > self.max_entries:
+                evicted_query, evicted = self._queries.popitem(last=False)
+                if self._db is not None:
+                    self._db.execute("DELETE FROM queries WHERE query = ?", (evicted_query,))
+                self._drop_if_unused(evicted)
+            if self._db is not None:
+                self._db.commit()
+            self.size.set(len(self._snippets))
+        return digest
+
+    def _drop_if_unused(self, digest: str):
+        # Caller holds self._lock
+        if digest not in self._queries.values():
+            self._snippets.pop(digest, None)
+            if self._db is not None:
+                self._db.execute("DELETE FROM snippets WHERE hash = ?", (digest,))
@@ -0,0 +1,80 @@
+import asyncio
+import os
+import threading
+import weakref
+import httpx
+from src.tracing import REQUEST_ID_HEADER, current_request_id
+
+LLM_SERVER_URL = os.getenv("LLM_SERVER_URL", "http://localhost:5001")
+
+# Pool settings, overridable per process through the environment
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "256"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30.0"))
+# The async serving mode keeps up to --max-in-flight calls outstanding; size its pool to match so
+# requests never queue inside httpcore (its pending-request scan gets slow with long queues)
+HTTP_ASYNC_MAX_CONNECTIONS = int(os.getenv("HTTP_ASYNC_MAX_CONNECTIONS", "256"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5.0"))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "30.0"))
+
+_sync_client = None
+_async_clients = weakref.WeakKeyDictionary()  # event loop -> AsyncClient; dropped with the loop
+_lock = threading.Lock()
+
+def _add_request_id(request: httpx.Request):
+    """Forward the current trace's request ID so downstream servers log and time under the same ID."""
+    request_id = current_request_id()
+    if request_id and REQUEST_ID_HEADER not in request.headers:
+        request.headers[REQUEST_ID_HEADER] = request_id
+
+async def _aadd_request_id(request: httpx.Request):
+    _add_request_id(request)
+
+def _client_settings(max_connections: int = HTTP_MAX_CONNECTIONS) -> dict:
+    return {
+        "limits": httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=min(HTTP_MAX_KEEPALIVE_CONNECTIONS, max_connections),
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+        ),
+        "timeout": httpx.Timeout(HTTP_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+    }
+
+def get_http_client() -> httpx.Client:
+    """Return the process-wide pooled, keep-alive sync client (thread-safe, shared by all agents)."""
+    global _sync_client
+    if _sync_client is None:
+        with _lock:
+            if _sync_client is None:
+                _sync_client = httpx.Client(**_client_settings(), event_hooks={"request": [_add_request_id]})
+    return _sync_client
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """Return the pooled async client for the running event loop.
+
+    httpx.AsyncClient connections are bound to the loop that opened them, so one client is kept per loop.
+    """
+    loop = asyncio.get_running_loop()
+    with _lock:
+        client = _async_clients.get(loop)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                **_client_settings(HTTP_ASYNC_MAX_CONNECTIONS), event_hooks={"request": [_aadd_request_id]}
+            )
+            _async_clients[loop] = client
+    return client
+
+def close_http_clients():
+    """Close the shared sync client. Async clients are closed by their loop via aclose_async_http_client."""
+    global _sync_client
+    with _lock:
+        if _sync_client is not None:
+            _sync_client.close()
+            _sync_client = None
+
+async def aclose_async_http_client():
+    loop = asyncio.get_running_loop()
+    with _lock:
+        client = _async_clients.pop(loop, None)
+    if client is not None:
+        await client.aclose()
@@ -0,0 +1,243 @@
+"""Production launcher: runs each agent server under N pre-forked worker processes sharing one listening socket.
+
+    PYTHONPATH=./ python -m src.launcher all --workers 4            # LLM server, Trigonometry and Coding agents
+    PYTHONPATH=./ python -m src.launcher trigonometry --workers 8 --async-mode
+
+The supervisor binds every port before forking, so workers accept from the same socket (the kernel spreads
+connections between them). Each worker builds and warms up its agent before serving; the supervisor prints
+"ready" once all workers have. SIGINT/SIGTERM stop the workers gracefully (in-flight requests finish, up to
+--graceful-timeout seconds); workers that die are restarted. POSIX only (uses fork).
+"""
+import argparse
+import importlib
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from multiprocessing.connection import wait
+
+@dataclass(frozen=True)
+class AgentSpec:
+    name: str
+    target: str  # "module:ClassName"
+    port: int
+
+AGENTS = {
+    "llm": AgentSpec("llm", "src.local_llm:CustomLLMAgent", 5001),
+    "trigonometry": AgentSpec("trigonometry", "src.math_agent.trigonometry_agent:TrigonometryAgent", 8001),
+    "coding": AgentSpec("coding", "src.coding_agent.code_generator:CodingAgent", 8003),
+}
+
+WORKER_ID_ENV = "A2A_WORKER_ID"
+LISTEN_BACKLOG = int(os.getenv("LISTEN_BACKLOG", "2048"))
+RESTART_DELAY = 1.0
+
+class WorkerStartupError(RuntimeError):
+    """Raised by a worker whose agent cannot serve (e.g. the LLM server without an OpenAI key)."""
+
+def bind_socket(host: str, port: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(LISTEN_BACKLOG)
+    sock.set_inheritable(True)
+    return sock
+
+def load_agent(spec: AgentSpec):
+    module_name, class_name = spec.target.split(":")
+    agent = getattr(importlib.import_module(module_name), class_name)()
+    if spec.name == "llm" and agent.llm is None:
+        raise WorkerStartupError("No LLM backend could be initialized. Is OPENAI_API_KEY set (or LLM_BACKENDS configured)?")
+    return agent
+
+def warm_up(agent, app):
+    """Pay one-time costs (imports, caches, the first request through the stack) before accepting traffic."""
+    from src.readiness import warm_up as warm_up_agent
+    warm_up_agent(agent)
+    if hasattr(app, "test_client"):
+        app.test_client().get("/agent.json")
+
+def _flask_server(agent, sock: socket.socket, host: str, port: int):
+    """Build and warm up the Flask app; returns the function that serves it on the shared socket."""
+    from python_a2a.server.http import create_flask_app
+    from werkzeug.serving import make_server
+
+    app = create_flask_app(agent)
+    warm_up(agent, app)
+    # werkzeug sets its own logger to INFO, so per-request access lines would bypass LOG_CONSOLE_LEVEL
+    logging.getLogger("werkzeug").setLevel(logging.getLogger().level)
+    server = make_server(host, port, app, threaded=True, fd=sock.fileno())
+    # Let server_close() wait for in-flight requests instead of dropping them on shutdown
+    server.daemon_threads = False
+    server.block_on_close = True
+    # shutdown() blocks until serve_forever returns, so it can't run on the thread being interrupted
+    signal.signal(signal.SIGTERM, lambda signum, frame: threading.Thread(target=server.shutdown, daemon=True).start())
+
+    def serve():
+        try:
+            server.serve_forever()
+        finally:
+            server.server_close()
+    return serve
+
+def _async_server(agent, sock: socket.socket, max_in_flight: int, max_queue: int, graceful_timeout: float):
+    """Build and warm up the ASGI app; returns the function that serves it on the shared socket."""
+    import uvicorn
+    from src.async_server import create_async_app
+
+    app = create_async_app(agent, max_in_flight=max_in_flight, max_queue=max_queue)
+    warm_up(agent, app)
+    # uvicorn installs its own SIGTERM handler and drains connections on shutdown
+    server = uvicorn.Server(uvicorn.Config(
+        app, log_level="warning", timeout_graceful_shutdown=graceful_timeout, lifespan="off",
+    ))
+    return lambda: server.run(sockets=[sock])
+
+def run_worker(spec: AgentSpec, index: int, sock: socket.socket, options: dict, ready):
+    """Worker process body: build the agent, warm up, report ready, serve until told to stop."""
+    os.environ[WORKER_ID_ENV] = str(index)
+    # Forked with the supervisor's handlers; Ctrl+C reaches the whole group, so the supervisor coordinates
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    try:
+        from src.utils import setup_console_logging
+        setup_console_logging()
+        agent = load_agent(spec)
+        if options["async_mode"]:
+            serve = _async_server(agent, sock, options["max_in_flight"], options["max_queue"], options["graceful_timeout"])
+        else:
+            serve = _flask_server(agent, sock, options["host"], spec.port)
+    except Exception as e:
+        print(f"[{spec.name}:{index}] failed to start: {e}", file=sys.stderr, flush=True)
+        sys.exit(3)
+    ready.put((spec.name, index, os.getpid()))
+    serve()
+
+class Supervisor:
+    """Forks, watches and restarts the worker processes of one or more agents."""
+
+    def __init__(self, specs: list[AgentSpec], workers: int, options: dict):
+        self.specs = specs
+        self.workers = workers
+        self.options = options
+        self.context = multiprocessing.get_context("fork")
+        self.ready = self.context.SimpleQueue()
+        self.sockets = {}
+        self.processes = {}  # (agent name, worker index) -> Process
+        self.stopping = False
+
+    def _start(self, spec: AgentSpec, index: int):
+        process = self.context.Process(
+            target=run_worker, args=(spec, index, self.sockets[spec.name], self.options, self.ready),
+            name=f"{spec.name}-worker-{index}",
+        )
+        process.start()
+        self.processes[(spec.name, index)] = process
+
+    def _wait_ready(self, timeout: float):
+        expected, deadline = len(self.processes), time.monotonic() + timeout
+        started = 0
+        while started < expected:
+            if self.stopping:
+                raise WorkerStartupError("Interrupted during startup.")
+            if not self.ready.empty():
+                self.ready.get()
+                started += 1
+                continue
+            failed = [key for key, process in self.processes.items() if process.exitcode is not None]
+            if failed:
+                raise WorkerStartupError(f"Worker {failed[0][0]}:{failed[0][1]} exited during startup.")
+            if time.monotonic() > deadline:
+                raise WorkerStartupError(f"Only {started} of {expected} workers were ready after {timeout:.0f}s.")
+            time.sleep(0.05)
+
+    def stop(self, *args):
+        if self.stopping:
+            return
+        self.stopping = True
+        print("Stopping workers...", flush=True)
+        for process in self.processes.values():
+            if process.is_alive():
+                process.terminate()  # SIGTERM: graceful shutdown in the worker
+
+    def run(self) -> int:
+        for spec in self.specs:
+            self.sockets[spec.name] = bind_socket(self.options["host"], spec.port)
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        for spec in self.specs:
+            for index in range(self.workers):
+                self._start(spec, index)
+        try:
+            self._wait_ready(self.options["startup_timeout"])
+        except WorkerStartupError as e:
+            print(f"Startup failed: {e}", file=sys.stderr, flush=True)
+            self.stop()
+            self._join()
+            return 1
+
+        mode = "async" if self.options["async_mode"] else "threaded"
+        for spec in self.specs:
+            print(f"{spec.name}: {self.workers} {mode} workers on http://{self.options['host']}:{spec.port}", flush=True)
+        print("ready", flush=True)
+
+        specs = {spec.name: spec for spec in self.specs}
+        while not self.stopping:
+            wait([process.sentinel for process in self.processes.values()], timeout=1.0)
+            for (name, index), process in list(self.processes.items()):
+                if process.exitcode is not None and not self.stopping:
+                    print(f"Worker {name}:{index} (pid {process.pid}) exited with {process.exitcode}; restarting.", flush=True)
+                    time.sleep(RESTART_DELAY)  # don't spin on a worker that crashes right away
+                    self._start(specs[name], index)
+        self._join()
+        return 0
+
+    def _join(self):
+        deadline = time.monotonic() + self.options["graceful_timeout"]
+        for process in self.processes.values():
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                process.kill()
+                process.join()
+        for sock in self.sockets.values():
+            sock.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Run agent servers under multiple worker processes.")
+    parser.add_argument("agents", nargs="*", default=["all"], choices=["all", *AGENTS],
+                        help="Which servers to run (default: all three).")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes per server.")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, help="Override the port (only with a single agent).")
+    parser.add_argument("--async-mode", action="store_true", help="Serve each worker with the asyncio-native server.")
+    parser.add_argument("--max-in-flight", type=int, default=256, help="Async mode: max concurrent tasks per worker.")
+    parser.add_argument("--max-queue", type=int, default=1024, help="Async mode: tasks allowed to wait per worker before 503.")
+    parser.add_argument("--graceful-timeout", type=float, default=30.0, help="Seconds to let in-flight requests finish on shutdown.")
+    parser.add_argument("--startup-timeout", type=float, default=120.0, help="Seconds to wait for all workers to warm up.")
+    args = parser.parse_args()
+
+    names = list(AGENTS) if "all" in args.agents else list(dict.fromkeys(args.agents))
+    specs = [AGENTS[name] for name in names]
+    if args.port is not None:
+        if len(specs) != 1:
+            parser.error("--port can only be used with a single agent.")
+        specs = [AgentSpec(specs[0].name, specs[0].target, args.port)]
+
+    options = {
+        "host": args.host,
+        "async_mode": args.async_mode,
+        "max_in_flight": args.max_in_flight,
+        "max_queue": args.max_queue,
+        "graceful_timeout": args.graceful_timeout,
+        "startup_timeout": args.startup_timeout,
+    }
+    sys.exit(Supervisor(specs, max(1, args.workers), options).run())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,394 @@
+"""A pool of LLM backends (OpenAI keys/models, local Ollama models, fakes) behind one invoke/ainvoke/astream API.
+
+Backends are configured with LLM_BACKENDS, a JSON list; without it the pool holds the single gpt-4o-mini backend
+the server always used:
+
+    LLM_BACKENDS='[{"provider": "openai", "model": "gpt-4o-mini", "rpm": 500, "tpm": 200000},
+                   {"provider": "openai", "model": "gpt-4o-mini", "api_key_env": "OPENAI_API_KEY_2"},
+                   {"provider": "ollama", "model": "llama3.2"}]'
+
+Fields: provider (openai | ollama | fake), model, name, api_key_env, base_url, rpm and tpm (request and token
+rate limits per minute), cheap (default: true for ollama and fake) and, for fake backends, responses and sleep.
+"""
+import asyncio
+import importlib.util
+import json
+import logging
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from src.metrics import MetricsRegistry
+from src.prompts import Prompt
+from src.tracing import Tracer
+
+logger = logging.getLogger(__name__)
+
+LLM_BACKENDS = os.getenv("LLM_BACKENDS")
+# Prompts up to this length that don't ask for code or proofs may go to a cheap backend
+LLM_SIMPLE_PROMPT_CHARS = int(os.getenv("LLM_SIMPLE_PROMPT_CHARS", "700"))
+# A cheap backend takes a simple prompt unless its expected latency is this many times the best full backend's
+LLM_CHEAP_LATENCY_FACTOR = float(os.getenv("LLM_CHEAP_LATENCY_FACTOR", "2.0"))
+# Output tokens assumed per call without an answer budget when charging the tokens-per-minute bucket; corrected
+# once usage is reported
+LLM_OUTPUT_TOKEN_ESTIMATE = int(os.getenv("LLM_OUTPUT_TOKEN_ESTIMATE", "256"))
+# How long a backend is skipped after a rate-limit or connection error
+LLM_BACKEND_COOLDOWN_SECONDS = float(os.getenv("LLM_BACKEND_COOLDOWN_SECONDS", "10.0"))
+# How long a call waits for a backend when all of them are rate limited or cooling down
+LLM_POOL_WAIT_SECONDS = float(os.getenv("LLM_POOL_WAIT_SECONDS", "10.0"))
+
+COMPLEX_PROMPT_PATTERN = re.compile(r"\b(code|python|function|prove|proof|derive|derivation)\b", re.IGNORECASE)
+EWMA_WEIGHT = 0.2
+# Optimistic starting latency, so a backend that hasn't answered yet gets tried (then least-outstanding decides)
+INITIAL_LATENCY = 0.001
+
+class NoBackendAvailableError(RuntimeError):
+    """Raised when no backend could take a call within LLM_POOL_WAIT_SECONDS, or every backend failed."""
+
+def _last_error(tried: dict) -> Exception | None:
+    return next(reversed(tried.values()), None)
+
+def is_simple_prompt(prompt: str) -> bool:
+    return len(prompt) <= LLM_SIMPLE_PROMPT_CHARS and not COMPLEX_PROMPT_PATTERN.search(prompt)
+
+def estimate_tokens(prompt: str | Prompt) -> int:
+    """Tokens a call will use: its prompt's, counted locally, plus its answer budget (or LLM_OUTPUT_TOKEN_ESTIMATE)."""
+    prompt = Prompt(prompt) if isinstance(prompt, str) else prompt
+    return prompt.tokens() + (prompt.max_tokens or LLM_OUTPUT_TOKEN_ESTIMATE)
+
+class TokenBucket:
+    """capacity tokens, refilled continuously at capacity per minute. Not thread-safe; LLMPool holds its lock."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.tokens = per_minute
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until amount tokens are available (0 if they are now). Requests above capacity wait for a full bucket."""
+        self._refill()
+        return max(0.0, min(amount, self.capacity) - self.tokens) / self.rate
+
+    def take(self, amount: float):
+        self._refill()
+        self.tokens -= amount  # may go negative when an estimate was too low; later calls wait it off
+
+@dataclass
+class BackendSpec:
+    provider: str
+    model: str = ""
+    name: str = ""
+    api_key_env: str = "OPENAI_API_KEY"
+    base_url: str | None = None
+    rpm: float | None = None
+    tpm: float | None = None
+    cheap: bool | None = None
+    responses: list[str] = field(default_factory=lambda: ["This is a fake LLM response."])
+    sleep: float | None = None
+
+    def __post_init__(self):
+        self.name = self.name or f"{self.provider}:{self.model or 'default'}"
+        if self.cheap is None:
+            self.cheap = self.provider in ("ollama", "fake")
+
+def build_chat_model(spec: BackendSpec):
+    """Create the LangChain chat model for a backend (temperature 0, token usage reported when streaming)."""
+    if spec.provider == "openai":
+        from langchain_openai import ChatOpenAI
+        return ChatOpenAI(
+            model_name=spec.model or "gpt-4o-mini", temperature=0, stream_usage=True,
+            api_key=os.getenv(spec.api_key_env), base_url=spec.base_url,
+        )
+    if spec.provider == "ollama":
+        try:
+            from langchain_ollama import ChatOllama
+        except ImportError as e:
+            raise RuntimeError("Ollama backends need the langchain-ollama package.") from e
+        options = {"base_url": spec.base_url} if spec.base_url else {}
+        return ChatOllama(model=spec.model or "llama3.2", temperature=0, **options)
+    if spec.provider == "fake":
+        from langchain_core.language_models.fake_chat_models import FakeListChatModel
+        return FakeListChatModel(responses=spec.responses, sleep=spec.sleep)
+    raise ValueError(f"Unknown LLM provider '{spec.provider}' (expected openai, ollama or fake).")
+
+def with_max_tokens(spec: BackendSpec, model, max_tokens: int):
+    """The chat model with its answers capped at max_tokens tokens."""
+    if spec.provider == "openai":
+        return model.bind(max_tokens=max_tokens)
+    if spec.provider == "ollama":
+        return model.model_copy(update={"num_predict": max_tokens})
+    return model  # fake models answer from a fixed list
+
+def check_backend_spec(spec: BackendSpec):
+    """Raise if build_chat_model is bound to fail (missing API key or package), without importing the provider SDK."""
+    if spec.provider == "openai" and not os.getenv(spec.api_key_env):
+        raise RuntimeError(f"{spec.api_key_env} is not set.")
+    if spec.provider == "ollama" and importlib.util.find_spec("langchain_ollama") is None:
+        raise RuntimeError("Ollama backends need the langchain-ollama package.")
+    if spec.provider not in ("openai", "ollama", "fake"):
+        raise ValueError(f"Unknown LLM provider '{spec.provider}' (expected openai, ollama or fake).")
+
+def load_backend_specs(config: str | None = LLM_BACKENDS) -> list[BackendSpec]:
+    if not config:
+        return [BackendSpec("openai", "gpt-4o-mini")]
+    specs = [BackendSpec(**entry) for entry in json.loads(config)]
+    names = [spec.name for spec in specs]
+    for index, spec in enumerate(specs):
+        if names.count(spec.name) > 1:
+            spec.name = f"{spec.name}#{index}"  # e.g. the same model under two API keys
+    return specs
+
+def _is_rate_limit(error: Exception) -> bool:
+    return getattr(error, "status_code", None) == 429 or "RateLimit" in type(error).__name__
+
+def _is_unreachable(error: Exception) -> bool:
+    return isinstance(error, (ConnectionError, TimeoutError)) or any(
+        word in type(error).__name__ for word in ("Connect", "Timeout")
+    )
+
+class Backend:
+    """One chat model plus the state used to route to it: rate-limit buckets, outstanding calls and latency."""
+
+    def __init__(self, spec: BackendSpec, metrics: MetricsRegistry, model=None):
+        self.spec = spec
+        self.name = spec.name
+        self._model = model
+        self._model_lock = threading.Lock()
+        self._budgeted = {}  # max_tokens -> model with that answer budget
+        self.cheap = spec.cheap
+        self.requests_bucket = TokenBucket(spec.rpm) if spec.rpm else None
+        self.tokens_bucket = TokenBucket(spec.tpm) if spec.tpm else None
+        self.outstanding = 0
+        self.latency = INITIAL_LATENCY  # EWMA of successful call latency, seconds
+        self.cooldown_until = 0.0
+        labels = {"backend": self.name}
+        self.calls = metrics.counter("llm_backend_calls_total", "LLM calls sent to each backend.", labels=labels)
+        self.errors = metrics.counter("llm_backend_errors_total", "LLM calls that failed on each backend.", labels=labels)
+        self.throttled = metrics.counter("llm_backend_rate_limited_total", "Rate-limit errors returned by each backend.", labels=labels)
+        self.outstanding_gauge = metrics.gauge("llm_backend_outstanding", "LLM calls in flight on each backend.", labels=labels)
+        self.latency_histogram = metrics.histogram("llm_backend_latency_seconds", "Latency of successful LLM calls per backend.", labels=labels)
+
+    @property
+    def model(self):
+        """The chat model, built on first use so startup doesn't pay for importing the provider SDK."""
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    self._model = build_chat_model(self.spec)
+        return self._model
+
+    def model_for(self, max_tokens: int | None):
+        """The chat model with answers capped at max_tokens (uncapped when None)."""
+        if not max_tokens:
+            return self.model
+        model = self._budgeted.get(max_tokens)
+        if model is None:
+            model = with_max_tokens(self.spec, self.model, max_tokens)
+            with self._model_lock:
+                self._budgeted[max_tokens] = model
+        return model
+
+    def wait_time(self, tokens: int) -> float:
+        """Seconds until this backend can take a call of about tokens tokens."""
+        waits = [self.cooldown_until - time.monotonic()]
+        if self.requests_bucket:
+            waits.append(self.requests_bucket.wait_time(1))
+        if self.tokens_bucket:
+            waits.append(self.tokens_bucket.wait_time(tokens))
+        return max(0.0, *waits)
+
+    def expected_latency(self) -> float:
+        """Least-outstanding-requests, weighted by how fast the backend has been answering."""
+        return self.latency * (self.outstanding + 1)
+
+class LLMPool:
+    """Routes each prompt to a backend and fails over to the next one when a call errors.
+
+    Choice: among backends that are not rate limited or cooling down, the one with the lowest expected latency.
+    Simple prompts go to the best cheap (local) backend unless it is LLM_CHEAP_LATENCY_FACTOR times slower than
+    the best full backend; other prompts use cheap backends only when no full backend is available.
+    invoke, ainvoke and astream match the LangChain chat model methods CustomLLMAgent calls, and also take a Prompt,
+    whose system prefix goes first as a system message and whose budget is sent as max_tokens.
+    """
+
+    def __init__(self, backends: list[Backend], tracer: Tracer = None):
+        if not backends:
+            raise ValueError("An LLM pool needs at least one backend.")
+        self.backends = backends
+        self.tracer = tracer
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_specs(cls, specs: list[BackendSpec], metrics: MetricsRegistry, tracer: Tracer = None) -> "LLMPool":
+        """Add every backend that can be built; the ones that can't (missing key, missing package) are skipped.
+
+        The chat models themselves are built on first use, or by warm_up().
+        """
+        backends = []
+        for spec in specs:
+            try:
+                check_backend_spec(spec)
+                backends.append(Backend(spec, metrics))
+            except Exception as e:
+                logger.error(f"Skipping LLM backend '{spec.name}': {e}")
+        return cls(backends, tracer)
+
+    def warm_up(self):
+        """Build every backend's chat model now rather than on its first call."""
+        for backend in self.backends:
+            try:
+                backend.model
+            except Exception as e:
+                logger.error(f"Could not build LLM backend '{backend.name}': {e}")
+
+    @property
+    def model_name(self) -> str:
+        return ", ".join(backend.name for backend in self.backends)
+
+    def _choose(self, prompt: Prompt, tokens: int, tried: dict) -> tuple[Backend | None, float]:
+        """Reserve the best backend for prompt, or return (None, seconds until one frees up).
+
+        tried maps the backends that already failed for this prompt to their exceptions, in the order they failed.
+        """
+        with self._lock:
+            candidates = [backend for backend in self.backends if backend.name not in tried]
+            if not candidates:
+                name, error = next(reversed(tried.items()))
+                raise NoBackendAvailableError(
+                    f"Every LLM backend failed for this prompt; the last, '{name}', raised {type(error).__name__}: {error}"
+                ) from error
+            ready = [backend for backend in candidates if backend.wait_time(tokens) == 0]
+            if not ready:
+                return None, min(backend.wait_time(tokens) for backend in candidates)
+
+            full = [backend for backend in ready if not backend.cheap]
+            cheap = [backend for backend in ready if backend.cheap]
+            best_full = min(full, key=Backend.expected_latency) if full else None
+            best_cheap = min(cheap, key=Backend.expected_latency) if cheap else None
+            if best_full is None or (best_cheap is not None and is_simple_prompt(prompt.text)
+                                     and best_cheap.expected_latency() <= LLM_CHEAP_LATENCY_FACTOR * best_full.expected_latency()):
+                backend = best_cheap
+            else:
+                backend = best_full
+
+            if backend.requests_bucket:
+                backend.requests_bucket.take(1)
+            if backend.tokens_bucket:
+                backend.tokens_bucket.take(tokens)
+            backend.outstanding += 1
+            backend.outstanding_gauge.set(backend.outstanding)
+            backend.calls.inc()
+            return backend, 0.0
+
+    def _release(self, backend: Backend):
+        with self._lock:
+            backend.outstanding -= 1
+            backend.outstanding_gauge.set(backend.outstanding)
+
+    def _finish(self, backend: Backend, tokens: int, start: float, message=None, error: Exception = None):
+        seconds = time.monotonic() - start
+        self._release(backend)
+        with self._lock:
+            if error is None:
+                backend.latency += EWMA_WEIGHT * (seconds - backend.latency)
+                usage = getattr(message, "usage_metadata", None)
+                if usage and backend.tokens_bucket:
+                    backend.tokens_bucket.take(usage.get("total_tokens", tokens) - tokens)
+            elif _is_rate_limit(error) or _is_unreachable(error):
+                backend.cooldown_until = time.monotonic() + LLM_BACKEND_COOLDOWN_SECONDS
+        if error is None:
+            backend.latency_histogram.observe(seconds)
+            if self.tracer is not None:
+                self.tracer.annotate(backend=backend.name)
+            return
+        backend.errors.inc()
+        if _is_rate_limit(error):
+            backend.throttled.inc()
+        logger.warning(f"LLM backend '{backend.name}' failed ({type(error).__name__}: {error}); trying another backend.")
+
+    def _acquire(self, prompt: Prompt, tokens: int, tried: dict) -> Backend:
+        deadline = time.monotonic() + LLM_POOL_WAIT_SECONDS
+        while True:
+            backend, wait = self._choose(prompt, tokens, tried)
+            if backend is not None:
+                return backend
+            if time.monotonic() + wait > deadline:
+                raise NoBackendAvailableError(
+                    f"All LLM backends are rate limited or unavailable for the next {wait:.1f}s."
+                ) from _last_error(tried)
+            time.sleep(min(wait, 1.0))
+
+    async def _aacquire(self, prompt: Prompt, tokens: int, tried: dict) -> Backend:
+        deadline = time.monotonic() + LLM_POOL_WAIT_SECONDS
+        while True:
+            backend, wait = self._choose(prompt, tokens, tried)
+            if backend is not None:
+                return backend
+            if time.monotonic() + wait > deadline:
+                raise NoBackendAvailableError(
+                    f"All LLM backends are rate limited or unavailable for the next {wait:.1f}s."
+                ) from _last_error(tried)
+            await asyncio.sleep(min(wait, 1.0))
+
+    def invoke(self, prompt: str | Prompt):
+        prompt = Prompt(prompt) if isinstance(prompt, str) else prompt
+        tokens, tried = estimate_tokens(prompt), {}
+        while True:
+            backend = self._acquire(prompt, tokens, tried)
+            start = time.monotonic()
+            try:
+                message = backend.model_for(prompt.max_tokens).invoke(prompt.messages())
+            except Exception as e:
+                self._finish(backend, tokens, start, error=e)
+                tried[backend.name] = e
+                continue
+            self._finish(backend, tokens, start, message)
+            return message
+
+    async def ainvoke(self, prompt: str | Prompt):
+        prompt = Prompt(prompt) if isinstance(prompt, str) else prompt
+        tokens, tried = estimate_tokens(prompt), {}
+        while True:
+            backend = await self._aacquire(prompt, tokens, tried)
+            start = time.monotonic()
+            try:
+                message = await backend.model_for(prompt.max_tokens).ainvoke(prompt.messages())
+            except asyncio.CancelledError:
+                self._release(backend)
+                raise
+            except Exception as e:
+                self._finish(backend, tokens, start, error=e)
+                tried[backend.name] = e
+                continue
+            self._finish(backend, tokens, start, message)
+            return message
+
+    async def astream(self, prompt: str | Prompt):
+        """Stream from one backend; fails over only if the backend errors before its first chunk."""
+        prompt = Prompt(prompt) if isinstance(prompt, str) else prompt
+        tokens, tried = estimate_tokens(prompt), {}
+        while True:
+            backend = await self._aacquire(prompt, tokens, tried)
+            start, started, last = time.monotonic(), False, None
+            try:
+                async for chunk in backend.model_for(prompt.max_tokens).astream(prompt.messages()):
+                    started, last = True, chunk if getattr(chunk, "usage_metadata", None) else last
+                    yield chunk
+            except Exception as e:
+                self._finish(backend, tokens, start, error=e)
+                if started:
+                    raise
+                tried[backend.name] = e
+                continue
+            except BaseException:
+                self._release(backend)  # closed early by the consumer, or cancelled
+                raise
+            self._finish(backend, tokens, start, last)
+            return
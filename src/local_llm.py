@@ -1,19 +1,181 @@
 import asyncio
 from python_a2a import A2AServer, TaskStatus, TaskState, run_server, skill, agent
-from src.utils import parse_task_message
-from langchain_openai import ChatOpenAI
+from src.utils import normalize_prompt, parse_task_message, setup_console_logging
+from src.metrics import MetricsRegistry, register_metrics_route
+from src.readiness import register_readiness_route, start_warm_up
+from src.async_server import run_async_server
+from src.streaming import register_stream_route, timed_stream
+from src.tracing import Tracer, register_tracing
+from src.task_store import create_task_store, register_task_routes
+from src.llm_pool import LLMPool, is_simple_prompt, load_backend_specs
+from src.prompts import TEMPLATES, Prompt, load_tokenizer
+from src.admission import PRIORITY_CODE, PRIORITY_LLM, PRIORITY_LOCAL, register_admission_control
+from collections import OrderedDict
+from concurrent.futures import Future
+import argparse
 import logging
 import os
+import sqlite3
+import threading
+import time
 from dotenv import load_dotenv
 load_dotenv()
 
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
 
-logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+# Response cache settings; set LLM_CACHE_PATH to a file to keep the cache across restarts
+LLM_CACHE_MAX_ENTRIES = int(os.getenv('LLM_CACHE_MAX_ENTRIES', '1024'))
+LLM_CACHE_TTL_SECONDS = float(os.getenv('LLM_CACHE_TTL_SECONDS', '86400'))
+LLM_CACHE_PATH = os.getenv('LLM_CACHE_PATH')
+
+setup_console_logging()
+
+class ResponseCache:
+    """Prompt-keyed LRU cache with TTL expiry and optional SQLite backing.
+
+    The in-memory OrderedDict holds at most max_entries items (least recently used are evicted first).
+    When persist_path is given every entry is also written to SQLite and reloaded on startup.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 86400, persist_path: str = None, metrics: MetricsRegistry = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # normalized prompt -> (expires_at, response)
+        self._lock = threading.Lock()
+        metrics = metrics or MetricsRegistry()
+        self.hits = metrics.counter("llm_cache_hits_total", "LLM responses served from the response cache.")
+        self.misses = metrics.counter("llm_cache_misses_total", "Prompts not found in the response cache.")
+        self.evictions = metrics.counter("llm_cache_evictions_total", "Entries removed because of LRU capacity or TTL expiry.")
+        self.size = metrics.gauge("llm_cache_entries", "Entries currently held in memory by the response cache.")
+
+        self._db = None
+        if persist_path:
+            self._db = sqlite3.connect(persist_path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS llm_cache (prompt TEXT PRIMARY KEY, response TEXT NOT NULL, expires_at REAL NOT NULL)")
+            self._db.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (time.time(),))
+            rows = self._db.execute(
+                "SELECT prompt, response, expires_at FROM llm_cache ORDER BY expires_at DESC LIMIT ?", (max_entries,)
+            ).fetchall()
+            for prompt, response, expires_at in reversed(rows):
+                self._entries[prompt] = (expires_at, response)
+            self._db.commit()
+            self.size.set(len(self._entries))
+
+    def get(self, prompt: str) -> str | None:
+        key = normalize_prompt(prompt)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= time.time():
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses.inc()
+                return None
+            self._entries.move_to_end(key)
+            self.hits.inc()
+            return entry[1]
+
+    def __contains__(self, prompt: str) -> bool:
+        """Whether prompt has an unexpired entry (without counting a hit or miss)."""
+        entry = self._entries.get(normalize_prompt(prompt))
+        return entry is not None and entry[0] > time.time()
+
+    def put(self, prompt: str, response: str):
+        key = normalize_prompt(prompt)
+        expires_at = time.time() + self.ttl_seconds
+        with self._lock:
+            self._entries[key] = (expires_at, response)
+            self._entries.move_to_end(key)
+            if self._db is not None:
+                self._db.execute("INSERT OR REPLACE INTO llm_cache VALUES (?, ?, ?)", (key, response, expires_at))
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+            if self._db is not None:
+                self._db.commit()
+            self.size.set(len(self._entries))
+
+    def _remove(self, key: str):
+        # Caller holds self._lock
+        del self._entries[key]
+        self.evictions.inc()
+        self.size.set(len(self._entries))
+        if self._db is not None:
+            self._db.execute("DELETE FROM llm_cache WHERE prompt = ?", (key,))
+            self._db.commit()
+
+class SingleFlight:
+    """Coalesces concurrent calls for the same normalized prompt into one upstream LLM call.
+
+    The first caller (the leader) makes the call; identical prompts arriving while it is in flight wait for
+    its result instead. Waiters can be threads (Flask) or coroutines on any event loop, since they share a
+    concurrent.futures.Future. Exceptions are delivered to every waiter.
+    """
+
+    def __init__(self, metrics: MetricsRegistry = None):
+        self._calls = {}  # normalized prompt -> Future of the in-flight call
+        self._lock = threading.Lock()
+        metrics = metrics or MetricsRegistry()
+        self.calls = metrics.counter("llm_singleflight_calls_total", "Upstream LLM calls made by a single-flight leader.")
+        self.coalesced = metrics.counter("llm_singleflight_coalesced_total", "Requests that shared an identical in-flight LLM call instead of making their own.")
+        self.in_flight = metrics.gauge("llm_singleflight_in_flight", "Distinct prompts currently being answered by the LLM.")
+
+    def _join(self, prompt: str) -> tuple[str, Future, bool]:
+        key = normalize_prompt(prompt)
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self.coalesced.inc()
+                return key, future, False
+            future = self._calls[key] = Future()
+            self.calls.inc()
+            self.in_flight.set(len(self._calls))
+            return key, future, True
+
+    def _finish(self, key: str, future: Future, result=None, error: BaseException = None):
+        with self._lock:
+            del self._calls[key]
+            self.in_flight.set(len(self._calls))
+        if future.done():
+            return  # cancelled from outside; nobody is left waiting on it
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def do(self, prompt: str, call):
+        """Run call() unless an identical prompt is already in flight, in which case block for its result."""
+        key, future, is_leader = self._join(prompt)
+        if not is_leader:
+            return future.result()
+        try:
+            result = call()
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, result)
+        return result
+
+    async def do_async(self, prompt: str, call):
+        """Async counterpart of do: await call() or the identical in-flight call."""
+        key, future, is_leader = self._join(prompt)
+        if not is_leader:
+            # Shielded: a cancelled waiter must not cancel the Future every other waiter shares
+            return await asyncio.shield(asyncio.wrap_future(future))
+        try:
+            result = await call()
+        except asyncio.CancelledError:
+            # Only the leader's request was cancelled; the waiters get an error instead of being cancelled too
+            self._finish(key, future, error=RuntimeError("The shared LLM call was cancelled."))
+            raise
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, result)
+        return result
 
 @agent(
     name="Custom OpenAI LLM Agent", 
-    description="Provides access to an OpenAI LLM using ChatOpenAI, using synchronous methods.",
+    description="Provides access to a pool of LLM backends (OpenAI models and keys, local Ollama models), load-balanced per prompt.",
     version="1.1.0"
 )
 class CustomLLMAgent(A2AServer):
@@ -21,77 +183,263 @@ class CustomLLMAgent(A2AServer):
         super().__init__()
         self.logger = logger if logger else logging.getLogger(self.__class__.__name__)
         if not self.logger.handlers and not logging.getLogger().handlers:
-            logging.basicConfig(level=logging.DEBUG) 
-            self.logger.warning("Logger was not configured, basicConfig called as fallback in CustomLLMAgent.__init__.")
+            setup_console_logging()
+            self.logger.warning("Logger was not configured, console logging set up as fallback in CustomLLMAgent.__init__.")
         
+        self.metrics = MetricsRegistry()
+        self.response_cache = ResponseCache(
+            max_entries=LLM_CACHE_MAX_ENTRIES,
+            ttl_seconds=LLM_CACHE_TTL_SECONDS,
+            persist_path=LLM_CACHE_PATH,
+            metrics=self.metrics,
+        )
+        self.single_flight = SingleFlight(self.metrics)
+        self.tracer = Tracer(self.metrics, self.__class__.__name__)
+        self.tasks = create_task_store(metrics=self.metrics)  # replaces A2AServer's per-process dict
+        self._intent_metrics = {}  # prompt intent -> its token, latency and budget metrics
+
         self.llm = None 
         try:
-            self.llm = ChatOpenAI(model_name="gpt-4o-mini", temperature=0)
-            self.logger.info(f"Agent '{self.name}' version {self.version} initialized with LLM: {self.llm.model_name}")
+            # LLM_BACKENDS picks the backends; by default a single ChatOpenAI gpt-4o-mini, as before
+            self.llm = LLMPool.from_specs(load_backend_specs(), self.metrics, self.tracer)
+            self.logger.info(f"Agent '{self.name}' version {self.version} initialized with LLM backends: {self.llm.model_name}")
         except Exception as e:
-            self.logger.error(f"Failed to initialize ChatOpenAI: {e}. Ensure OPENAI_API_KEY is set.", exc_info=True)
+            self.logger.error(f"Failed to initialize any LLM backend: {e}. Ensure OPENAI_API_KEY is set or configure LLM_BACKENDS.", exc_info=True)
 
     @skill(
         name="Invoke LLM Sync",
-        description="Invokes the ChatOpenAI LLM synchronously with the given query text.",
+        description="Invokes the LLM backend pool synchronously with the given query text.",
         examples=["What is the capital of France?", "Summarize this text: ..."]
     )
-    def invoke_llm_sync_skill(self, query_text: str) -> str:
+    def invoke_llm_sync_skill(self, query_text: str, prompt: Prompt = None) -> str:
         self.logger.debug(f"LLM sync skill received query (first 100 chars): '{query_text[:100]}'")
-        
+        prompt = prompt or Prompt(query_text)
+
+        # temperature=0, so a cached answer for the same (normalized) prompt is as good as a fresh one
+        with self.tracer.span("cache_lookup"):
+            cached = self.response_cache.get(prompt.cache_key)
+        if cached is not None:
+            self.logger.debug(f"Response cache hit for query (first 100 chars): '{query_text[:100]}'")
+            return cached
+
         if not self.llm:
             self.logger.error("ChatOpenAI LLM is not initialized. Cannot process sync skill.")
             return "Error: ChatOpenAI LLM not initialized."
 
         try:
-            self.logger.debug(f"Sending to ChatOpenAI (sync invoke): {query_text[:100]}")
-            response_message = self.llm.invoke(query_text) 
-            response_str = response_message.content if hasattr(response_message, 'content') else str(response_message)
-            
-            self.logger.debug(f"ChatOpenAI sync response (first 100 chars): '{response_str[:100]}'")
-            return response_str
+            # Identical prompts already in flight share that call instead of starting another one
+            with self.tracer.span("llm"):
+                return self.single_flight.do(prompt.cache_key, lambda: self._invoke_and_cache(prompt))
+        except Exception as e:
+            self.logger.error(f"Error during LLM sync invoke for query '{query_text[:50]}...': {e}", exc_info=True)
+            return f"Error invoking LLM (sync): {str(e)}"
+
+    async def invoke_llm_async_skill(self, query_text: str, prompt: Prompt = None) -> str:
+        """Async counterpart of invoke_llm_sync_skill (LLMPool.ainvoke), used by the asyncio serving mode."""
+        self.logger.debug(f"LLM async skill received query (first 100 chars): '{query_text[:100]}'")
+        prompt = prompt or Prompt(query_text)
+
+        with self.tracer.span("cache_lookup"):
+            cached = self.response_cache.get(prompt.cache_key)
+        if cached is not None:
+            self.logger.debug(f"Response cache hit for query (first 100 chars): '{query_text[:100]}'")
+            return cached
+
+        if not self.llm:
+            self.logger.error("ChatOpenAI LLM is not initialized. Cannot process async skill.")
+            return "Error: ChatOpenAI LLM not initialized."
+
+        try:
+            with self.tracer.span("llm"):
+                return await self.single_flight.do_async(prompt.cache_key, lambda: self._ainvoke_and_cache(prompt))
         except Exception as e:
-            self.logger.error(f"Error during ChatOpenAI sync invoke for query '{query_text[:50]}...': {e}", exc_info=True)
-            return f"Error invoking ChatOpenAI (sync): {str(e)}"
+            self.logger.error(f"Error during LLM async invoke for query '{query_text[:50]}...': {e}", exc_info=True)
+            return f"Error invoking LLM (async): {str(e)}"
+
+    def _invoke_and_cache(self, prompt: Prompt) -> str:
+        self.logger.debug(f"Sending to the LLM pool (sync invoke, {prompt.intent}): {prompt.text[:100]}")
+        self._count_prompt(prompt)
+        start = time.perf_counter()
+        response_message = self.llm.invoke(prompt)
+        self._count_response(prompt, response_message, time.perf_counter() - start)
+        response_str = response_message.content if hasattr(response_message, 'content') else str(response_message)
+
+        self.logger.debug(f"LLM sync response (first 100 chars): '{response_str[:100]}'")
+        # Cached before the single-flight slot is released, so a request arriving right after finds it
+        self.response_cache.put(prompt.cache_key, response_str)
+        return response_str
+
+    async def _ainvoke_and_cache(self, prompt: Prompt) -> str:
+        self.logger.debug(f"Sending to the LLM pool (async invoke, {prompt.intent}): {prompt.text[:100]}")
+        self._count_prompt(prompt)
+        start = time.perf_counter()
+        response_message = await self.llm.ainvoke(prompt)
+        self._count_response(prompt, response_message, time.perf_counter() - start)
+        response_str = response_message.content if hasattr(response_message, 'content') else str(response_message)
+
+        self.logger.debug(f"LLM async response (first 100 chars): '{response_str[:100]}'")
+        self.response_cache.put(prompt.cache_key, response_str)
+        return response_str
+
+    def _metrics_for(self, intent: str) -> dict:
+        """Token, latency and budget metrics of one prompt intent, created on its first call."""
+        metrics = self._intent_metrics.get(intent)
+        if metrics is None:
+            labels = {"intent": intent}
+            metrics = self._intent_metrics[intent] = {
+                "prompt_tokens": self.metrics.counter("llm_prompt_tokens_total", "Prompt tokens counted locally before sending, by intent.", labels=labels),
+                "input_tokens": self.metrics.counter("llm_input_tokens_total", "Prompt tokens sent to the LLM (as reported by the API), by intent.", labels=labels),
+                "cached_tokens": self.metrics.counter("llm_cached_input_tokens_total", "Prompt tokens served from the provider's prompt cache, by intent.", labels=labels),
+                "output_tokens": self.metrics.counter("llm_output_tokens_total", "Completion tokens generated by the LLM (as reported by the API), by intent.", labels=labels),
+                "budget_exhausted": self.metrics.counter("llm_budget_exhausted_total", "Answers cut off at their max_tokens budget, by intent.", labels=labels),
+                "latency": self.metrics.histogram("llm_intent_latency_seconds", "Latency of LLM calls (cache hits excluded), by intent.", labels=labels),
+            }
+        return metrics
+
+    def _count_prompt(self, prompt: Prompt):
+        tokens = prompt.tokens()
+        self._metrics_for(prompt.intent)["prompt_tokens"].inc(tokens)
+        self.tracer.annotate(intent=prompt.intent, prompt_tokens=tokens, max_tokens=prompt.max_tokens)
+
+    def _count_response(self, prompt: Prompt, message, seconds: float):
+        """Add a response's latency, token usage and stop reason to its intent's metrics and the request's trace."""
+        metrics = self._metrics_for(prompt.intent)
+        metrics["latency"].observe(seconds)
+        metadata = getattr(message, "response_metadata", None) or {}
+        if "length" in (metadata.get("finish_reason"), metadata.get("done_reason")):
+            metrics["budget_exhausted"].inc()
+            self.logger.info(f"LLM answer reached its {prompt.max_tokens}-token budget ({prompt.intent}): '{prompt.text[:100]}'")
+        usage = getattr(message, "usage_metadata", None)
+        if not usage:
+            return
+        cached = (usage.get("input_token_details") or {}).get("cache_read", 0)
+        metrics["input_tokens"].inc(usage.get("input_tokens", 0))
+        metrics["cached_tokens"].inc(cached)
+        metrics["output_tokens"].inc(usage.get("output_tokens", 0))
+        self.tracer.annotate(input_tokens=usage.get("input_tokens", 0), cached_input_tokens=cached,
+                             output_tokens=usage.get("output_tokens", 0))
+
+    async def stream_response(self, message):
+        """Stream LLM tokens as they are produced (served on /stream as SSE)."""
+        query_text = message.content.text if hasattr(message.content, "text") else str(message.content)
+        prompt = Prompt.from_message(message, query_text)
+        async for chunk in timed_stream(self._stream_llm_chunks(prompt), self.metrics, "llm"):
+            yield chunk
+
+    async def _stream_llm_chunks(self, prompt: Prompt):
+        with self.tracer.span("cache_lookup"):
+            cached = self.response_cache.get(prompt.cache_key)
+        if cached is not None:
+            self.logger.debug(f"Response cache hit for streamed query (first 100 chars): '{prompt.text[:100]}'")
+            yield cached
+            return
+
+        if not self.llm:
+            raise RuntimeError("ChatOpenAI LLM not initialized.")
 
+        self.logger.debug(f"Streaming from the LLM pool (astream, {prompt.intent}): {prompt.text[:100]}")
+        self._count_prompt(prompt)
+        parts, final = [], None
+        start = time.perf_counter()
+        async for chunk in self.llm.astream(prompt):
+            # Usage and the stop reason come on the last chunks; merged, they read like an invoke response
+            final = chunk if final is None else final + chunk
+            text = chunk.content if hasattr(chunk, 'content') else str(chunk)
+            if text:
+                parts.append(text)
+                yield text
+        seconds = time.perf_counter() - start
+        self.tracer.record("llm", seconds)
+        self._count_response(prompt, final, seconds)
+        self.response_cache.put(prompt.cache_key, "".join(parts))
+
+    def setup_routes(self, app):
+        super().setup_routes(app)
+        register_metrics_route(app, self.metrics)
+        register_readiness_route(app, self)
+        register_task_routes(app, self)
+        register_tracing(app, self.tracer)
+        register_admission_control(app, self)
+        register_stream_route(app, self)
+
+    def warm_up(self):
+        """Build the backends' chat models (importing their SDKs) and load the tokenizer before serving; called by src/readiness.py."""
+        if self.llm is not None:
+            self.llm.warm_up()
+        load_tokenizer()
+
+    def readiness_checks(self) -> dict[str, bool]:
+        return {"llm_backends": self.llm is not None}
+
+    def task_priority(self, text: str) -> int:
+        """Admission priority: cached answers first, then short prompts, then long generations such as code."""
+        # Only the text reaches admission, so try it raw and under each template the agents render
+        if text in self.response_cache or any(t.render(text).cache_key in self.response_cache for t in TEMPLATES.values()):
+            return PRIORITY_LOCAL
+        return PRIORITY_LLM if is_simple_prompt(text) else PRIORITY_CODE
 
     def handle_task(self, task):
         self.logger.debug(f"Sync handle_task received by {self.name} (ID: {task.id}): {task.message}")
         query_text = parse_task_message(task)
         
         if not query_text:
-            self.logger.warning(f"No query text found in task message for task ID: {task.id}")
-            task.status = TaskStatus(
-                state=TaskState.ERROR, 
-                message={"role": "agent", "content": {"text": "No query text provided in the task message."}}
-            )
-            return task
+            return self._reject_empty_task(task)
+
+        llm_response_text = self.invoke_llm_sync_skill(query_text, Prompt.from_message(task.message, query_text))
+        return self._complete_task(task, llm_response_text)
 
-        llm_response_text = self.invoke_llm_sync_skill(query_text) 
+    async def handle_task_async(self, task):
+        self.logger.debug(f"Async handle_task received by {self.name} (ID: {task.id}): {task.message}")
+        query_text = parse_task_message(task)
+
+        if not query_text:
+            return self._reject_empty_task(task)
+
+        llm_response_text = await self.invoke_llm_async_skill(query_text, Prompt.from_message(task.message, query_text))
+        return self._complete_task(task, llm_response_text)
 
+    def _reject_empty_task(self, task):
+        self.logger.warning(f"No query text found in task message for task ID: {task.id}")
+        task.status = TaskStatus(
+            state=TaskState.FAILED, 
+            message={"role": "agent", "content": {"text": "No query text provided in the task message."}}
+        )
+        return task
+
+    def _complete_task(self, task, llm_response_text: str):
         if llm_response_text.startswith("Error invoking") or llm_response_text.startswith("Error: ChatOpenAI LLM not initialized.") :
-            self.logger.error(f"LLM sync skill returned an error for task ID {task.id}: {llm_response_text}")
+            self.logger.error(f"LLM skill returned an error for task ID {task.id}: {llm_response_text}")
             task.status = TaskStatus(
-                state=TaskState.ERROR, 
+                state=TaskState.FAILED, 
                 message={"role": "agent", "content": {"text": llm_response_text}}
             )
         else:
-            self.logger.info(f"LLM sync skill successfully processed task ID {task.id}. Response length: {len(llm_response_text)}")
+            self.logger.info(f"LLM skill successfully processed task ID {task.id}. Response length: {len(llm_response_text)}")
             task.artifacts = [{"parts": [{"type": "text", "text": llm_response_text}]}]
             task.status = TaskStatus(state=TaskState.COMPLETED)
         
-        self.logger.debug(f"Sync task ID {task.id} completion status: {task.status.state}, Response snippet: '{llm_response_text[:100]}'")
+        self.logger.debug(f"Task ID {task.id} completion status: {task.status.state}, Response snippet: '{llm_response_text[:100]}'")
         return task
 
 def main():
+    parser = argparse.ArgumentParser(description="Run the OpenAI LLM A2A server.")
+    parser.add_argument("--async-mode", action="store_true", help="Serve with the asyncio-native server (async LLM calls) instead of Flask.")
+    parser.add_argument("--max-in-flight", type=int, default=256, help="Async mode: max concurrent LLM calls.")
+    parser.add_argument("--max-queue", type=int, default=1024, help="Async mode: tasks allowed to wait before returning 503.")
+    args = parser.parse_args()
+
     custom_llm_server = CustomLLMAgent() 
     
     if custom_llm_server.llm is None:
-        custom_llm_server.logger.critical("LLM (ChatOpenAI) failed to initialize. Server cannot function. Exiting.")
+        custom_llm_server.logger.critical("No LLM backend could be initialized. Server cannot function. Exiting.")
         return 
 
     print(f"Starting {custom_llm_server.name} server on port 5001... Press Ctrl+C to stop.")
-    run_server(custom_llm_server, port=5001) 
+    start_warm_up(custom_llm_server)  # /ready answers 503 until it finishes
+    if args.async_mode:
+        run_async_server(custom_llm_server, port=5001, max_in_flight=args.max_in_flight, max_queue=args.max_queue)
+    else:
+        run_server(custom_llm_server, port=5001) 
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
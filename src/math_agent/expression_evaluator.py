@@ -0,0 +1,298 @@
+import math
+import re
+from src.utils import ANGLE_PATTERN, parse_angle
+
+class TrigEvaluationError(ValueError):
+    """Raised when a query is not a plain trigonometric calculation we can evaluate locally."""
+
+class TrigUndefinedError(ArithmeticError):
+    """Raised when an expression is well formed but mathematically undefined (e.g. tan(90°))."""
+
+# Values this close to zero are treated as exact zeros (sin(π), cos(90°), ...)
+EPSILON = 1e-12
+
+def _sec(x):
+    return 1 / _nonzero(math.cos(x))
+
+def _csc(x):
+    return 1 / _nonzero(math.sin(x))
+
+def _cot(x):
+    return math.cos(x) / _nonzero(math.sin(x))
+
+def _tan(x):
+    return math.sin(x) / _nonzero(math.cos(x))
+
+def _asec(x):
+    return math.acos(1 / _nonzero(x))
+
+def _acsc(x):
+    return math.asin(1 / _nonzero(x))
+
+def _acot(x):
+    return math.atan2(1, x)
+
+def _nonzero(value):
+    if abs(value) < EPSILON:
+        raise TrigUndefinedError("division by zero")
+    return value
+
+FUNCTIONS = {
+    "sin": math.sin,
+    "cos": math.cos,
+    "tan": _tan,
+    "sec": _sec,
+    "csc": _csc,
+    "cot": _cot,
+    "asin": math.asin,
+    "acos": math.acos,
+    "atan": math.atan,
+    "asec": _asec,
+    "acsc": _acsc,
+    "acot": _acot,
+    "sqrt": math.sqrt,
+}
+
+INVERSE_FUNCTIONS = {"asin", "acos", "atan", "asec", "acsc", "acot"}
+ANGLE_FUNCTIONS = {"sin", "cos", "tan", "sec", "csc", "cot"}
+
+# Natural-language rewrites applied (in order) before tokenizing, e.g. "inverse sine of 0.5" -> "asin 0.5"
+_REWRITES = [
+    (r"\b(?:inverse|arc)\s*(sine|cosine|tangent|secant|cosecant|cotangent)\b", r"arc\1"),
+    (r"\barcsine\b", "asin"), (r"\barccosine\b", "acos"), (r"\barctangent\b", "atan"),
+    (r"\barcsecant\b", "asec"), (r"\barccosecant\b", "acsc"), (r"\barccotangent\b", "acot"),
+    (r"\bcosecant\b", "csc"), (r"\bcotangent\b", "cot"), (r"\bsecant\b", "sec"),
+    (r"\bsine\b", "sin"), (r"\bcosine\b", "cos"), (r"\btangent\b", "tan"),
+    (r"\barc(sin|cos|tan|sec|csc|cot)\b", r"a\1"),
+    (r"\b(sin|cos|tan|sec|csc|cot)\s*(?:\^\s*\(?\s*-1\s*\)?|⁻¹)", r"a\1"),
+    (r"\bcosec\b", "csc"),
+    (r"\bsquare root\b", "sqrt"),
+    (r"\bpi\b", "π"),
+    (r"²", "^2"),
+    (r"\*\*", "^"),
+    (r"×", "*"), (r"÷", "/"),
+    (r"\bof\b", " "),
+]
+
+# Leading filler that does not change the meaning of a calculation
+_FILLER = re.compile(
+    r"^(?:please\s+)?(?:(?:what\s+is|what's|whats|calculate|compute|evaluate|find|determine|give\s+me|tell\s+me)\s+)?"
+    r"(?:the\s+)?(?:(?:exact\s+|numerical\s+|numeric\s+)?value\s+(?:of\s+)?)?(?:the\s+)?"
+)
+
+_TOKEN = re.compile(r"\s*(?:(?P<number>[0-9]*\.?[0-9]+)|(?P<name>[a-z]+)|(?P<pi>π)|(?P<op>[-+*/^()°]))")
+
+def normalize_query(query: str) -> str:
+    """Rewrite a natural-language calculation into a compact expression string."""
+    text = query.strip().lower()
+    text = text.rstrip("?.! ")
+    text = _FILLER.sub("", text, count=1)
+    for pattern, replacement in _REWRITES:
+        text = re.sub(pattern, replacement, text)
+    return re.sub(r"\s+", " ", text).strip()
+
+def _tokenize(expression: str) -> tuple[list[tuple[str, object]], set[int]]:
+    """Tokens of an expression, and the positions of the number literals written without a unit."""
+    tokens, bare = [], set()
+    pos = 0
+    while expression[pos:].strip():
+        match = _TOKEN.match(expression, pos)
+        if not match:
+            raise TrigEvaluationError(f"Unexpected character {expression[pos:].strip()[0]!r}")
+        pos = match.end()
+        if match.group("number"):
+            # Reuse parse_angle so "30 degrees" / "2π" follow the same unit semantics as the rest of the agent
+            literal = ANGLE_PATTERN.match(expression, match.start("number"))
+            value, _ = parse_angle(literal.group(0))
+            if not literal.group(2):
+                bare.add(len(tokens))
+            tokens.append(("number", value))
+            pos = literal.end()
+        elif match.group("name"):
+            name = match.group("name")
+            if name in FUNCTIONS:
+                tokens.append(("func", name))
+            elif name in ("degree", "degrees", "deg"):
+                tokens.append(("unit", "deg"))
+            elif name in ("radian", "radians", "rad"):
+                tokens.append(("unit", "rad"))
+            else:
+                raise TrigEvaluationError(f"Unsupported word {name!r}")
+        elif match.group("pi"):
+            tokens.append(("number", math.pi))
+        else:
+            op = match.group("op")
+            tokens.append(("unit", "deg") if op == "°" else ("op", op))
+    return tokens, bare
+
+class _Parser:
+    """Recursive-descent parser/evaluator over the token list.
+
+    Grammar:
+        expr  := term (('+' | '-') term)*
+        term  := unary (('*' | '/') unary | <implicit multiplication>)*
+        unary := ('+' | '-') unary | power
+        power := atom ('^' unary)?
+        atom  := number unit? | func ('^' number)? arg | '(' expr ')' unit?
+        arg   := '(' expr ')' | power    (a bare argument may not be followed by '/')
+
+    A parenthesized argument ends the call, so sin(x)^2 is (sin x)^2. "sin π/6" could mean sin(π)/6 or
+    sin(π/6), and "sin(30)°" could mean sin(30°) or a unit on the result; both are declined rather than guessed.
+    An angle written without a unit or π is in radians; past 2π ("sin 30") it most likely meant degrees and is
+    declined too.
+    """
+
+    def __init__(self, tokens, bare: set[int] = frozenset()):
+        self.tokens = tokens
+        self.bare = bare  # positions of number literals written without a unit
+        self.pos = 0
+        self.uses_inverse = False
+        self.uses_bare_radians = False
+
+    def peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else (None, None)
+
+    def take(self):
+        token = self.peek()
+        self.pos += 1
+        return token
+
+    def expect(self, kind, value=None):
+        token = self.take()
+        if token[0] != kind or (value is not None and token[1] != value):
+            raise TrigEvaluationError(f"Expected {value or kind}, found {token[1]!r}")
+        return token
+
+    def parse(self) -> float:
+        if not self.tokens:
+            raise TrigEvaluationError("Empty expression")
+        value = self.expr()
+        if self.pos != len(self.tokens):
+            raise TrigEvaluationError(f"Unexpected token {self.peek()[1]!r}")
+        return value
+
+    def expr(self) -> float:
+        value = self.term()
+        while self.peek() in (("op", "+"), ("op", "-")):
+            op = self.take()[1]
+            rhs = self.term()
+            value = value + rhs if op == "+" else value - rhs
+        return value
+
+    def term(self) -> float:
+        value = self.unary()
+        while True:
+            kind, token = self.peek()
+            if (kind, token) in (("op", "*"), ("op", "/")):
+                self.take()
+                rhs = self.unary()
+                value = value * rhs if token == "*" else value / _nonzero(rhs)
+            elif kind in ("number", "func") or (kind, token) == ("op", "("):
+                value *= self.unary()
+            else:
+                return value
+
+    def unary(self) -> float:
+        if self.peek() in (("op", "+"), ("op", "-")):
+            sign = -1.0 if self.take()[1] == "-" else 1.0
+            return sign * self.unary()
+        return self.power()
+
+    def power(self) -> float:
+        value = self.atom()
+        if self.peek() == ("op", "^"):
+            self.take()
+            value = value ** self.unary()
+        return value
+
+    def atom(self) -> float:
+        kind, token = self.take()
+        if kind == "number":
+            return self.apply_unit(token)
+        if kind == "func":
+            exponent = None
+            if self.peek() == ("op", "^"):
+                self.take()
+                exponent = self.expect("number")[1]
+            start = self.pos
+            if self.peek() == ("op", "("):
+                self.take()
+                argument = self.expr()
+                self.expect("op", ")")
+                if self.peek()[0] == "unit":
+                    raise TrigEvaluationError(f"Unit after {token}(...): write the unit inside the parentheses")
+            else:
+                argument = self.power()
+                if self.peek() == ("op", "/"):
+                    raise TrigEvaluationError(f"Ambiguous argument of {token}: write {token}(a/b) or ({token} a)/b")
+            if token in ANGLE_FUNCTIONS and self.is_bare(start) and argument != 0:
+                if abs(argument) > 2 * math.pi:
+                    raise TrigEvaluationError(f"{token} {argument:g} has no unit: degrees or radians?")
+                self.uses_bare_radians = True
+            try:
+                result = FUNCTIONS[token](argument)
+            except ValueError:
+                raise TrigUndefinedError(f"{token} is undefined for {argument:g}")
+            if token in INVERSE_FUNCTIONS:
+                self.uses_inverse = True
+            return result ** exponent if exponent is not None else result
+        if (kind, token) == ("op", "("):
+            value = self.expr()
+            self.expect("op", ")")
+            return self.apply_unit(value)
+        raise TrigEvaluationError(f"Unexpected token {token!r}")
+
+    def is_bare(self, start: int) -> bool:
+        """Whether the tokens from start on hold numbers, all of them without a unit (π counts as one)."""
+        numbers, units = 0, 0
+        for position in range(start, self.pos):
+            kind = self.tokens[position][0]
+            if kind == "number" and position in self.bare:
+                numbers += 1
+            elif kind in ("number", "unit"):
+                units += 1
+        return numbers > 0 and units == 0
+
+    def apply_unit(self, value: float) -> float:
+        # Units on number literals are already applied by parse_angle; this handles "(30 + 15) degrees"
+        if self.peek()[0] != "unit":
+            return value
+        return math.radians(value) if self.take()[1] == "deg" else value
+
+def _format(value: float) -> str:
+    if abs(value) < EPSILON:
+        value = 0.0
+    rounded = round(value)
+    if abs(value - rounded) < 1e-9:
+        return str(int(rounded))
+    return f"{value:.10g}"
+
+def evaluate_expression(expression: str) -> tuple[float, bool, bool]:
+    """Evaluate a normalized expression. Returns (value, uses_inverse_function, has_unitless_angle)."""
+    tokens, bare = _tokenize(expression)
+    if not any(kind == "func" and name != "sqrt" for kind, name in tokens):
+        raise TrigEvaluationError("Not a trigonometric expression")
+    parser = _Parser(tokens, bare)
+    return parser.parse(), parser.uses_inverse, parser.uses_bare_radians
+
+def evaluate_trig_query(query: str) -> str | None:
+    """Answer a plain trigonometric calculation locally.
+
+    Returns the formatted answer, or None if the query is not something we can compute
+    (identities, explanations, ...) and should go to the LLM instead.
+    """
+    expression = normalize_query(query)
+    try:
+        value, uses_inverse, bare_radians = evaluate_expression(expression)
+    except TrigUndefinedError:
+        return f"{expression} is undefined."
+    except (TrigEvaluationError, OverflowError, ZeroDivisionError):
+        return None
+
+    if isinstance(value, complex) or math.isnan(value) or math.isinf(value):
+        return f"{expression} is undefined."
+    # Say so when an angle without a unit was read as radians
+    note = " (angles without a unit are in radians)" if bare_radians else ""
+    if uses_inverse:
+        return f"{expression} = {_format(value)} rad ({_format(math.degrees(value))}°){note}"
+    return f"{expression} = {_format(value)}{note}"
@@ -0,0 +1,283 @@
+import re
+from collections import defaultdict
+
+# Each entry: lookup keys (every term of at least one key must appear in the query) and its formulas, tagged with
+# the function they are about so "double angle formula for cosine" can show just the cosine line.
+IDENTITIES = [
+    {
+        "id": "pythagorean",
+        "title": "Pythagorean Identities",
+        "keys": [["pythagorean"]],
+        "formulas": [
+            ("sine", "sin²θ + cos²θ = 1"),
+            ("tangent", "1 + tan²θ = sec²θ"),
+            ("cotangent", "1 + cot²θ = csc²θ"),
+        ],
+    },
+    {
+        "id": "reciprocal",
+        "title": "Reciprocal Identities",
+        "keys": [["reciprocal"]],
+        "formulas": [
+            ("cosecant", "csc θ = 1 / sin θ"),
+            ("secant", "sec θ = 1 / cos θ"),
+            ("cotangent", "cot θ = 1 / tan θ"),
+        ],
+    },
+    {
+        "id": "quotient",
+        "title": "Quotient Identities",
+        "keys": [["quotient"], ["ratio", "identity"]],
+        "formulas": [
+            ("tangent", "tan θ = sin θ / cos θ"),
+            ("cotangent", "cot θ = cos θ / sin θ"),
+        ],
+    },
+    {
+        "id": "even_odd",
+        "title": "Even-Odd (Negative Angle) Identities",
+        "keys": [["even", "identity"], ["odd", "identity"], ["even", "function"], ["odd", "function"], ["negative", "angle"]],
+        "formulas": [
+            ("sine", "sin(−θ) = −sin θ"),
+            ("cosine", "cos(−θ) = cos θ"),
+            ("tangent", "tan(−θ) = −tan θ"),
+            ("cosecant", "csc(−θ) = −csc θ"),
+            ("secant", "sec(−θ) = sec θ"),
+            ("cotangent", "cot(−θ) = −cot θ"),
+        ],
+    },
+    {
+        "id": "cofunction",
+        "title": "Cofunction Identities",
+        "keys": [["cofunction"], ["complementary"]],
+        "formulas": [
+            ("sine", "sin(π/2 − θ) = cos θ"),
+            ("cosine", "cos(π/2 − θ) = sin θ"),
+            ("tangent", "tan(π/2 − θ) = cot θ"),
+            ("cotangent", "cot(π/2 − θ) = tan θ"),
+            ("secant", "sec(π/2 − θ) = csc θ"),
+            ("cosecant", "csc(π/2 − θ) = sec θ"),
+        ],
+    },
+    {
+        "id": "periodicity",
+        "title": "Periodicity Identities",
+        "keys": [["periodicity"], ["period", "identity"], ["period", "formula"]],
+        "formulas": [
+            ("sine", "sin(θ + 2π) = sin θ"),
+            ("cosine", "cos(θ + 2π) = cos θ"),
+            ("tangent", "tan(θ + π) = tan θ"),
+            ("cosecant", "csc(θ + 2π) = csc θ"),
+            ("secant", "sec(θ + 2π) = sec θ"),
+            ("cotangent", "cot(θ + π) = cot θ"),
+        ],
+    },
+    {
+        "id": "sum_difference",
+        "title": "Angle Sum and Difference Formulas",
+        "keys": [
+            ["sum", "angle"], ["sum", "formula"], ["sum", "identity"], ["difference", "angle"], ["difference", "formula"],
+            ["difference", "identity"], ["addition", "formula"], ["subtraction", "formula"], ["compound", "angle"],
+        ],
+        "formulas": [
+            ("sine", "sin(α ± β) = sin α cos β ± cos α sin β"),
+            ("cosine", "cos(α ± β) = cos α cos β ∓ sin α sin β"),
+            ("tangent", "tan(α ± β) = (tan α ± tan β) / (1 ∓ tan α tan β)"),
+        ],
+    },
+    {
+        "id": "double_angle",
+        "title": "Double Angle Formulas",
+        "keys": [["double", "angle"], ["double", "formula"], ["double", "identity"]],
+        "formulas": [
+            ("sine", "sin(2θ) = 2 sin θ cos θ"),
+            ("cosine", "cos(2θ) = cos²θ − sin²θ = 2cos²θ − 1 = 1 − 2sin²θ"),
+            ("tangent", "tan(2θ) = 2 tan θ / (1 − tan²θ)"),
+        ],
+    },
+    {
+        "id": "triple_angle",
+        "title": "Triple Angle Formulas",
+        "keys": [["triple", "angle"], ["triple", "formula"], ["triple", "identity"]],
+        "formulas": [
+            ("sine", "sin(3θ) = 3 sin θ − 4 sin³θ"),
+            ("cosine", "cos(3θ) = 4 cos³θ − 3 cos θ"),
+            ("tangent", "tan(3θ) = (3 tan θ − tan³θ) / (1 − 3 tan²θ)"),
+        ],
+    },
+    {
+        "id": "half_angle",
+        "title": "Half Angle Formulas (sign depends on the quadrant of θ/2)",
+        "keys": [["half", "angle"], ["half", "formula"], ["half", "identity"]],
+        "formulas": [
+            ("sine", "sin(θ/2) = ±√((1 − cos θ) / 2)"),
+            ("cosine", "cos(θ/2) = ±√((1 + cos θ) / 2)"),
+            ("tangent", "tan(θ/2) = ±√((1 − cos θ) / (1 + cos θ)) = sin θ / (1 + cos θ) = (1 − cos θ) / sin θ"),
+        ],
+    },
+    {
+        "id": "power_reducing",
+        "title": "Power-Reducing Formulas",
+        "keys": [["power", "reducing"], ["power", "reduction"]],
+        "formulas": [
+            ("sine", "sin²θ = (1 − cos 2θ) / 2"),
+            ("cosine", "cos²θ = (1 + cos 2θ) / 2"),
+            ("tangent", "tan²θ = (1 − cos 2θ) / (1 + cos 2θ)"),
+        ],
+    },
+    {
+        "id": "product_to_sum",
+        "title": "Product-to-Sum Formulas",
+        "keys": [["producttosum"]],
+        "formulas": [
+            ("sine", "sin α sin β = ½[cos(α − β) − cos(α + β)]"),
+            ("cosine", "cos α cos β = ½[cos(α − β) + cos(α + β)]"),
+            ("sine", "sin α cos β = ½[sin(α + β) + sin(α − β)]"),
+            ("cosine", "cos α sin β = ½[sin(α + β) − sin(α − β)]"),
+        ],
+    },
+    {
+        "id": "sum_to_product",
+        "title": "Sum-to-Product Formulas",
+        "keys": [["sumtoproduct"]],
+        "formulas": [
+            ("sine", "sin α + sin β = 2 sin((α + β)/2) cos((α − β)/2)"),
+            ("sine", "sin α − sin β = 2 cos((α + β)/2) sin((α − β)/2)"),
+            ("cosine", "cos α + cos β = 2 cos((α + β)/2) cos((α − β)/2)"),
+            ("cosine", "cos α − cos β = −2 sin((α + β)/2) sin((α − β)/2)"),
+        ],
+    },
+    {
+        "id": "law_of_sines",
+        "title": "Law of Sines (triangle with sides a, b, c opposite angles A, B, C; circumradius R)",
+        "keys": [["law", "sine"], ["rule", "sine"]],
+        "formulas": [
+            (None, "a / sin A = b / sin B = c / sin C = 2R"),
+        ],
+    },
+    {
+        "id": "law_of_cosines",
+        "title": "Law of Cosines (triangle with sides a, b, c opposite angles A, B, C)",
+        "keys": [["law", "cosine"], ["rule", "cosine"]],
+        "formulas": [
+            (None, "a² = b² + c² − 2bc cos A"),
+            (None, "b² = a² + c² − 2ac cos B"),
+            (None, "c² = a² + b² − 2ab cos C"),
+            (None, "cos C = (a² + b² − c²) / (2ab)"),
+        ],
+    },
+    {
+        "id": "law_of_tangents",
+        "title": "Law of Tangents (triangle with sides a, b opposite angles A, B)",
+        "keys": [["law", "tangent"], ["rule", "tangent"]],
+        "formulas": [
+            (None, "(a − b) / (a + b) = tan((A − B)/2) / tan((A + B)/2)"),
+        ],
+    },
+]
+
+# Named collections answered as a whole ("basic identities", "all trig formulas")
+GROUPS = {
+    "basic": ["pythagorean", "reciprocal", "quotient", "even_odd", "cofunction"],
+    "fundamental": ["pythagorean", "reciprocal", "quotient", "even_odd", "cofunction"],
+    "all": [entry["id"] for entry in IDENTITIES],
+}
+
+# The query has to ask for formulas, and not for an explanation, derivation or calculation (those stay with the LLM)
+_INTENT_TERMS = {"formula", "identity", "law", "rule", "list", "show", "give", "state", "what", "write"}
+_BLOCKING_TERMS = {
+    "explain", "explanation", "derive", "derivation", "prove", "proof", "why", "how", "solve", "calculate", "compute",
+    "evaluate", "example", "use", "apply", "verify", "simplify", "mean", "meaning", "between", "compare", "intuition",
+    "if", "given",
+}
+# So are queries with an equation or a numeric argument ("cos x = 0.5", "sin 30", "60 degrees"); a number glued to a
+# one-letter variable ("sin 2x") or an exponent ("tan^2") is part of a formula, not an argument
+_CALCULATION = re.compile(r"=|(?<![\w.^])\d+(?:\.\d+)?(?![\d.]|[a-zθα](?![a-z]))")
+
+# Token rewrites applied before indexing/lookup: plurals, short function names and angle notation
+_PHRASES = [
+    (r"sum of (?:the )?(?:interior )?angles", " anglesum "),
+    (r"product[\s-]*to[\s-]*sum", " producttosum "),
+    (r"sum[\s-]*to[\s-]*product", " sumtoproduct "),
+    (r"sin\s*(?:²|\^\s*2)\s*\(?\s*[a-zθα]?\s*\)?\s*\+\s*cos\s*(?:²|\^\s*2)", " pythagorean "),
+    (r"\b(sin|cos|tan|sec|csc|cot)\s*\(?\s*2\s*[θxaα]\b\)?", r" \1 double angle "),
+    (r"\b(sin|cos|tan|sec|csc|cot)\s*\(?\s*3\s*[θxaα]\b\)?", r" \1 triple angle "),
+    (r"\b(sin|cos|tan|sec|csc|cot)\s*\(?\s*[θxaα]\s*/\s*2\b\)?", r" \1 half angle "),
+    (r"\b(sin|cos|tan)\s*\(\s*[a-zα-ω]\s*[+±-]\s*[a-zα-ω]\s*\)", r" \1 sum angle "),
+    (r"\bco-function", "cofunction"),
+    (r"\bpower[\s-]+reduc", "power reduc"),
+]
+_TERM_NAMES = {
+    "sin": "sine", "sines": "sine", "cos": "cosine", "cosines": "cosine", "tan": "tangent", "tangents": "tangent",
+    "sec": "secant", "secants": "secant", "csc": "cosecant", "cosec": "cosecant", "cot": "cotangent",
+    "angles": "angle", "formulas": "formula", "formulae": "formula", "identities": "identity", "laws": "law",
+    "rules": "rule", "sums": "sum", "differences": "difference", "products": "product", "halves": "half",
+    "doubles": "double", "periodic": "periodicity", "reduction": "reduction", "reducing": "reducing",
+}
+_FUNCTION_TERMS = {"sine", "cosine", "tangent", "secant", "cosecant", "cotangent"}
+# Key phrases such as "angle sum", "pythagorean" or "reciprocal" also name non-trig things (the angle sum property of
+# a triangle, the Pythagorean theorem, the reciprocal of 5): a match also needs a function or an identity word
+_TRIG_CONTEXT_TERMS = _FUNCTION_TERMS | {"identity", "formula", "trigonometric", "trigonometry", "trig"}
+
+def _rewrite(text: str) -> str:
+    text = text.lower()
+    for pattern, replacement in _PHRASES:
+        text = re.sub(pattern, replacement, text)
+    return text
+
+def identity_terms(text: str) -> set[str]:
+    """Normalized lookup terms of a query (also used to build the index from the catalog keys)."""
+    return {_TERM_NAMES.get(word, word) for word in re.findall(r"[a-z]+", _rewrite(text))}
+
+class IdentityIndex:
+    """In-memory inverted index from key terms to catalog entries."""
+
+    def __init__(self, entries: list[dict] = IDENTITIES, groups: dict[str, list[str]] = GROUPS):
+        self.entries = {entry["id"]: entry for entry in entries}
+        self.groups = groups
+        self._order = {entry["id"]: position for position, entry in enumerate(entries)}
+        self._postings = defaultdict(set)  # term -> ids of entries with a key containing it
+        for entry in entries:
+            for key in entry["keys"]:
+                for term in key:
+                    self._postings[term].add(entry["id"])
+
+    def match(self, query: str) -> list[str]:
+        """Ids of the entries a formula request asks for, most specific key first; [] if it is not one."""
+        terms = identity_terms(query)
+        if _CALCULATION.search(_rewrite(query)):
+            return []
+        if terms & _BLOCKING_TERMS or not terms & _INTENT_TERMS or not terms & _TRIG_CONTEXT_TERMS:
+            return []
+
+        best, best_size = [], 0
+        candidates = set().union(*(self._postings.get(term, ()) for term in terms))
+        for entry_id in sorted(candidates, key=self._order.get):
+            size = max((len(key) for key in self.entries[entry_id]["keys"] if terms.issuperset(key)), default=0)
+            if size > best_size:
+                best, best_size = [entry_id], size
+            elif size and size == best_size:
+                best.append(entry_id)
+        if best:
+            return best
+
+        if terms & {"identity", "formula"}:
+            for group, entry_ids in self.groups.items():
+                if group in terms:
+                    return list(entry_ids)
+        return []
+
+    def lookup(self, query: str) -> str | None:
+        """The formatted formulas for a formula request, or None when the query should go elsewhere."""
+        entry_ids = self.match(query)
+        if not entry_ids:
+            return None
+        functions = identity_terms(query) & _FUNCTION_TERMS
+        sections = []
+        for entry_id in entry_ids:
+            entry = self.entries[entry_id]
+            formulas = [formula for function, formula in entry["formulas"] if function in functions]
+            # Only narrow to the asked-for function when the entry has formulas for it (laws are untagged)
+            lines = formulas or [formula for _, formula in entry["formulas"]]
+            sections.append(f"{entry['title']}:\n" + "\n".join(f"• {line}" for line in lines))
+        return "\n\n".join(sections)
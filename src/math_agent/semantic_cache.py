@@ -0,0 +1,176 @@
+"""Answers to earlier LLM queries, found again for paraphrases of the same question.
+
+Queries are embedded locally as hashed word and character n-gram vectors (no model or network needed) and
+compared by cosine similarity. Two queries can only match when they ask about the same functions, numbers,
+units and key terms (their signature), so "sin 30" never gets the answer to "sin 60", nor the law of
+sines the answer to the law of cosines; the similarity threshold then decides how loose a paraphrase may be.
+"""
+import math
+import os
+import re
+import threading
+import zlib
+from collections import Counter, OrderedDict
+from src.metrics import MetricsRegistry
+from src.utils import normalize_prompt
+
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.75"))
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "2048"))  # 0 turns the cache off
+EMBEDDING_DIMENSIONS = 4096
+
+# Spellings that mean the same thing, folded before embedding
+_SYNONYMS = {
+    "sine": "sin", "sines": "sin", "cosine": "cos", "cosines": "cos", "tangent": "tan", "tangents": "tan",
+    "secant": "sec", "cosecant": "csc", "cosec": "csc", "cotangent": "cot",
+    "arcsin": "asin", "arccos": "acos", "arctan": "atan",
+    "degree": "deg", "degrees": "deg", "°": "deg", "radian": "rad", "radians": "rad", "pi": "π",
+    "identities": "identity", "formulas": "formula", "formulae": "formula", "laws": "law", "rules": "rule",
+    "angles": "angle", "triangles": "triangle", "functions": "function", "values": "value", "graphs": "graph",
+    "twice": "double", "halved": "half", "thrice": "triple",
+    "derive": "prove", "derivation": "prove", "proof": "prove", "examples": "example", "invent": "invented",
+    "different": "difference", "differ": "difference",
+    "increase": "increasing", "increases": "increasing", "decrease": "decreasing", "decreases": "decreasing",
+    "max": "maximum", "maxima": "maximum", "min": "minimum", "minima": "minimum",
+    # number words are numbers, so they take part in the exact number match
+    "zero": "0", "one": "1", "two": "2", "three": "3", "four": "4", "five": "5", "six": "6", "ten": "10",
+}
+_INVERSE = re.compile(r"\binverse\s+(sine|cosine|tangent|sin|cos|tan)\b")
+_STOPWORDS = {
+    "a", "an", "the", "of", "for", "to", "in", "on", "and", "or", "is", "are", "be", "it", "its", "this", "that",
+    "what", "whats", "which", "how", "do", "does", "can", "could", "would", "you", "your", "me", "my", "i", "we",
+    "please", "tell", "explain", "describe", "define", "definition", "mean", "meaning", "about", "give", "show",
+    "let", "us", "know", "want", "need", "help", "understand", "briefly", "simply", "exactly",
+    "simple", "plain", "terms", "words", "am", "was", "were",
+}
+_FUNCTIONS = {"sin", "cos", "tan", "sec", "csc", "cot", "asin", "acos", "atan"}
+# Words that change which answer is right even when everything else matches
+_KEY_TERMS = {
+    "double", "half", "triple", "sum", "difference", "product", "reciprocal", "pythagorean", "quotient",
+    "cofunction", "even", "odd", "periodic", "period", "amplitude", "phase", "derivative", "integral", "graph",
+    "domain", "range", "inverse", "hyperbolic", "law", "unit", "circle", "right", "triangle", "not",
+    # what is being asked about the topic
+    "prove", "example", "history", "invented", "use", "convert", "area", "compare", "vs", "versus",
+    # direction and position: "increasing" and "decreasing" questions share every other word
+    "increasing", "decreasing", "positive", "negative", "maximum", "minimum", "greater", "less", "above", "below",
+    "first", "second", "third", "fourth", "quadrant",
+}
+# A minus sign belongs to the number unless it follows a word or a closing parenthesis ("sin x - 1")
+_NUMBER_TOKEN = r"(?:(?<![\w)])-)?\d+(?:\.\d+)?"
+_NUMBER = re.compile(r"-?\d+(?:\.\d+)?|π")
+
+def query_terms(query: str) -> list[str]:
+    """Content words of a query, lower-cased, with synonyms folded and filler words dropped."""
+    text = _INVERSE.sub(lambda m: "a" + _SYNONYMS.get(m.group(1), m.group(1)), normalize_prompt(query))
+    text = text.replace("'", "").replace("−", "-")
+    words = re.findall(rf"{_NUMBER_TOKEN}|[a-zπ°θ]+", text)
+    return [word for word in (_SYNONYMS.get(w, w) for w in words) if word not in _STOPWORDS]
+
+def angle_unit(terms: list[str]) -> str:
+    """deg, rad or none ("deg,rad" when a query names both, as conversions do). The agent reads bare numbers as
+    radians, but "sin 30" and "sin 30°" are different questions, so none never matches deg or rad."""
+    return ",".join(unit for unit in ("deg", "rad") if unit in terms) or "none"
+
+def signature(terms: list[str]) -> tuple:
+    """What two queries must share exactly to be served the same answer: functions, numbers (in order), angle unit,
+    key terms."""
+    return (
+        frozenset(t for t in terms if t in _FUNCTIONS),
+        tuple(t for t in terms if _NUMBER.fullmatch(t)),
+        angle_unit(terms),
+        frozenset(t for t in terms if t in _KEY_TERMS),
+    )
+
+def embed(terms: list[str], dimensions: int = EMBEDDING_DIMENSIONS) -> dict[int, float]:
+    """L2-normalized sparse vector of hashed word unigrams, word bigrams and character 3-grams."""
+    features = Counter()
+    for word in terms:
+        features[f"w:{word}"] += 1.0
+        padded = f"#{word}#"
+        for i in range(len(padded) - 2):
+            features[f"c:{padded[i:i + 3]}"] += 0.5
+    for first, second in zip(terms, terms[1:]):
+        features[f"b:{first} {second}"] += 1.0
+
+    vector = Counter()
+    for feature, weight in features.items():
+        vector[zlib.crc32(feature.encode("utf-8")) % dimensions] += weight
+    norm = math.sqrt(sum(w * w for w in vector.values()))
+    return {bucket: w / norm for bucket, w in vector.items()} if norm else {}
+
+def cosine(a: dict[int, float], b: dict[int, float]) -> float:
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(w * b.get(bucket, 0.0) for bucket, w in a.items())
+
+class SemanticCache:
+    """Bounded in-memory vector index from query embeddings to answers.
+
+    Entries are grouped by signature, so a lookup only scores the few entries that could be a valid match.
+    At most max_entries answers are kept; the least recently used is evicted first.
+    """
+
+    def __init__(self, threshold: float = SEMANTIC_CACHE_THRESHOLD, max_entries: int = SEMANTIC_CACHE_MAX_ENTRIES,
+                 metrics: MetricsRegistry = None):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # normalized query -> (signature, vector, answer), least recently used first
+        self._by_signature = {}  # signature -> normalized queries
+        self._lock = threading.Lock()
+        metrics = metrics or MetricsRegistry()
+        self.hits = metrics.counter("trig_semantic_cache_hits_total", "LLM queries answered from the semantic cache.")
+        self.misses = metrics.counter("trig_semantic_cache_misses_total", "LLM queries with no similar enough cached answer.")
+        self.evictions = metrics.counter("trig_semantic_cache_evictions_total", "Answers evicted from the semantic cache.")
+        self.size = metrics.gauge("trig_semantic_cache_entries", "Answers held by the semantic cache.")
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def lookup(self, query: str) -> tuple[str | None, float, str | None]:
+        """(answer, similarity, cached query) of the closest entry with the same signature; answer is None below threshold."""
+        terms = query_terms(query)
+        vector, key = embed(terms), signature(terms)
+        best, best_score = None, 0.0
+        with self._lock:
+            for cached in self._by_signature.get(key, ()):
+                score = cosine(vector, self._entries[cached][1])
+                if score > best_score:
+                    best, best_score = cached, score
+            if best is None or best_score < self.threshold:
+                return None, best_score, best
+            self._entries.move_to_end(best)
+            return self._entries[best][2], best_score, best
+
+    def get(self, query: str) -> str | None:
+        if not self.enabled:
+            return None
+        answer, _, _ = self.lookup(query)
+        (self.misses if answer is None else self.hits).inc()
+        return answer
+
+    def put(self, query: str, answer: str):
+        if not self.enabled:
+            return
+        normalized = normalize_prompt(query)
+        terms = query_terms(query)
+        key = signature(terms)
+        with self._lock:
+            self._remove(normalized)
+            self._entries[normalized] = (key, embed(terms), answer)
+            self._by_signature.setdefault(key, set()).add(normalized)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions.inc()
+            self.size.set(len(self._entries))
+
+    def _remove(self, normalized: str):
+        # Caller holds self._lock
+        entry = self._entries.pop(normalized, None)
+        if entry is not None:
+            queries = self._by_signature[entry[0]]
+            queries.discard(normalized)
+            if not queries:
+                del self._by_signature[entry[0]]
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,254 @@
+import importlib.util
+import math
+import os
+import re
+from collections.abc import Iterator
+from dataclasses import dataclass
+from flask import Response, jsonify, request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+from src.utils import ANGLE_PATTERN, parse_angle
+from src.math_agent.expression_evaluator import EPSILON
+
+# Optional extra (pip install "a2a-trigonometry-agent[tables]"); imported when the first table is built, not at startup
+HAS_NUMPY = importlib.util.find_spec("numpy") is not None
+
+# Rows allowed in a task artifact, in a streamed table, and rows computed per chunk when streaming
+TABLE_MAX_ROWS = int(os.getenv("TABLE_MAX_ROWS", "100000"))
+TABLE_MAX_STREAM_ROWS = int(os.getenv("TABLE_MAX_STREAM_ROWS", "100000000"))
+TABLE_CHUNK_ROWS = int(os.getenv("TABLE_CHUNK_ROWS", "65536"))
+
+TABLE_FUNCTIONS = ("sin", "cos", "tan", "sec", "csc", "cot")
+DEFAULT_TABLE_FUNCTIONS = ["sin", "cos", "tan"]
+
+class TrigTableError(ValueError):
+    """Raised when a query asks for a table we cannot build (zero step, too many rows, ...)."""
+
+_FUNCTION_WORDS = re.compile(r"\b(sine|sin|cosine|cosecant|cosec|cos|csc|tangent|tan|secant|sec|cotangent|cot)s?\b")
+_FUNCTION_NAMES = {
+    "sine": "sin", "cosine": "cos", "tangent": "tan", "secant": "sec",
+    "cosecant": "csc", "cosec": "csc", "cotangent": "cot",
+}
+
+# One angle: "15", "15°", "0.5 rad", "2π", "π/12", "3π/4"
+_VALUE = r"(?:[-+]?[0-9]*\.?[0-9]+\s*)?π(?:\s*/\s*[0-9]*\.?[0-9]+)?|[-+]?[0-9]*\.?[0-9]+(?:\s*(?:degrees?|deg|°|radians?|rad)\b|°)?"
+_STEP = re.compile(rf"\b(?:in\s+steps?\s+of|steps?(?:\s+size)?|increments?\s+of|intervals?\s+of|every)\s+(?:of\s+)?(?P<step>{_VALUE}|degree|radian)")
+_RANGE = re.compile(rf"(?P<start>{_VALUE})\s*(?:to|through|–|—|-|\.\.)\s*(?P<stop>{_VALUE})")
+_LIST = re.compile(rf"\bangles?\s*(?:of|:|=)?\s*\[?(?P<list>(?:{_VALUE})(?:\s*(?:,|and)\s*(?:{_VALUE}))+)\]?")
+# A range or list alone ("sin 30 - 5", "is sin increasing from 0 to 90?") is not enough; the query has to ask
+# for a table in so many words
+_TABLE_WORDS = re.compile(r"\b(?:tables?|tabulate[ds]?|list|values|every|each|steps?|increments?|intervals?|angles)\b")
+# Questions about a function over a range ("why is sin periodic from 0 to 2π", "the range of sin from ...") want an
+# explanation, unless they name a table outright
+_CONCEPT_QUESTION = re.compile(r"^\s*(?:explain|why|is|are|does|do|how|prove|describe)\b|\brange\s+of\b")
+# A bound read only in part ("1e9" as 1, "0x10" as 0) must not silently shrink the table
+_GLUED = re.compile(r"\.?[0-9a-z_]")
+
+@dataclass
+class TableSpec:
+    """Which functions to tabulate over which angles, in the unit of the table's angle column."""
+
+    functions: list[str]
+    degrees: bool
+    start: float = 0.0
+    step: float = 1.0
+    rows: int = 0
+    angles: list[float] = None  # explicit angles instead of a range
+
+    @property
+    def columns(self) -> list[str]:
+        return ["degrees" if self.degrees else "radians", *self.functions]
+
+def _to_table_unit(token: str, degrees: bool) -> float:
+    """Convert one angle token to the table's unit. Bare numbers are already in the table's unit."""
+    token = token.strip()
+    if token in ("degree", "radian"):
+        value, is_degree = 1.0, token == "degree"
+    elif "π" in token:
+        coefficient, _, divisor = token.partition("/")
+        coefficient = coefficient.replace("π", "").strip()
+        radians = float(coefficient + "1" if coefficient in ("", "+", "-") else coefficient) * math.pi
+        value, is_degree = radians / float(divisor or 1), False
+    else:
+        match = ANGLE_PATTERN.match(token)
+        value, unit = float(match.group(1)), match.group(2)
+        if not unit:
+            return value
+        is_degree = unit.startswith("deg") or unit == "°"
+        if is_degree != degrees:
+            # Explicit unit that differs from the table's: same conversion as everywhere else in the agent
+            radians, _ = parse_angle(token)
+            return math.degrees(radians) if degrees else radians
+    if is_degree == degrees:
+        return value
+    return math.degrees(value) if degrees else math.radians(value)
+
+def parse_table_query(query: str) -> TableSpec | None:
+    """Recognize requests like 'sin and cos for every degree 0–360' or 'tan from 0 to π/2 in steps of π/12'.
+
+    Returns None when the query is not a table request. Bare numbers are read as degrees if the query mentions
+    degrees and as radians otherwise, matching parse_angle.
+    """
+    text = re.sub(r"\bpi\b", "π", query.lower())
+    if not _TABLE_WORDS.search(text):
+        return None
+    if _CONCEPT_QUESTION.search(text) and not re.search(r"\btab(?:les?|ulate[ds]?)\b", text):
+        return None
+
+    functions = list(dict.fromkeys(_FUNCTION_NAMES.get(name, name) for name in _FUNCTION_WORDS.findall(text)))
+    if not functions:
+        if not re.search(r"\btables?\b", text):
+            return None
+        functions = list(DEFAULT_TABLE_FUNCTIONS)
+    degrees = bool(re.search(r"degree|\bdeg\b|°", text))
+
+    step = None
+    step_match = _STEP.search(text)
+    if step_match:
+        _check_bound(text, step_match, "step")
+        step = _to_table_unit(step_match.group("step"), degrees)
+        text = text[:step_match.start()] + " " + text[step_match.end():]
+
+    list_match = _LIST.search(text)
+    if list_match:
+        _check_bound(text, list_match, "list")
+        angles = [_to_table_unit(token, degrees) for token in re.split(r"\s*(?:,|\band\b)\s*", list_match.group("list"))]
+        return build_table_spec(functions, degrees, angles=angles)
+
+    range_match = _RANGE.search(text)
+    if not range_match:
+        return None
+    _check_bound(text, range_match, "start")
+    _check_bound(text, range_match, "stop")
+    start = _to_table_unit(range_match.group("start"), degrees)
+    stop = _to_table_unit(range_match.group("stop"), degrees)
+    return build_table_spec(functions, degrees, start=start, stop=stop, step=step)
+
+def _check_bound(text: str, match: re.Match, group: str):
+    """Raise if the number matched as group runs on into characters the angle syntax cannot read."""
+    start, end = match.span(group)
+    if _GLUED.match(text, end) or (start and re.match(r"[0-9a-z_.]", text[start - 1])):
+        token = re.search(r"\S*$", text[:start]).group(0) + re.match(r"\S*", text[start:]).group(0)
+        raise TrigTableError(f"Cannot read the table bound '{token}'; use plain numbers, degrees or multiples of π.")
+
+def build_table_spec(functions: list[str], degrees: bool, start: float = None, stop: float = None,
+                     step: float = None, angles: list[float] = None) -> TableSpec:
+    """Validate a table given either explicit angles or an inclusive start/stop range (step defaults to one degree)."""
+    unknown = [function for function in functions if function not in TABLE_FUNCTIONS]
+    if not functions or unknown:
+        raise TrigTableError(f"Table functions must be chosen from {', '.join(TABLE_FUNCTIONS)}.")
+    if angles is not None:
+        rows = len(angles)
+    else:
+        if start is None or stop is None:
+            raise TrigTableError("A table needs either a list of angles or a start and stop angle.")
+        if step is None:
+            step = 1.0 if degrees else math.pi / 180
+        if step == 0:
+            raise TrigTableError("Table step must not be zero.")
+        step = math.copysign(step, stop - start)
+        rows = int(math.floor((stop - start) / step + 1e-9)) + 1
+    if rows > TABLE_MAX_STREAM_ROWS:
+        raise TrigTableError(f"Table would have {rows:,} rows; the limit is {TABLE_MAX_STREAM_ROWS:,}.")
+    return TableSpec(functions=list(functions), degrees=degrees, start=start or 0.0, step=step or 1.0, rows=rows, angles=angles)
+
+def _evaluate(function: str, sin, cos):
+    if function in ("sin", "cos"):
+        return sin if function == "sin" else cos
+    numerator, denominator = {"tan": (sin, cos), "cot": (cos, sin), "sec": (1.0, cos), "csc": (1.0, sin)}[function]
+    import numpy as np
+    # Undefined points (tan 90°, cot 0, ...) become NaN rather than huge rounding artefacts
+    denominator = np.where(denominator == 0.0, np.nan, denominator)
+    return numerator / denominator
+
+def iter_table(spec: TableSpec, chunk_rows: int = TABLE_CHUNK_ROWS) -> Iterator:
+    """Yield the table as 2-D float64 arrays of at most chunk_rows rows (angle column first), so memory stays bounded."""
+    if not HAS_NUMPY:
+        raise TrigTableError("Trigonometric tables need NumPy: install the 'tables' extra.")
+    import numpy as np
+    for first in range(0, spec.rows, chunk_rows):
+        count = min(chunk_rows, spec.rows - first)
+        if spec.angles is not None:
+            angles = np.asarray(spec.angles[first:first + count], dtype=np.float64)
+        else:
+            # start + i * step (rather than accumulating) keeps long ranges free of drift
+            angles = spec.start + spec.step * np.arange(first, first + count, dtype=np.float64)
+        radians = np.radians(angles) if spec.degrees else angles
+        # sin and cos once per block; every other function is derived from them. Values this close to zero are
+        # exact zeros (sin 180°, cos 90°, ...), as in the scalar evaluator
+        sin, cos = np.sin(radians), np.cos(radians)
+        sin[np.abs(sin) < EPSILON] = 0.0
+        cos[np.abs(cos) < EPSILON] = 0.0
+        block = np.empty((count, len(spec.functions) + 1))
+        block[:, 0] = angles
+        for column, function in enumerate(spec.functions, start=1):
+            block[:, column] = _evaluate(function, sin, cos)
+        yield block
+
+def table_to_csv(block, columns: list[str] = None) -> str:
+    """Format one block as CSV (with a header row when columns are given); NaN marks undefined values."""
+    row_format = ",".join(["%.10g"] * block.shape[1]) + "\n"
+    body = (row_format * block.shape[0]) % tuple(block.ravel().tolist())
+    return (",".join(columns) + "\n" + body) if columns else body
+
+def iter_table_csv(spec: TableSpec, chunk_rows: int = TABLE_CHUNK_ROWS) -> Iterator[str]:
+    for index, block in enumerate(iter_table(spec, chunk_rows)):
+        yield table_to_csv(block, spec.columns if index == 0 else None)
+
+def iter_table_binary(spec: TableSpec, chunk_rows: int = TABLE_CHUNK_ROWS) -> Iterator[bytes]:
+    """Raw little-endian float64 rows (angle, then one value per function) — 8 bytes per cell, no parsing needed."""
+    for block in iter_table(spec, chunk_rows):
+        yield block.astype("<f8", copy=False).tobytes()
+
+def parse_table_request(data) -> TableSpec:
+    """Build the spec for a POST /tables body: {"query": "..."} or {"functions", "unit", "start", "stop", "step"|"angles"}."""
+    if not isinstance(data, dict):
+        raise TrigTableError("Table request body must be a JSON object.")
+    if "query" in data:
+        spec = parse_table_query(str(data["query"]))
+        if spec is None:
+            raise TrigTableError("Query does not describe a table, e.g. 'sin and cos for every degree 0–360'.")
+        return spec
+
+    unit = data.get("unit", "degrees")
+    if unit not in ("degrees", "radians"):
+        raise TrigTableError("Table unit must be 'degrees' or 'radians'.")
+    as_float = lambda value: None if value is None else float(value)
+    try:
+        functions = list(data.get("functions", DEFAULT_TABLE_FUNCTIONS))
+        start, stop, step = as_float(data.get("start")), as_float(data.get("stop")), as_float(data.get("step"))
+        angles = None if data.get("angles") is None else [float(angle) for angle in data["angles"]]
+    except (TypeError, ValueError) as e:
+        raise TrigTableError(f"Invalid table request: {e}") from e
+    return build_table_spec(functions, unit == "degrees", start=start, stop=stop, step=step, angles=angles)
+
+def table_stream(spec: TableSpec, fmt: str = "csv") -> tuple[Iterator, str, dict]:
+    """(chunks, media type, headers) for serving a table as CSV text or raw float64 rows."""
+    headers = {"X-Table-Columns": ",".join(spec.columns), "X-Table-Rows": str(spec.rows)}
+    if fmt == "csv":
+        return iter_table_csv(spec), "text/csv", headers
+    if fmt == "binary":
+        return iter_table_binary(spec), "application/octet-stream", {**headers, "X-Table-Dtype": "<f8"}
+    raise TrigTableError("Table format must be 'csv' or 'binary'.")
+
+def register_table_route(app, handle):
+    """Serve POST /tables?format=csv|binary on a Flask app; handle(data, fmt) returns table_stream's tuple."""
+    def table_view():
+        try:
+            chunks, media_type, headers = handle(request.get_json(silent=True), request.args.get("format", "csv"))
+        except TrigTableError as e:
+            return jsonify({"error": str(e)}), 400
+        return Response(chunks, mimetype=media_type, headers=headers)
+
+    app.add_url_rule("/tables", "tables", table_view, methods=["POST"])
+
+def table_async_route(handle):
+    """Starlette counterpart of register_table_route; chunks are produced in the threadpool, off the event loop."""
+    async def table_endpoint(request):
+        try:
+            chunks, media_type, headers = handle(await request.json(), request.query_params.get("format", "csv"))
+        except TrigTableError as e:
+            return JSONResponse({"error": str(e)}, status_code=400)
+        return StreamingResponse(chunks, media_type=media_type, headers=headers)
+
+    return Route("/tables", table_endpoint, methods=["POST"])
@@ -1,7 +1,26 @@
-from python_a2a import A2AServer, skill, agent, run_server, TaskStatus, TaskState, A2AClient
-from src.utils import setup_logging, parse_task_message
-import logging 
+from python_a2a import A2AServer, skill, agent, run_server, Task, TaskStatus, TaskState
+from src.utils import setup_logging, setup_console_logging, parse_task_message, CODING_KEYWORDS
+from src.metrics import MetricsRegistry, register_metrics_route
+from src.readiness import register_readiness_route, start_warm_up
+from src.async_server import run_async_server
+from src.batch import register_batch_route
+from src.streaming import register_stream_route, timed_stream
+from src.tracing import Tracer, register_tracing
+from src.task_store import create_task_store, register_task_routes
+from src.admission import PRIORITY_LLM, PRIORITY_LOCAL, register_admission_control
+from src.resilience import DEGRADED_HEADER, ResilientLLMClient, CircuitOpenError
+from src.prompts import trig_prompt
+from src.math_agent.expression_evaluator import evaluate_trig_query
+from src.math_agent.identity_catalog import IdentityIndex
+from src.math_agent.semantic_cache import SemanticCache
+from src.math_agent.trig_table import (
+    HAS_NUMPY, TABLE_MAX_ROWS, TrigTableError, iter_table_csv, parse_table_query, parse_table_request,
+    register_table_route, table_async_route, table_stream,
+)
+import argparse
+import asyncio
 import httpx
+import time
 
 @agent(
     name="Trigonometry Agent",
@@ -12,12 +31,20 @@ class TrigonometryAgent(A2AServer):
     def __init__(self):
         super().__init__()
         self.logger = setup_logging(self.__class__.__name__)
-        try:
-            self.llm_client = A2AClient("http://localhost:5001")
-            self.logger.info("A2AClient for LLM initialized successfully in TrigonometryAgent.")
-        except Exception as e:
-            self.logger.error(f"Failed to initialize A2AClient for LLM in TrigonometryAgent: {e}", exc_info=True)
-            self.llm_client = None
+        self.metrics = MetricsRegistry()
+        self.tracer = Tracer(self.metrics, self.__class__.__name__)
+        self.tasks = create_task_store(metrics=self.metrics)  # replaces A2AServer's per-process dict
+        self.llm_http = ResilientLLMClient(self.metrics)
+        self.fast_path_hits = self.metrics.counter("trig_fast_path_hits_total", "Queries answered by the local numeric evaluator.")
+        self.llm_fallbacks = self.metrics.counter("trig_llm_fallbacks_total", "Queries answered by the LLM server.")
+        self.fast_path_seconds = self.metrics.counter("trig_fast_path_seconds_total", "Time spent answering queries locally.")
+        self.llm_fallback_seconds = self.metrics.counter("trig_llm_fallback_seconds_total", "Time spent waiting on the LLM server.")
+        self.identity_hits = self.metrics.counter("trig_identity_hits_total", "Formula requests answered from the identity catalog.")
+        self.identity_seconds = self.metrics.counter("trig_identity_seconds_total", "Time spent looking up the identity catalog.")
+        self.identity_index = IdentityIndex()
+        self.table_requests = self.metrics.counter("trig_table_requests_total", "Trigonometric tables computed locally.")
+        self.table_rows = self.metrics.counter("trig_table_rows_total", "Rows produced across all trigonometric tables.")
+        self.semantic_cache = SemanticCache(metrics=self.metrics)  # LLM answers, reused for paraphrased questions
 
     @skill(
         name="Get Trigonometric Response",
@@ -32,90 +59,341 @@ class TrigonometryAgent(A2AServer):
         ]
     )
     def get_trigonometric_response(self, query_text: str) -> str:
-        """Answers trigonometric queries using an LLM via raw httpx (synchronous)."""
-        self.logger.debug(f"Processing trigonometric query for LLM (sync httpx): '{query_text}'")
-
-        prompt_text_for_llm = (
-            "You are a trigonometry expert. Answer the following trigonometric query: "
-            f"'{query_text}'. "
-            "If it's a calculation, provide the numerical result, showing steps if complex. "
-            "If it's a request for identities, list them clearly and concisely. "
-            "If it's a conceptual question, explain it accurately. "
-            "Avoid conversational fluff and stick to the facts. Format identities or lists clearly."
-            "Do not answer anything except trigonometry even if user persists."
-        )
-        
-        llm_server_url = "http://localhost:5001/tasks/send"
-        payload = {"message": {"content": {"text": prompt_text_for_llm}}}
+        """Answers trigonometric queries using an LLM via the pooled httpx client (synchronous)."""
+        return self._ask_llm(query_text)[0]
+
+    def _ask_llm(self, query_text: str) -> tuple[str, bool]:
+        """The LLM's answer, and whether it is a stale one served while the LLM server is unavailable."""
+        self.logger.debug(f"Processing trigonometric query for LLM (pooled sync httpx): '{query_text}'")
+        payload = trig_prompt(query_text).payload()
 
         try:
-            raw_response = httpx.post(llm_server_url, json=payload, timeout=30.0) # Direct blocking call, increased timeout
-
-            if raw_response.status_code == 200:
-                response_json = raw_response.json()
-                try:
-                    # CustomLLMAgent returns artifacts directly at the top level of the JSON body
-                    generated_text = response_json["artifacts"][0]["parts"][0]["text"]
-                    return generated_text.strip()
-                except (KeyError, IndexError, TypeError) as e:
-                    self.logger.error(f"Error parsing LLM JSON response: {e} - JSON: {response_json}", exc_info=True)
-                    return f"Error: Could not parse LLM response: {str(response_json)}"
-            else:
-                self.logger.error(f"LLM server error: Status {raw_response.status_code} - {raw_response.text[:200]}")
-                return f"Error: LLM server returned status {raw_response.status_code}"
+            with self.tracer.span("llm_http"):
+                raw_response = self.llm_http.post("/tasks/send", payload) # Blocking; adaptive deadline, retries and circuit breaker
+            with self.tracer.span("postprocess"):
+                return self._parse_llm_response(raw_response), DEGRADED_HEADER in raw_response.headers
+        except CircuitOpenError as e:
+            self.logger.warning(f"Not calling the LLM: {e}")
+            return f"Error: LLM server is unavailable: {e}", False
         except httpx.TimeoutException as e: # More specific exception
             self.logger.error(f"Timeout during httpx call to LLM: {e}", exc_info=True)
-            return f"Error: Timeout communicating with LLM: {str(e)}"
+            return f"Error: Timeout communicating with LLM: {str(e)}", False
         except Exception as e:
             self.logger.error(f"Error during httpx call to LLM: {e}", exc_info=True)
-            return f"Error: Could not communicate with LLM: {str(e)}"
+            return f"Error: Could not communicate with LLM: {str(e)}", False
+
+    @skill(
+        name="Get Trigonometric Table",
+        description="Tabulates sin, cos, tan, sec, csc and cot over an angle range or list of angles in degrees or radians, computed locally in one vectorized pass and returned as CSV.",
+        tags=["trigonometry", "table", "range", "every degree", "angles", "values", "csv", "bulk"],
+        examples=[
+            "sin and cos for every degree 0–360",
+            "table of tan from 0 to π/2 in steps of π/12",
+            "sine and cosine for angles 0, 30, 45, 60 and 90 degrees",
+            "trig table from 0 to 90 degrees every 15 degrees"
+        ]
+    )
+    def get_trigonometric_table(self, query_text: str) -> str | None:
+        """Returns the requested table as CSV, or None if the query is not a table request (or NumPy is missing)."""
+        if not HAS_NUMPY:
+            self.logger.debug("NumPy not installed; table requests go to the LLM.")
+            return None
+        spec = parse_table_query(query_text)
+        if spec is None:
+            return None
+        if spec.rows > TABLE_MAX_ROWS:
+            raise TrigTableError(
+                f"Table would have {spec.rows:,} rows; tables above {TABLE_MAX_ROWS:,} rows are only served in chunks on /stream or /tables."
+            )
+        self._count_table(spec)
+        return "".join(iter_table_csv(spec))
+
+    @skill(
+        name="Look Up Trigonometric Identities",
+        description="Lists standard trigonometric identities and formulas (Pythagorean, reciprocal, sum and difference, double, triple and half angle, power-reducing, product-to-sum, law of sines/cosines/tangents) from a built-in catalog.",
+        tags=["trigonometry", "identity", "identities", "formula", "formulas", "list", "law of sines", "law of cosines"],
+        examples=[
+            "list all double angle formulas",
+            "show me angle sum formulas",
+            "What are the Pythagorean identities?",
+            "What is the law of cosines?",
+            "List the product-to-sum formulas"
+        ]
+    )
+    def get_trigonometric_identities(self, query_text: str) -> str | None:
+        """Returns the formulas a query asks for from the identity catalog, or None if it asks for something else."""
+        start = time.perf_counter()
+        result = self.identity_index.lookup(query_text)
+        if result is not None:
+            self.identity_seconds.inc(time.perf_counter() - start)
+            self.identity_hits.inc()
+            self.logger.info(f"Answered query from the identity catalog: '{query_text}'")
+        return result
+
+    def task_priority(self, text: str) -> int:
+        """Admission priority: queries answered locally (microseconds) go ahead of ones that need the LLM."""
+        lowered = text.lower()
+        if any(k in lowered for k in CODING_KEYWORDS) or evaluate_trig_query(text) is not None:
+            return PRIORITY_LOCAL
+        try:
+            if HAS_NUMPY and parse_table_query(text) is not None:
+                return PRIORITY_LOCAL
+        except TrigTableError:
+            return PRIORITY_LOCAL  # rejected locally, without the LLM
+        if self.identity_index.lookup(text) is not None:
+            return PRIORITY_LOCAL
+        if self.semantic_cache.enabled and self.semantic_cache.lookup(text)[0] is not None:
+            return PRIORITY_LOCAL
+        return PRIORITY_LLM
+
+    def warm_up(self):
+        """Compile the evaluator, catalog and table parsers (and import NumPy) before serving; called by src/readiness.py."""
+        evaluate_trig_query("sin 30 degrees")
+        self.identity_index.lookup("list the double angle formulas")
+        if HAS_NUMPY:
+            "".join(iter_table_csv(parse_table_query("sin and cos for every degree 0-10")))
+
+    def table_response(self, data, fmt: str):
+        """Handler behind POST /tables: the table as chunked CSV or binary, however many rows it has."""
+        if not HAS_NUMPY:
+            raise TrigTableError("Trigonometric tables need NumPy: install the 'tables' extra.")
+        spec = parse_table_request(data)
+        self._count_table(spec)
+        return table_stream(spec, fmt)
+
+    def _count_table(self, spec):
+        self.table_requests.inc()
+        self.table_rows.inc(spec.rows)
+        self.logger.info(f"Computing trigonometric table locally: {spec.rows} rows of {', '.join(spec.functions)}")
+
+    async def get_trigonometric_response_async(self, query_text: str) -> str:
+        """Async counterpart of get_trigonometric_response, used by the asyncio serving mode."""
+        return (await self._ask_llm_async(query_text))[0]
+
+    async def _ask_llm_async(self, query_text: str) -> tuple[str, bool]:
+        """Async counterpart of _ask_llm."""
+        self.logger.debug(f"Processing trigonometric query for LLM (pooled async httpx): '{query_text}'")
+        payload = trig_prompt(query_text).payload()
+
+        try:
+            with self.tracer.span("llm_http"):
+                raw_response = await self.llm_http.apost("/tasks/send", payload)
+            with self.tracer.span("postprocess"):
+                return self._parse_llm_response(raw_response), DEGRADED_HEADER in raw_response.headers
+        except CircuitOpenError as e:
+            self.logger.warning(f"Not calling the LLM: {e}")
+            return f"Error: LLM server is unavailable: {e}", False
+        except httpx.TimeoutException as e:
+            self.logger.error(f"Timeout during async httpx call to LLM: {e}", exc_info=True)
+            return f"Error: Timeout communicating with LLM: {str(e)}", False
+        except Exception as e:
+            self.logger.error(f"Error during async httpx call to LLM: {e}", exc_info=True)
+            return f"Error: Could not communicate with LLM: {str(e)}", False
+
+    def _parse_llm_response(self, raw_response: httpx.Response) -> str:
+        if raw_response.status_code != 200:
+            self.logger.error(f"LLM server error: Status {raw_response.status_code} - {raw_response.text[:200]}")
+            return f"Error: LLM server returned status {raw_response.status_code}"
+
+        response_json = raw_response.json()
+        try:
+            # CustomLLMAgent returns artifacts directly at the top level of the JSON body
+            generated_text = response_json["artifacts"][0]["parts"][0]["text"]
+            return generated_text.strip()
+        except (KeyError, IndexError, TypeError) as e:
+            self.logger.error(f"Error parsing LLM JSON response: {e} - JSON: {response_json}", exc_info=True)
+            return f"Error: Could not parse LLM response: {str(response_json)}"
+
+    def setup_routes(self, app):
+        super().setup_routes(app)
+        register_metrics_route(app, self.metrics)
+        register_readiness_route(app, self)
+        register_task_routes(app, self)
+        register_tracing(app, self.tracer)
+        admission = register_admission_control(app, self)
+        register_stream_route(app, self)
+        register_batch_route(app, self, admission=admission)
+        register_table_route(app, self.table_response)
+
+    def async_routes(self):
+        return [table_async_route(self.table_response)]
 
     def handle_task(self, task):
         text = parse_task_message(task)
         self.logger.info(f"TrigonometryAgent received task (sync handle_task): '{text}'")
+        with self.tracer.span("local"):
+            if self._handle_without_llm(task, text):
+                return task
+        with self.tracer.span("cache_lookup"):
+            if self._answer_from_cache(task, text):
+                return task
 
-        if not self.llm_client:
-            self.logger.error("LLM client not available in handle_task of TrigonometryAgent.")
+        try:
+            start = time.perf_counter()
+            result, stale = self._ask_llm(text)
+            self.llm_fallback_seconds.inc(time.perf_counter() - start)
+            with self.tracer.span("postprocess"):
+                self._complete_task(task, text, result, stale)
+        except Exception as e:
+            self.logger.error(f"Error in TrigonometryAgent handle_task for query '{text}': {e}", exc_info=True)
             task.status = TaskStatus(
                 state=TaskState.FAILED,
-                message={"role": "agent", "content": {"text": "LLM client is not initialized. Cannot process trigonometry task."}}
+                message={"role": "agent", "content": {"text": f"An unexpected error occurred in TrigonometryAgent handle_task: {str(e)}"}}
             )
-            return task
-            
+        
+        return task
+
+    async def handle_task_async(self, task):
+        text = parse_task_message(task)
+        self.logger.info(f"TrigonometryAgent received task (async handle_task): '{text}'")
+        with self.tracer.span("local"):
+            if self._handle_without_llm(task, text):
+                return task
+        with self.tracer.span("cache_lookup"):
+            if self._answer_from_cache(task, text):
+                return task
+
+        try:
+            start = time.perf_counter()
+            result, stale = await self._ask_llm_async(text)
+            self.llm_fallback_seconds.inc(time.perf_counter() - start)
+            with self.tracer.span("postprocess"):
+                self._complete_task(task, text, result, stale)
+        except Exception as e:
+            self.logger.error(f"Error in TrigonometryAgent handle_task_async for query '{text}': {e}", exc_info=True)
+            task.status = TaskStatus(
+                state=TaskState.FAILED,
+                message={"role": "agent", "content": {"text": f"An unexpected error occurred in TrigonometryAgent handle_task_async: {str(e)}"}}
+            )
+
+        return task
+
+    async def stream_response(self, message):
+        """Stream the answer chunk by chunk (served on /stream as SSE); local answers arrive as a single chunk."""
+        text = message.content.text if hasattr(message.content, "text") else str(message.content)
+        self.logger.info(f"TrigonometryAgent received streaming request: '{text}'")
+        async for chunk in timed_stream(self._stream_chunks(text), self.metrics, "trig"):
+            yield chunk
+
+    async def _stream_chunks(self, text: str):
+        if HAS_NUMPY and not any(k in text.lower() for k in CODING_KEYWORDS):
+            spec = parse_table_query(text)
+            if spec is not None:
+                # Tables of any size stream in bounded chunks, each formatted off the event loop
+                self._count_table(spec)
+                chunks = iter_table_csv(spec)
+                while (chunk := await asyncio.to_thread(next, chunks, None)) is not None:
+                    yield chunk
+                return
+
+        task = Task(message={"role": "user", "content": {"type": "text", "text": text}})
+        with self.tracer.span("local"):
+            handled = self._handle_without_llm(task, text)
+        if handled:
+            if task.status.state == TaskState.COMPLETED:
+                yield task.artifacts[0]["parts"][0]["text"]
+                return
+            raise RuntimeError(task.status.message["content"]["text"])
+
+        with self.tracer.span("cache_lookup"):
+            cached = self.semantic_cache.get(text)
+        if cached is not None:
+            yield cached
+            return
+
+        chunks, prompt = [], trig_prompt(text)
+        async for chunk in self.llm_http.stream_text("/stream", prompt.text, prompt.metadata()):
+            chunks.append(chunk)
+            yield chunk
+        # Only reached when the stream finished without error
+        self.llm_fallbacks.inc()
+        self.semantic_cache.put(text, "".join(chunks))
+
+    def _handle_without_llm(self, task, text: str) -> bool:
+        """Finish the task locally when no LLM call is needed. Returns True if the task was completed or rejected."""
         # Reject code generation requests explicitly, though router should prevent this
-        if any(k in text.lower() for k in ["code", "python", "generate", "script", "program"]):
+        if any(k in text.lower() for k in CODING_KEYWORDS):
              self.logger.warning(f"TrigonometryAgent received a query that seems to ask for code: '{text}'. This agent does not generate code.")
              task.status = TaskStatus(
                 state=TaskState.FAILED,
                 message={"role": "agent", "content": {"text": "This agent provides trigonometric calculations and identity information, not code. Please route coding requests to the 'coding' agent."}}
             )
-             return task
+             return True
 
+        # Tables over angle ranges are computed locally with NumPy
         try:
-            result = self.get_trigonometric_response(text)
-            
-            if result is None or "Error:" in result:
-                self.logger.error(f"Trigonometric response generation failed or returned an error for query '{text}': {result}")
-                task.status = TaskStatus(
-                    state=TaskState.FAILED,
-                    message={"role": "agent", "content": {"text": result or "Trigonometric response generation failed."}}
-                )
-            else:
-                self.logger.info(f"Successfully generated trigonometric response for query: '{text}'")
-                task.artifacts = [{"parts": [{"type": "text", "text": result}]}]
-                task.status = TaskStatus(state=TaskState.COMPLETED)
-                
-        except Exception as e:
-            self.logger.error(f"Error in TrigonometryAgent handle_task for query '{text}': {e}", exc_info=True)
+            table = self.get_trigonometric_table(text)
+        except TrigTableError as e:
+            self.logger.warning(f"Cannot build trigonometric table for '{text}': {e}")
             task.status = TaskStatus(
                 state=TaskState.FAILED,
-                message={"role": "agent", "content": {"text": f"An unexpected error occurred in TrigonometryAgent handle_task: {str(e)}"}}
+                message={"role": "agent", "content": {"text": str(e)}}
             )
-        
-        return task
+            return True
+        if table is not None:
+            task.artifacts = [{"parts": [{"type": "text", "text": table}]}]
+            task.status = TaskStatus(state=TaskState.COMPLETED)
+            return True
+
+        # Plain calculations are answered locally; identities and explanations go to the LLM
+        start = time.perf_counter()
+        fast_result = evaluate_trig_query(text)
+        if fast_result is not None:
+            self.fast_path_seconds.inc(time.perf_counter() - start)
+            self.fast_path_hits.inc()
+            self.logger.info(f"Answered query locally (fast path): '{text}' -> '{fast_result}'")
+            task.artifacts = [{"parts": [{"type": "text", "text": fast_result}]}]
+            task.status = TaskStatus(state=TaskState.COMPLETED)
+            return True
+
+        # Requests for standard identities/formulas are served from the bundled catalog
+        identities = self.get_trigonometric_identities(text)
+        if identities is not None:
+            task.artifacts = [{"parts": [{"type": "text", "text": identities}]}]
+            task.status = TaskStatus(state=TaskState.COMPLETED)
+            return True
+
+        return False
+
+    def _answer_from_cache(self, task, text: str) -> bool:
+        """Complete the task with the cached answer to the same question, possibly phrased differently."""
+        cached = self.semantic_cache.get(text)
+        if cached is None:
+            return False
+        self.logger.info(f"Answered query from the semantic cache: '{text}'")
+        task.artifacts = [{"parts": [{"type": "text", "text": cached}]}]
+        task.status = TaskStatus(state=TaskState.COMPLETED)
+        return True
+
+    def _complete_task(self, task, text: str, result: str, stale: bool = False):
+        if result is None or "Error:" in result:
+            self.logger.error(f"Trigonometric response generation failed or returned an error for query '{text}': {result}")
+            task.status = TaskStatus(
+                state=TaskState.FAILED,
+                message={"role": "agent", "content": {"text": result or "Trigonometric response generation failed."}}
+            )
+        else:
+            self.logger.info(f"Successfully generated trigonometric response for query: '{text}'")
+            task.artifacts = [{"parts": [{"type": "text", "text": result}]}]
+            task.status = TaskStatus(state=TaskState.COMPLETED)
+            self.llm_fallbacks.inc()
+            # A stale answer served while the LLM server is down must not outlive the outage in the cache
+            if not stale:
+                self.semantic_cache.put(text, result)
 
 if __name__ == "__main__":
-    logging.basicConfig(level=logging.DEBUG) 
+    parser = argparse.ArgumentParser(description="Run the TrigonometryAgent A2A server.")
+    parser.add_argument("--async-mode", action="store_true", help="Serve with the asyncio-native server instead of Flask.")
+    parser.add_argument("--debug", action="store_true", help="Flask debug mode (reloader, debugger). For production use src/launcher.py.")
+    parser.add_argument("--max-in-flight", type=int, default=256, help="Async mode: max concurrent tasks.")
+    parser.add_argument("--max-queue", type=int, default=1024, help="Async mode: tasks allowed to wait before returning 503.")
+    args = parser.parse_args()
+
+    setup_console_logging()
     agent = TrigonometryAgent()
     agent.logger.info("Starting TrigonometryAgent server on port 8001...") 
-    run_server(agent, port=8001, debug=True)
\ No newline at end of file
+    start_warm_up(agent)  # /ready answers 503 until it finishes
+    if args.async_mode:
+        run_async_server(agent, port=8001, max_in_flight=args.max_in_flight, max_queue=args.max_queue)
+    else:
+        run_server(agent, port=8001, debug=args.debug)
\ No newline at end of file
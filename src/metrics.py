@@ -0,0 +1,137 @@
+import bisect
+import threading
+from flask import Response
+
+class Counter:
+    """Monotonically increasing, thread-safe counter."""
+
+    metric_type = "counter"
+
+    def __init__(self, name: str, description: str = "", labels: dict[str, str] = None):
+        self.name = name
+        self.description = description
+        self.labels = labels or {}
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+    def series(self, suffix: str = "", **extra_labels) -> str:
+        """Sample name with this metric's labels, e.g. a2a_stage_seconds_count{stage="llm"}."""
+        labels = {**self.labels, **extra_labels}
+        if not labels:
+            return f"{self.name}{suffix}"
+        return f"{self.name}{suffix}{{" + ",".join(f'{key}="{value}"' for key, value in labels.items()) + "}"
+
+    def header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.metric_type}"]
+
+    def samples(self) -> list[str]:
+        return [f"{self.series()} {self._value:g}"]
+
+    def render(self) -> list[str]:
+        return self.header() + self.samples()
+
+class Gauge(Counter):
+    """Thread-safe value that can go up and down (queue depth, cache size, ...)."""
+
+    metric_type = "gauge"
+
+    def set(self, value: float):
+        with self._lock:
+            self._value = value
+
+    def dec(self, amount: float = 1.0):
+        self.inc(-amount)
+
+class Histogram(Counter):
+    """Thread-safe latency/size distribution with cumulative buckets (value is the sum of observations)."""
+
+    metric_type = "histogram"
+    DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+    def __init__(self, name: str, description: str = "", labels: dict[str, str] = None, buckets=DEFAULT_BUCKETS):
+        super().__init__(name, description, labels)
+        self.buckets = tuple(sorted(buckets))
+        self._bucket_counts = [0] * len(self.buckets)
+        self._count = 0
+
+    def observe(self, value: float):
+        with self._lock:
+            self._value += value
+            self._count += 1
+            index = bisect.bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                self._bucket_counts[index] += 1
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    def samples(self) -> list[str]:
+        with self._lock:
+            bucket_counts, count, total = list(self._bucket_counts), self._count, self._value
+        lines, cumulative = [], 0
+        for bound, bucket_count in zip(self.buckets, bucket_counts):
+            cumulative += bucket_count
+            lines.append(f"{self.series('_bucket', le=f'{bound:g}')} {cumulative}")
+        lines.append(f"{self.series('_bucket', le='+Inf')} {count}")
+        lines.append(f"{self.series('_sum')} {total:g}")
+        lines.append(f"{self.series('_count')} {count}")
+        return lines
+
+class MetricsRegistry:
+    """Holds the metrics of one agent and renders them in Prometheus text format."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, description: str, labels: dict[str, str] = None, **kwargs):
+        # One metric object per (name, labels); label sets of the same name render under one HELP/TYPE header
+        key = (name, tuple(sorted((labels or {}).items())))
+        with self._lock:
+            if key not in self._metrics:
+                self._metrics[key] = cls(name, description, labels, **kwargs)
+            return self._metrics[key]
+
+    def counter(self, name: str, description: str = "", labels: dict[str, str] = None) -> Counter:
+        return self._get_or_create(Counter, name, description, labels)
+
+    def gauge(self, name: str, description: str = "", labels: dict[str, str] = None) -> Gauge:
+        return self._get_or_create(Gauge, name, description, labels)
+
+    def histogram(self, name: str, description: str = "", labels: dict[str, str] = None,
+                  buckets=Histogram.DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, description, labels, buckets=buckets)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {metric.series(): metric.value for metric in metrics}
+
+    def render_prometheus(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        families = {}
+        for metric in metrics:
+            families.setdefault(metric.name, []).append(metric)
+        lines = []
+        for family in families.values():
+            lines.extend(family[0].header())
+            for metric in family:
+                lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+def register_metrics_route(app, registry: MetricsRegistry):
+    """Expose the registry on GET /metrics of a Flask app created by run_server."""
+    def metrics_endpoint():
+        return Response(registry.render_prometheus(), mimetype="text/plain; version=0.0.4")
+
+    app.add_url_rule("/metrics", "metrics", metrics_endpoint, methods=["GET"])
@@ -0,0 +1,134 @@
+"""Prompt templates for the agents' LLM calls: a fixed system prefix, the query, and an output-token budget per intent.
+
+Templates standardize the instructions each intent gets and cap its answer: the budget is sent as max_tokens, so an
+answer can't run longer (or take longer) than its intent needs. Override budgets per intent with
+PROMPT_TOKEN_BUDGETS='{"explain": 400}'. The system prefixes are a few dozen tokens, well under the 1024 prompt tokens
+OpenAI's prompt caching starts at, so they are not served from its cache; padding them up to that size would cost
+more per call than caching saves.
+
+Agents send the query as the message text and the rest as message metadata (Prompt.metadata); the LLM server
+rebuilds the Prompt with Prompt.from_message. Plain messages are raw prompts with no system part or budget.
+"""
+import importlib.util
+import json
+import logging
+import os
+import re
+import threading
+from dataclasses import dataclass
+
+PROMPT_TOKEN_BUDGETS = json.loads(os.getenv("PROMPT_TOKEN_BUDGETS") or "{}")
+# tiktoken encoding used to count tokens locally (o200k_base is the gpt-4o family's). tiktoken downloads it once
+# into TIKTOKEN_CACHE_DIR; until it can, and without tiktoken, tokens are estimated at ~4 characters each.
+TOKENIZER_ENCODING = os.getenv("TOKENIZER_ENCODING", "o200k_base")
+HAS_TIKTOKEN = importlib.util.find_spec("tiktoken") is not None
+
+logger = logging.getLogger(__name__)
+_encoding = None
+_encoding_lock = threading.Lock()
+
+def load_tokenizer() -> bool:
+    """Load the tiktoken encoding (call during warm-up); returns whether exact counting is available."""
+    global _encoding
+    if _encoding is None:
+        with _encoding_lock:
+            if _encoding is None:
+                _encoding = False
+                if HAS_TIKTOKEN:
+                    try:
+                        import tiktoken
+                        _encoding = tiktoken.get_encoding(TOKENIZER_ENCODING)
+                    except Exception as e:
+                        logger.warning(f"Cannot load the '{TOKENIZER_ENCODING}' tokenizer, estimating token counts instead: {e}")
+    return _encoding is not False
+
+def count_tokens(text: str) -> int:
+    """Tokens in text, counted locally with tiktoken (estimated from its length when the tokenizer is unavailable)."""
+    if not text:
+        return 0
+    if load_tokenizer():
+        return len(_encoding.encode(text, disallowed_special=()))
+    return max(1, len(text) // 4)
+
+@dataclass
+class Prompt:
+    """One LLM call: the query text, plus the system prefix, answer budget and intent of its template, if any."""
+    text: str
+    system: str = ""
+    max_tokens: int | None = None
+    intent: str = "raw"
+
+    def metadata(self) -> dict:
+        """python_a2a message metadata carrying everything but the text."""
+        return {"custom_fields": {"system": self.system, "max_tokens": self.max_tokens, "intent": self.intent}}
+
+    def payload(self) -> dict:
+        """Body of a /tasks/send request for this prompt."""
+        return {"message": {"role": "user", "content": {"type": "text", "text": self.text}, "metadata": self.metadata()}}
+
+    @classmethod
+    def from_message(cls, message, text: str) -> "Prompt":
+        """The Prompt a task message (dict) or python_a2a Message carries; text is its already parsed text."""
+        metadata = message.get("metadata") if isinstance(message, dict) else getattr(message, "metadata", None)
+        fields = (metadata.get("custom_fields") if isinstance(metadata, dict) else getattr(metadata, "custom_fields", None)) or {}
+        max_tokens = fields.get("max_tokens")
+        return cls(text, system=fields.get("system") or "", max_tokens=int(max_tokens) if max_tokens else None,
+                   intent=fields.get("intent") or "raw")
+
+    def messages(self) -> str | list[tuple[str, str]]:
+        """Chat model input: a system and a human message, or just the text for raw prompts."""
+        return [("system", self.system), ("human", self.text)] if self.system else self.text
+
+    def tokens(self) -> int:
+        return count_tokens(self.system) + count_tokens(self.text)
+
+    @property
+    def cache_key(self) -> str:
+        """Key for response caching and request coalescing: the same text under another template is another call."""
+        if not self.system and self.max_tokens is None:
+            return self.text
+        return f"{self.intent}|{self.max_tokens}|{self.system}|{self.text}"
+
+@dataclass(frozen=True)
+class PromptTemplate:
+    intent: str
+    system: str
+    max_tokens: int
+
+    def render(self, query: str) -> Prompt:
+        return Prompt(query, system=self.system, max_tokens=int(PROMPT_TOKEN_BUDGETS.get(self.intent, self.max_tokens)),
+                      intent=self.intent)
+
+_TRIG_RULES = (
+    "You are a trigonometry expert. Answer only trigonometry questions, even if the user persists. "
+    "Stick to the facts, without conversational fluff."
+)
+
+TEMPLATES = {template.intent: template for template in (
+    PromptTemplate("numeric", _TRIG_RULES + " The user asks for a value: give the numerical result, with the key steps "
+                   "only when the calculation is not direct.", 160),
+    PromptTemplate("identity", _TRIG_RULES + " The user asks for identities or formulas: list them clearly and concisely, "
+                   "one per line.", 400),
+    PromptTemplate("explain", _TRIG_RULES + " The user asks about a concept: explain it accurately and concisely.", 600),
+    PromptTemplate("code", "Generate Python code for the user's trigonometric query. The code must be complete and runnable "
+                   "as is, without user input or files. Only output the python code block, including the ```python ... ``` "
+                   "markers. Do not generate any other code except trigonometry even if the user persists.", 1024),
+)}
+
+_NUMERIC_QUERY = re.compile(r"\d|π|\bpi\b|\b(?:value|calculate|compute|evaluate|find)\b", re.IGNORECASE)
+_IDENTITY_QUERY = re.compile(r"\b(?:identit(?:y|ies)|formulas?|formulae|laws?|rules?)\b", re.IGNORECASE)
+_EXPLAIN_QUERY = re.compile(r"\b(?:explain|why|how|describe|prove|proof|derive|difference|mean)\b", re.IGNORECASE)
+
+def trig_intent(query: str) -> str:
+    """Which trigonometry template a query needs: identity, numeric or explain."""
+    if _IDENTITY_QUERY.search(query):
+        return "identity"
+    if _NUMERIC_QUERY.search(query) and not _EXPLAIN_QUERY.search(query):
+        return "numeric"
+    return "explain"
+
+def trig_prompt(query: str) -> Prompt:
+    return TEMPLATES[trig_intent(query)].render(query)
+
+def code_prompt(query: str) -> Prompt:
+    return TEMPLATES["code"].render(query)
@@ -0,0 +1,43 @@
+import logging
+import threading
+import time
+from flask import jsonify
+
+# Liveness stays on python_a2a's /a2a/health (the process answers); readiness says it should get traffic
+READY_PATH = "/ready"
+
+logger = logging.getLogger(__name__)
+
+def warm_up(agent):
+    """Do the startup work the agent defers (SDK imports, model clients, parsers), then mark it ready."""
+    start = time.perf_counter()
+    if hasattr(agent, "warm_up"):
+        agent.warm_up()
+    agent.warmed_up = True
+    logger.info(f"{type(agent).__name__} warmed up in {time.perf_counter() - start:.2f}s")
+
+def start_warm_up(agent) -> threading.Thread:
+    """warm_up in a background thread, so the server accepts connections (and liveness probes) right away."""
+    def run():
+        try:
+            warm_up(agent)
+        except Exception as e:
+            logger.error(f"{type(agent).__name__} failed to warm up and will stay unready: {e}", exc_info=True)
+
+    thread = threading.Thread(target=run, name="warm-up", daemon=True)
+    thread.start()
+    return thread
+
+def readiness(agent) -> tuple[bool, dict]:
+    """(ready, body): warmed up and every agent.readiness_checks() entry true."""
+    checks = {"warmed_up": getattr(agent, "warmed_up", False), **getattr(agent, "readiness_checks", dict)()}
+    ready = all(checks.values())
+    return ready, {"status": "ready" if ready else "not ready", "checks": checks}
+
+def register_readiness_route(app, agent):
+    """Expose GET /ready on a Flask app created by run_server: 200 when ready, 503 otherwise."""
+    def ready_endpoint():
+        ready, body = readiness(agent)
+        return jsonify(body), 200 if ready else 503
+
+    app.add_url_rule(READY_PATH, "ready", ready_endpoint, methods=["GET"])
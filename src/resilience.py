@@ -0,0 +1,257 @@
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+from collections import OrderedDict, deque
+import httpx
+from src.http_client import HTTP_CONNECT_TIMEOUT, LLM_SERVER_URL, get_async_http_client, get_http_client
+from src.metrics import MetricsRegistry
+from src.streaming import StreamError, stream_sse_text
+
+logger = logging.getLogger(__name__)
+
+# Per-attempt deadline: LLM_TIMEOUT_MULTIPLIER x the recent LLM_TIMEOUT_PERCENTILE latency, clamped to [MIN, MAX].
+# Until LLM_TIMEOUT_MIN_SAMPLES calls have succeeded the deadline is LLM_TIMEOUT_MAX.
+LLM_TIMEOUT_MIN = float(os.getenv("LLM_TIMEOUT_MIN", "5.0"))
+LLM_TIMEOUT_MAX = float(os.getenv("LLM_TIMEOUT_MAX", "30.0"))
+LLM_TIMEOUT_PERCENTILE = float(os.getenv("LLM_TIMEOUT_PERCENTILE", "99"))
+LLM_TIMEOUT_MULTIPLIER = float(os.getenv("LLM_TIMEOUT_MULTIPLIER", "2.0"))
+LLM_TIMEOUT_MIN_SAMPLES = int(os.getenv("LLM_TIMEOUT_MIN_SAMPLES", "20"))
+# Attempts per call (first try included); backoff is "full jitter" between 0 and base * 2^n, capped
+LLM_RETRY_ATTEMPTS = int(os.getenv("LLM_RETRY_ATTEMPTS", "3"))
+LLM_RETRY_BASE_DELAY = float(os.getenv("LLM_RETRY_BASE_DELAY", "0.2"))
+LLM_RETRY_MAX_DELAY = float(os.getenv("LLM_RETRY_MAX_DELAY", "2.0"))
+# Total time one call may take across all attempts and backoff
+LLM_CALL_BUDGET = float(os.getenv("LLM_CALL_BUDGET", str(LLM_TIMEOUT_MAX)))
+# Consecutive failures that open the circuit, and how long it stays open before a probe is let through
+LLM_CIRCUIT_FAILURES = int(os.getenv("LLM_CIRCUIT_FAILURES", "5"))
+LLM_CIRCUIT_RESET_SECONDS = float(os.getenv("LLM_CIRCUIT_RESET_SECONDS", "15.0"))
+# Last good answers kept per prompt, served (marked stale) when the LLM server can't be reached
+LLM_STALE_CACHE_SIZE = int(os.getenv("LLM_STALE_CACHE_SIZE", "256"))
+
+RETRYABLE_STATUS = {429, 502, 503, 504}
+DEGRADED_HEADER = "X-A2A-Degraded"
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling the LLM server while the circuit breaker is open."""
+
+class LatencyTracker:
+    """Rolling window of successful call latencies, used to derive the per-attempt deadline."""
+
+    def __init__(self, window: int = 200):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def deadline(self) -> float:
+        with self._lock:
+            samples = sorted(self._samples)
+        if len(samples) < LLM_TIMEOUT_MIN_SAMPLES:
+            return LLM_TIMEOUT_MAX
+        index = min(len(samples) - 1, int(len(samples) * LLM_TIMEOUT_PERCENTILE / 100))
+        return min(LLM_TIMEOUT_MAX, max(LLM_TIMEOUT_MIN, samples[index] * LLM_TIMEOUT_MULTIPLIER))
+
+class CircuitBreaker:
+    """Closed -> open after N consecutive failures; after reset_seconds one probe call decides (half-open)."""
+
+    CLOSED, HALF_OPEN, OPEN = 0, 1, 2
+    STATE_NAMES = {CLOSED: "closed", HALF_OPEN: "half-open", OPEN: "open"}
+
+    def __init__(self, metrics: MetricsRegistry, failure_threshold: int = LLM_CIRCUIT_FAILURES,
+                 reset_seconds: float = LLM_CIRCUIT_RESET_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+        self.state_gauge = metrics.gauge("llm_client_circuit_state", "Circuit breaker to the LLM server: 0 closed, 1 half-open, 2 open.")
+        self.opened = metrics.counter("llm_client_circuit_opened_total", "Times the circuit breaker to the LLM server opened.")
+        self.rejected = metrics.counter("llm_client_circuit_rejected_total", "Calls failed fast because the circuit was open.")
+
+    def _set_state(self, state: int):
+        # Caller holds self._lock
+        if state != self.state:
+            logger.warning(f"LLM circuit breaker {self.STATE_NAMES[self.state]} -> {self.STATE_NAMES[state]}")
+        self.state = state
+        self.state_gauge.set(state)
+
+    def allow(self) -> bool:
+        """Whether a call may go out now. In half-open state only one probe is let through at a time."""
+        with self._lock:
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_seconds:
+                self._set_state(self.HALF_OPEN)
+            if self.state == self.CLOSED or (self.state == self.HALF_OPEN and not self._probe_in_flight):
+                self._probe_in_flight = self.state == self.HALF_OPEN
+                return True
+            self.rejected.inc()
+            return False
+
+    def release(self):
+        """Give up a call allowed by allow() without an outcome (e.g. it was cancelled), so a new probe can go out."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._probe_in_flight = False
+            self._set_state(self.CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._probe_in_flight = False
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.opened.inc()
+                self._opened_at = time.monotonic()
+                self._set_state(self.OPEN)
+
+def backoff_delay(attempt: int, retry_after: float = 0.0) -> float:
+    """Full-jitter exponential backoff for retry number attempt (0-based), never shorter than a server's Retry-After."""
+    return max(retry_after, random.uniform(0, min(LLM_RETRY_MAX_DELAY, LLM_RETRY_BASE_DELAY * 2 ** attempt)))
+
+def _retry_after(response: httpx.Response) -> float:
+    try:
+        return min(LLM_RETRY_MAX_DELAY, float(response.headers.get("Retry-After", 0)))
+    except ValueError:
+        return 0.0
+
+class ResilientLLMClient:
+    """Agent -> LLM server calls with adaptive deadlines, jittered retries, a circuit breaker and stale fallbacks.
+
+    Calls are POSTs of a prompt at temperature 0, so retrying one is safe (at worst the LLM answers twice).
+    When every attempt fails, or the circuit is open, the last good response for the same payload is returned
+    with the X-A2A-Degraded header set, if there is one; otherwise the error is raised.
+    """
+
+    def __init__(self, metrics: MetricsRegistry, base_url: str = LLM_SERVER_URL):
+        self.base_url = base_url
+        self.latency = LatencyTracker()
+        self.breaker = CircuitBreaker(metrics)
+        self._stale = OrderedDict()  # payload text -> last good JSON body
+        self._stale_lock = threading.Lock()
+        self.retries = metrics.counter("llm_client_retries_total", "Agent -> LLM calls retried after a retryable failure.")
+        self.timeouts = metrics.counter("llm_client_timeouts_total", "Agent -> LLM attempts that hit their deadline.")
+        self.degraded = metrics.counter("llm_client_degraded_total", "Stale answers served because the LLM server was unavailable.")
+        self.deadline_gauge = metrics.gauge("llm_client_deadline_seconds", "Current per-attempt deadline for agent -> LLM calls.")
+        self.deadline_gauge.set(LLM_TIMEOUT_MAX)
+
+    def _timeout(self, remaining: float) -> httpx.Timeout:
+        deadline = self.latency.deadline()
+        self.deadline_gauge.set(deadline)
+        return httpx.Timeout(min(deadline, remaining), connect=min(HTTP_CONNECT_TIMEOUT, remaining))
+
+    def _succeeded(self, key: str, response: httpx.Response, seconds: float):
+        self.breaker.record_success()
+        self.latency.record(seconds)
+        if response.status_code != 200:
+            return  # 4xx: the server is healthy, the request was not
+        with self._stale_lock:
+            self._stale[key] = response.json()
+            self._stale.move_to_end(key)
+            while len(self._stale) > LLM_STALE_CACHE_SIZE:
+                self._stale.popitem(last=False)
+
+    def _failed(self, error: Exception) -> None:
+        self.breaker.record_failure()
+        if isinstance(error, httpx.TimeoutException):
+            self.timeouts.inc()
+
+    def _fallback(self, url: str, key: str, error: Exception) -> httpx.Response:
+        with self._stale_lock:
+            body = self._stale.get(key)
+        if body is None:
+            raise error
+        self.degraded.inc()
+        logger.warning(f"Serving a stale LLM answer after: {error}")
+        return httpx.Response(200, json=body, headers={DEGRADED_HEADER: "stale"}, request=httpx.Request("POST", url))
+
+    def _check_response(self, response: httpx.Response):
+        if response.status_code in RETRYABLE_STATUS or response.status_code >= 500:
+            raise httpx.HTTPStatusError(f"LLM server returned status {response.status_code}", request=response.request, response=response)
+
+    def post(self, path: str, payload: dict) -> httpx.Response:
+        """POST payload to the LLM server over the shared sync pool (blocking)."""
+        url, key = f"{self.base_url}{path}", str(payload)
+        start = time.monotonic()
+        error = None
+        for attempt in range(LLM_RETRY_ATTEMPTS):
+            if not self.breaker.allow():
+                return self._fallback(url, key, error or CircuitOpenError("LLM server circuit is open; failing fast."))
+            attempt_start = time.monotonic()
+            try:
+                response = get_http_client().post(url, json=payload, timeout=self._timeout(LLM_CALL_BUDGET - (attempt_start - start)))
+                self._check_response(response)
+                self._succeeded(key, response, time.monotonic() - attempt_start)
+                return response
+            except httpx.HTTPStatusError as e:
+                self._failed(e)
+                error, delay = e, backoff_delay(attempt, _retry_after(e.response))
+            except httpx.TransportError as e:
+                self._failed(e)
+                error, delay = e, backoff_delay(attempt)
+            except BaseException:
+                self.breaker.release()
+                raise
+            if attempt + 1 == LLM_RETRY_ATTEMPTS or time.monotonic() - start + delay >= LLM_CALL_BUDGET:
+                break
+            self.retries.inc()
+            time.sleep(delay)
+        return self._fallback(url, key, error)
+
+    async def apost(self, path: str, payload: dict) -> httpx.Response:
+        """Async counterpart of post, over the event loop's pooled AsyncClient."""
+        url, key = f"{self.base_url}{path}", str(payload)
+        start = time.monotonic()
+        error = None
+        for attempt in range(LLM_RETRY_ATTEMPTS):
+            if not self.breaker.allow():
+                return self._fallback(url, key, error or CircuitOpenError("LLM server circuit is open; failing fast."))
+            attempt_start = time.monotonic()
+            try:
+                response = await get_async_http_client().post(url, json=payload, timeout=self._timeout(LLM_CALL_BUDGET - (attempt_start - start)))
+                self._check_response(response)
+                self._succeeded(key, response, time.monotonic() - attempt_start)
+                return response
+            except httpx.HTTPStatusError as e:
+                self._failed(e)
+                error, delay = e, backoff_delay(attempt, _retry_after(e.response))
+            except httpx.TransportError as e:
+                self._failed(e)
+                error, delay = e, backoff_delay(attempt)
+            except BaseException:
+                self.breaker.release()
+                raise
+            if attempt + 1 == LLM_RETRY_ATTEMPTS or time.monotonic() - start + delay >= LLM_CALL_BUDGET:
+                break
+            self.retries.inc()
+            await asyncio.sleep(delay)
+        return self._fallback(url, key, error)
+
+    async def stream_text(self, path: str, text: str, metadata: dict = None):
+        """stream_sse_text behind the circuit breaker. Streams are not retried: chunks may already have been sent."""
+        if not self.breaker.allow():
+            raise CircuitOpenError("LLM server circuit is open; failing fast.")
+        healthy = None
+        try:
+            async for chunk in stream_sse_text(f"{self.base_url}{path}", text, timeout=LLM_TIMEOUT_MAX, metadata=metadata):
+                if healthy is None:
+                    healthy = True
+                    self.breaker.record_success()
+                yield chunk
+        except (httpx.TransportError, StreamError) as e:
+            if healthy is None:
+                healthy = False
+                self._failed(e)
+            raise
+        finally:
+            if healthy is None:
+                self.breaker.release()  # closed early, or ended without any text
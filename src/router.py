@@ -0,0 +1,186 @@
+import logging
+import math
+import re
+import threading
+from collections import Counter, OrderedDict
+from src.metrics import MetricsRegistry
+from src.utils import CODING_KEYWORDS
+
+logger = logging.getLogger(__name__)
+
+def _tokens(text: str) -> list[str]:
+    """Word unigrams plus character 3-grams of each word, so 'sines' still matches 'sine'."""
+    words = re.findall(r"[a-z0-9π°θ]+", text.lower())
+    features = list(words)
+    for word in words:
+        padded = f"#{word}#"
+        features.extend(padded[i:i + 3] for i in range(len(padded) - 2))
+    return features
+
+# A conjunction followed by the start of a new request: "explain X and give me Python code for it"
+_CLAUSE_BREAK = re.compile(
+    r"\s*(?:[,;]\s*)?\b(?:and(?:\s+then|\s+also)?|then|also|plus)\s+"
+    r"(?=(?:please\s+)?(?:give|write|show|explain|generate|create|implement|make|calculate|compute|find|list|tell|"
+    r"describe|derive|prove|provide|plot|what|how|why|code|python)\b)|\s*;\s*",
+    re.IGNORECASE,
+)
+# "... code for it": a later clause referring back to the first clause's subject
+_BACK_REFERENCE = re.compile(r"\b(for|of|with|implements?|computes?|calculates?|converts?|plots?|graphs?|proves?|derives?)\s+(?:it|this|that|them)\b", re.IGNORECASE)
+_REQUEST_VERB = re.compile(
+    r"^(?:please\s+)?(?:can you\s+)?(?:explain|describe|tell me about|what (?:is|are)|show me|give me|calculate|compute|"
+    r"find|list|derive|prove)\s+", re.IGNORECASE,
+)
+
+def split_query(query: str) -> list[str]:
+    """The clauses of a query that asks for several things, each made to stand alone; [query] for a single request.
+
+    "explain the law of cosines and give me Python code for it" ->
+    ["explain the law of cosines", "give me Python code for the law of cosines"]
+    """
+    parts = [part.strip(" ,;.") for part in _CLAUSE_BREAK.split(query)]
+    parts = [part for part in parts if part]
+    if len(parts) < 2:
+        return [query]
+    subject = _REQUEST_VERB.sub("", parts[0]).strip() or parts[0]
+    return [parts[0]] + [_BACK_REFERENCE.sub(lambda m: f"{m.group(1)} {subject}", part, count=1) for part in parts[1:]]
+
+def plan_query(router, query: str, conversation_history=None) -> list[tuple[str, str, float]]:
+    """[(sub-query, agent, confidence)]: one entry per part of a query that needs more than one agent.
+
+    Adjacent clauses for the same agent stay one sub-query. A query whose clauses all go to one agent is routed
+    (and answered) whole, so this returns a single entry for it.
+    """
+    parts = split_query(query)
+    if len(parts) > 1:
+        plan = []
+        for part in parts:
+            agent_name, confidence = router.route_query(part, conversation_history)
+            if plan and plan[-1][1] == agent_name:
+                previous, _, previous_confidence = plan.pop()
+                part, confidence = f"{previous} and {part}", min(previous_confidence, confidence)
+            plan.append((part, agent_name, confidence))
+        if len(plan) > 1:
+            return plan
+    return [(query, *router.route_query(query, conversation_history))]
+
+def _field(skill, name: str):
+    # Agent cards give AgentSkill objects, the @skill decorator gives plain dicts
+    return skill.get(name) if isinstance(skill, dict) else getattr(skill, name, None)
+
+def training_texts(description: str, skills) -> list[str]:
+    """Turn an agent's description and declared skills into classifier training documents."""
+    texts = [description] if description else []
+    for skill in skills:
+        texts.extend(filter(None, [_field(skill, "name"), _field(skill, "description")]))
+        texts.extend(_field(skill, "examples") or [])
+        tags = _field(skill, "tags") or []
+        if tags:
+            texts.append(" ".join(tags))
+    return texts
+
+class LocalAgentRouter:
+    """Routes queries without an LLM: keyword rules first, then a TF-IDF nearest-centroid classifier.
+
+    Drop-in for AIAgentRouter.route_query. Decisions whose confidence is below confidence_threshold
+    are escalated to fallback_router (typically the AIAgentRouter) when one is given.
+    """
+
+    def __init__(self, training_examples: dict[str, list[str]], keyword_rules: dict[str, list[str]] = None,
+                 fallback_router=None, confidence_threshold: float = 0.6, cache_size: int = 1024,
+                 metrics: MetricsRegistry = None):
+        self.keyword_rules = keyword_rules if keyword_rules is not None else {"coding": CODING_KEYWORDS}
+        self.fallback_router = fallback_router
+        self.confidence_threshold = confidence_threshold
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+        metrics = metrics or MetricsRegistry()
+        self.keyword_decisions = metrics.counter("router_keyword_decisions_total", "Queries routed by keyword rules.")
+        self.classifier_decisions = metrics.counter("router_classifier_decisions_total", "Queries routed by the local classifier.")
+        self.llm_escalations = metrics.counter("router_llm_escalations_total", "Low-confidence queries escalated to the LLM router.")
+        self.cache_hits = metrics.counter("router_cache_hits_total", "Routing decisions served from the cache.")
+
+        self._train({name: texts for name, texts in training_examples.items() if texts})
+
+    @classmethod
+    def from_agent_network(cls, network, **kwargs) -> "LocalAgentRouter":
+        """Train on the description, skills, tags and examples each agent publishes in its agent card."""
+        examples = {}
+        for name, client in network.agents.items():
+            card = getattr(client, "agent_card", None)
+            # Unreachable agents get a placeholder card without skills; don't train on its placeholder text
+            examples[name] = training_texts(card.description, card.skills) if card and card.skills else []
+            if not examples[name]:
+                logger.warning(f"No agent card skills available for '{name}'; it can only be chosen by keyword rules or the fallback router.")
+        return cls(examples, **kwargs)
+
+    def _train(self, training_examples: dict[str, list[str]]):
+        documents = [(name, Counter(_tokens(text))) for name, texts in training_examples.items() for text in texts]
+        document_frequency = Counter(feature for _, counts in documents for feature in counts)
+        total = len(documents)
+        self._idf = {feature: math.log((1 + total) / (1 + df)) + 1 for feature, df in document_frequency.items()}
+
+        centroids = {}
+        for name, counts in documents:
+            centroid = centroids.setdefault(name, Counter())
+            for feature, weight in self._vector(counts).items():
+                centroid[feature] += weight
+        self._centroids = {name: self._normalize(centroid) for name, centroid in centroids.items()}
+
+    def _vector(self, counts: Counter) -> dict[str, float]:
+        return self._normalize({f: (1 + math.log(c)) * self._idf[f] for f, c in counts.items() if f in self._idf})
+
+    @staticmethod
+    def _normalize(vector: dict[str, float]) -> dict[str, float]:
+        norm = math.sqrt(sum(w * w for w in vector.values()))
+        return {f: w / norm for f, w in vector.items()} if norm else {}
+
+    def classify(self, query: str) -> tuple[str | None, float]:
+        """Nearest centroid by cosine similarity; confidence is the winner's share of the top-two similarity."""
+        vector = self._vector(Counter(_tokens(query)))
+        scores = sorted(
+            ((sum(w * centroid.get(f, 0.0) for f, w in vector.items()), name) for name, centroid in self._centroids.items()),
+            reverse=True,
+        )
+        if not scores or scores[0][0] <= 0:
+            return None, 0.0
+        best_score, best_name = scores[0]
+        runner_up = scores[1][0] if len(scores) > 1 else 0.0
+        return best_name, best_score / (best_score + runner_up)
+
+    def route_query(self, query: str, conversation_history=None, use_cache: bool = True) -> tuple[str, float]:
+        cache_key = " ".join(query.lower().split())
+        if use_cache:
+            with self._lock:
+                if cache_key in self._cache:
+                    self._cache.move_to_end(cache_key)
+                    self.cache_hits.inc()
+                    return self._cache[cache_key]
+
+        decision = self._decide(query, conversation_history)
+
+        if use_cache:
+            with self._lock:
+                self._cache[cache_key] = decision
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return decision
+
+    def _decide(self, query: str, conversation_history) -> tuple[str, float]:
+        query_lower = query.lower()
+        for name, keywords in self.keyword_rules.items():
+            if any(keyword in query_lower for keyword in keywords):
+                self.keyword_decisions.inc()
+                return name, 1.0
+
+        agent_name, confidence = self.classify(query)
+        if (agent_name is None or confidence < self.confidence_threshold) and self.fallback_router is not None:
+            self.llm_escalations.inc()
+            logger.debug(f"Local routing confidence {confidence:.2f} below threshold for '{query}', asking the LLM router.")
+            return self.fallback_router.route_query(query, conversation_history)
+        if agent_name is None:
+            # Nothing matched and no fallback: pick the first agent we know about
+            agent_name = next(iter(self._centroids), next(iter(self.keyword_rules)))
+        self.classifier_decisions.inc()
+        return agent_name, confidence
@@ -0,0 +1,124 @@
+import asyncio
+import json
+import logging
+import time
+from collections.abc import AsyncIterator
+from contextlib import aclosing
+from flask import Response, request, stream_with_context
+from python_a2a import Message
+from src.http_client import get_async_http_client, aclose_async_http_client
+from src.metrics import MetricsRegistry
+
+logger = logging.getLogger(__name__)
+
+class StreamError(RuntimeError):
+    """Raised when the remote server reports an error event in the middle of an SSE stream."""
+
+def sse_event(chunk, index: int, last: bool = False) -> str:
+    """Format one chunk the same way python_a2a's /stream endpoint does."""
+    data = {"content": chunk, "index": index, "append": True}
+    if last:
+        data["lastChunk"] = True
+    return f"data: {json.dumps(data)}\n\n"
+
+def sse_error(message: str) -> str:
+    return f"event: error\ndata: {json.dumps({'error': message})}\n\n"
+
+def parse_stream_message(data: dict) -> Message:
+    """Build the Message for a /stream request body (python_a2a or Google A2A format)."""
+    message_data = data.get("message", data) if isinstance(data.get("message"), dict) else data
+    if "parts" in message_data and "role" in message_data and "content" not in message_data:
+        return Message.from_google_a2a(message_data)
+    return Message.from_dict(message_data)
+
+def register_stream_route(app, agent):
+    """Serve agent.stream_response on the Flask app's /stream route.
+
+    python_a2a's built-in /stream view runs the generator on a side thread and polls a queue,
+    which can drop the final chunks when the generator finishes between polls. This view drives
+    the async generator directly from the request thread instead.
+    """
+    def stream_view():
+        message = parse_stream_message(request.json)
+
+        def generate():
+            loop = asyncio.new_event_loop()
+            chunks = agent.stream_response(message)
+            try:
+                yield ": SSE stream established\n\n"
+                index = 0
+                while True:
+                    try:
+                        chunk = loop.run_until_complete(anext(chunks))
+                    except StopAsyncIteration:
+                        break
+                    yield sse_event(chunk, index)
+                    index += 1
+                yield sse_event("", index, last=True)
+            except Exception as e:
+                logger.error(f"Error while streaming response: {e}", exc_info=True)
+                yield sse_error(str(e))
+            finally:
+                loop.run_until_complete(chunks.aclose())
+                loop.run_until_complete(aclose_async_http_client())
+                loop.run_until_complete(loop.shutdown_asyncgens())
+                loop.close()
+
+        headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        return Response(stream_with_context(generate()), mimetype="text/event-stream", headers=headers)
+
+    for rule in list(app.url_map.iter_rules()):
+        if rule.rule == "/stream":
+            app.view_functions[rule.endpoint] = stream_view
+            return
+    app.add_url_rule("/stream", "stream", stream_view, methods=["POST"])
+
+async def stream_sse_text(url: str, text: str, timeout: float = 60.0, metadata: dict = None) -> AsyncIterator[str]:
+    """POST a text message (with optional message metadata) to an A2A /stream endpoint and yield the text chunks as they arrive."""
+    payload = {"role": "user", "content": {"type": "text", "text": text}}
+    if metadata:
+        payload["metadata"] = metadata
+    headers = {"Accept": "text/event-stream"}
+    async with get_async_http_client().stream("POST", url, json=payload, headers=headers, timeout=timeout) as response:
+        if response.status_code != 200:
+            body = (await response.aread()).decode(errors="replace")
+            raise StreamError(f"Stream request failed with status {response.status_code}: {body[:200]}")
+
+        event_type = "message"
+        # aclosing: finalize the line iterator even when we stop early at lastChunk, so no generator
+        # outlives the (possibly short-lived) event loop it was created on
+        async with aclosing(response.aiter_lines()) as lines:
+            async for line in lines:
+                if line.startswith("event:"):
+                    event_type = line[len("event:"):].strip()
+                elif line.startswith("data:"):
+                    data = json.loads(line[len("data:"):].strip())
+                    if event_type == "error" or "error" in data:
+                        raise StreamError(data.get("error", "Unknown streaming error"))
+                    content = data.get("content", "")
+                    if isinstance(content, dict):
+                        content = content.get("text", "")
+                    if content:
+                        yield content
+                    if data.get("lastChunk"):
+                        return
+                elif not line:
+                    event_type = "message"
+
+async def timed_stream(chunks: AsyncIterator[str], metrics: MetricsRegistry, prefix: str) -> AsyncIterator[str]:
+    """Pass chunks through while recording time-to-first-chunk and total stream duration."""
+    streams = metrics.counter(f"{prefix}_streams_total", "Streaming responses served.")
+    first_chunk_seconds = metrics.counter(f"{prefix}_stream_first_chunk_seconds_total", "Sum of time-to-first-chunk over all streams.")
+    total_seconds = metrics.counter(f"{prefix}_stream_seconds_total", "Sum of total stream durations.")
+
+    start = time.perf_counter()
+    first_chunk_at = None
+    try:
+        async for chunk in chunks:
+            if first_chunk_at is None:
+                first_chunk_at = time.perf_counter()
+                first_chunk_seconds.inc(first_chunk_at - start)
+            yield chunk
+    finally:
+        streams.inc()
+        total_seconds.inc(time.perf_counter() - start)
@@ -0,0 +1,282 @@
+"""Where an agent keeps finished tasks, so /tasks/get and /tasks/cancel work across workers and restarts.
+
+python_a2a's A2AServer reads and writes self.tasks like a dict (tasks.get(id), tasks[id] = task); the stores
+here keep that interface. Pick one with TASK_STORE:
+    memory (default)           per process, lost on restart
+    sqlite:///tasks.db         one file shared by every worker on the host (sqlite:////abs/path for an absolute path)
+    redis://host:6379/0        shared by every host (needs the redis package: pip install "a2a-trigonometry-agent[redis]")
+Every task expires TASK_TTL_SECONDS after its last write.
+"""
+import fnmatch
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from flask import jsonify, request
+from python_a2a import Task, TaskState, TaskStatus
+from src.metrics import MetricsRegistry
+
+TASK_STORE = os.getenv("TASK_STORE", "memory")
+TASK_TTL_SECONDS = float(os.getenv("TASK_TTL_SECONDS", "3600"))
+# Expired tasks are never returned; they are also removed in bulk at most this often
+TASK_CLEANUP_INTERVAL_SECONDS = float(os.getenv("TASK_CLEANUP_INTERVAL_SECONDS", "60"))
+
+class TaskStore(ABC):
+    """Tasks by ID with TTL expiry. Subclasses implement _write, _read, _delete and cleanup."""
+
+    def __init__(self, ttl_seconds: float = TASK_TTL_SECONDS, metrics: MetricsRegistry = None,
+                 cleanup_interval: float = TASK_CLEANUP_INTERVAL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self.cleanup_interval = cleanup_interval
+        self._next_cleanup = time.monotonic() + cleanup_interval
+        metrics = metrics or MetricsRegistry()
+        self.writes = metrics.counter("a2a_task_store_writes_total", "Tasks written to the task store.")
+        self.hits = metrics.counter("a2a_task_store_reads_total", "Task lookups by ID, by result.", labels={"result": "hit"})
+        self.misses = metrics.counter("a2a_task_store_reads_total", "Task lookups by ID, by result.", labels={"result": "miss"})
+        self.expired = metrics.counter("a2a_task_store_expired_total", "Expired tasks removed by bulk cleanup.")
+
+    def put(self, task: Task):
+        self._write(task.id, json.dumps(task.to_dict()), time.time() + self.ttl_seconds)
+        self.writes.inc()
+        if time.monotonic() >= self._next_cleanup:
+            self._next_cleanup = time.monotonic() + self.cleanup_interval
+            self.expired.inc(self.cleanup())
+
+    def get(self, task_id: str, default=None) -> Task | None:
+        data = self._read(task_id) if task_id else None
+        if data is None:
+            self.misses.inc()
+            return default
+        self.hits.inc()
+        return Task.from_dict(json.loads(data))
+
+    def delete(self, task_id: str):
+        self._delete(task_id)
+
+    @abstractmethod
+    def cleanup(self) -> int:
+        """Remove every expired task now; returns how many were removed."""
+
+    @abstractmethod
+    def _write(self, task_id: str, data: str, expires_at: float):
+        ...
+
+    @abstractmethod
+    def _read(self, task_id: str) -> str | None:
+        """The stored JSON of an unexpired task, or None."""
+
+    @abstractmethod
+    def _delete(self, task_id: str):
+        ...
+
+    # dict interface used by python_a2a's A2AServer
+    def __setitem__(self, task_id: str, task: Task):
+        self.put(task)
+
+    def __getitem__(self, task_id: str) -> Task:
+        task = self.get(task_id)
+        if task is None:
+            raise KeyError(task_id)
+        return task
+
+    def __contains__(self, task_id: str) -> bool:
+        return self._read(task_id) is not None
+
+    def __delitem__(self, task_id: str):
+        self.delete(task_id)
+
+class InMemoryTaskStore(TaskStore):
+    """Per-process store. Entries are kept in expiry order, so cleanup only looks at the expired ones."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._entries = OrderedDict()  # task ID -> (expires_at, JSON); the TTL is fixed, so oldest write first
+        self._lock = threading.Lock()
+
+    def _write(self, task_id, data, expires_at):
+        with self._lock:
+            self._entries[task_id] = (expires_at, data)
+            self._entries.move_to_end(task_id)
+
+    def _read(self, task_id):
+        entry = self._entries.get(task_id)
+        return entry[1] if entry is not None and entry[0] > time.time() else None
+
+    def _delete(self, task_id):
+        with self._lock:
+            self._entries.pop(task_id, None)
+
+    def cleanup(self) -> int:
+        now, removed = time.time(), 0
+        with self._lock:
+            while self._entries and next(iter(self._entries.values()))[0] <= now:
+                self._entries.popitem(last=False)
+                removed += 1
+        return removed
+
+    def __len__(self):
+        self.cleanup()
+        return len(self._entries)
+
+class SQLiteTaskStore(TaskStore):
+    """One SQLite file shared by every worker process on the host.
+
+    WAL journaling lets other processes read while one commits. Lookups go through the primary key, and an
+    index on expires_at makes the bulk cleanup a range delete.
+    """
+
+    def __init__(self, path: str, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        # Autocommit: every write is its own short transaction, so no lock is held between requests
+        self._db = sqlite3.connect(path, timeout=30.0, isolation_level=None, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")  # with WAL: survives process crashes, fsyncs at checkpoints
+        self._db.execute("CREATE TABLE IF NOT EXISTS tasks (id TEXT PRIMARY KEY, data TEXT NOT NULL, expires_at REAL NOT NULL)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS tasks_expires_at ON tasks (expires_at)")
+
+    def _execute(self, sql: str, params: tuple = ()) -> tuple | int:
+        """Run one statement; returns the first row of a query, or the number of rows changed."""
+        with self._lock:
+            cursor = self._db.execute(sql, params)
+            return cursor.fetchone() if cursor.description else cursor.rowcount
+
+    def _write(self, task_id, data, expires_at):
+        self._execute("INSERT OR REPLACE INTO tasks VALUES (?, ?, ?)", (task_id, data, expires_at))
+
+    def _read(self, task_id):
+        row = self._execute("SELECT data FROM tasks WHERE id = ? AND expires_at > ?", (task_id, time.time()))
+        return row[0] if row else None
+
+    def _delete(self, task_id):
+        self._execute("DELETE FROM tasks WHERE id = ?", (task_id,))
+
+    def cleanup(self) -> int:
+        return self._execute("DELETE FROM tasks WHERE expires_at <= ?", (time.time(),))
+
+    def __len__(self):
+        return self._execute("SELECT COUNT(*) FROM tasks WHERE expires_at > ?", (time.time(),))[0]
+
+class RedisTaskStore(TaskStore):
+    """Tasks as Redis string keys with a native TTL, through any client with redis-py's get/set/delete/scan_iter.
+
+    Redis expires keys itself, so cleanup has nothing to do; clear() removes every task of this store in bulk.
+    """
+
+    def __init__(self, client, prefix: str = "a2a:task:", **kwargs):
+        super().__init__(**kwargs)
+        self.client = client
+        self.prefix = prefix
+
+    def _write(self, task_id, data, expires_at):
+        self.client.set(self.prefix + task_id, data, px=max(1, int((expires_at - time.time()) * 1000)))
+
+    def _read(self, task_id):
+        data = self.client.get(self.prefix + task_id)
+        return data.decode("utf-8") if isinstance(data, bytes) else data
+
+    def _delete(self, task_id):
+        self.client.delete(self.prefix + task_id)
+
+    def cleanup(self) -> int:
+        return 0
+
+    def clear(self, batch_size: int = 500) -> int:
+        """Delete every task under this store's prefix, batch_size keys per DELETE."""
+        removed, batch = 0, []
+        for key in self.client.scan_iter(match=self.prefix + "*", count=batch_size):
+            batch.append(key)
+            if len(batch) == batch_size:
+                removed += self.client.delete(*batch)
+                batch = []
+        if batch:
+            removed += self.client.delete(*batch)
+        return removed
+
+    def __len__(self):
+        return sum(1 for _ in self.client.scan_iter(match=self.prefix + "*"))
+
+class LocalRedis:
+    """In-process stand-in for the part of redis-py RedisTaskStore uses (get, set with ex/px, delete, scan_iter).
+
+    For development and benchmarks without a Redis server (TASK_STORE=redis+local://); not shared between processes.
+    """
+
+    def __init__(self):
+        self._data = {}  # key -> (value, expires_at or None)
+        self._lock = threading.Lock()
+
+    def set(self, name: str, value, ex: float = None, px: int = None) -> bool:
+        ttl = px / 1000 if px is not None else ex
+        with self._lock:
+            self._data[name] = (value.encode("utf-8") if isinstance(value, str) else value,
+                                time.time() + ttl if ttl is not None else None)
+        return True
+
+    def get(self, name: str) -> bytes | None:
+        entry = self._data.get(name)
+        if entry is None:
+            return None
+        if entry[1] is not None and entry[1] <= time.time():
+            with self._lock:
+                self._data.pop(name, None)
+            return None
+        return entry[0]
+
+    def delete(self, *names: str) -> int:
+        with self._lock:
+            return sum(self._data.pop(name, None) is not None for name in names)
+
+    def scan_iter(self, match: str = None, count: int = None):
+        with self._lock:
+            keys = list(self._data)
+        return (key for key in keys if (match is None or fnmatch.fnmatchcase(key, match)) and self.get(key) is not None)
+
+def create_task_store(url: str = TASK_STORE, metrics: MetricsRegistry = None, ttl_seconds: float = TASK_TTL_SECONDS) -> TaskStore:
+    """Build the store TASK_STORE (or url) describes: memory, sqlite:///path, redis://..., or redis+local://."""
+    options = {"metrics": metrics, "ttl_seconds": ttl_seconds}
+    if url in ("", "memory"):
+        return InMemoryTaskStore(**options)
+    if url.startswith("sqlite://"):
+        return SQLiteTaskStore(url.removeprefix("sqlite://").removeprefix("/") or "tasks.db", **options)
+    if url.startswith("redis+local://"):
+        return RedisTaskStore(LocalRedis(), **options)
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("A Redis task store needs the redis package (the 'redis' extra).") from e
+        return RedisTaskStore(redis.Redis.from_url(url), **options)
+    raise ValueError(f"Unknown TASK_STORE '{url}' (expected memory, sqlite:///path, redis://... or redis+local://).")
+
+def task_lookup(agent, data: dict, cancel: bool = False) -> tuple[dict, int]:
+    """Body and status code for a /tasks/get or /tasks/cancel request, in python_a2a's formats (JSON-RPC or plain)."""
+    rpc = "jsonrpc" in data
+    params = data.get("params", {}) if rpc else data
+    task_id = params.get("id")
+    task = agent.tasks.get(task_id)
+    if task is None:
+        if rpc:
+            return {"jsonrpc": "2.0", "id": data.get("id", 1), "error": {"code": -32000, "message": f"Task not found: {task_id}"}}, 404
+        return {"error": f"Task not found: {task_id}"}, 404
+    if cancel:
+        task.status = TaskStatus(state=TaskState.CANCELED)
+        agent.tasks[task.id] = task
+    body = task.to_google_a2a() if agent._use_google_a2a else task.to_dict()
+    return ({"jsonrpc": "2.0", "id": data.get("id", 1), "result": body} if rpc else body), 200
+
+def register_task_routes(app, agent):
+    """Replace python_a2a's /tasks/cancel handlers, which only change the copy they read, with ones that write back.
+
+    Call after A2AServer.setup_routes; /tasks/get already reads through agent.tasks.
+    """
+    def cancel_endpoint():
+        body, status = task_lookup(agent, request.get_json(silent=True) or {}, cancel=True)
+        return jsonify(body), status
+
+    for endpoint in ("a2a_tasks_cancel", "tasks_cancel"):
+        app.view_functions[endpoint] = cancel_endpoint
@@ -0,0 +1,146 @@
+import contextvars
+import json
+import logging
+import time
+import uuid
+from contextlib import contextmanager
+from flask import g, request
+from src.metrics import MetricsRegistry
+
+REQUEST_ID_HEADER = "X-Request-ID"
+
+trace_logger = logging.getLogger("a2a.trace")
+
+class Trace:
+    """Spans and attributes (token counts, agent name, ...) recorded for one request in one process."""
+
+    def __init__(self, request_id: str, service: str):
+        self.request_id = request_id
+        self.service = service
+        self.start = time.perf_counter()
+        self.spans = []  # (stage, seconds) in completion order
+        self.attributes = {}
+
+    def stage_seconds(self) -> dict[str, float]:
+        totals = {}
+        for stage, seconds in self.spans:
+            totals[stage] = totals.get(stage, 0.0) + seconds
+        return totals
+
+    def summary(self) -> str:
+        return ", ".join(f"{stage} {seconds * 1000:.1f} ms" for stage, seconds in self.stage_seconds().items())
+
+_current_trace = contextvars.ContextVar("a2a_trace", default=None)
+
+def current_trace() -> Trace | None:
+    return _current_trace.get()
+
+def current_request_id() -> str | None:
+    trace = _current_trace.get()
+    return trace.request_id if trace else None
+
+def new_request_id() -> str:
+    return uuid.uuid4().hex
+
+class Tracer:
+    """Times request stages into a2a_stage_seconds{stage=...} histograms and the current request's Trace.
+
+    The request ID travels in the X-Request-ID header: register_tracing / the async server pick it up on the way
+    in, and the pooled httpx clients and traced python_a2a clients attach it on the way out.
+    """
+
+    def __init__(self, metrics: MetricsRegistry, service: str):
+        self.metrics = metrics
+        self.service = service
+        self.requests = metrics.counter("a2a_traced_requests_total", "Requests traced by this server.")
+
+    def _histogram(self, stage: str):
+        return self.metrics.histogram("a2a_stage_seconds", "Time spent per request stage.", labels={"stage": stage})
+
+    @contextmanager
+    def request(self, request_id: str = None):
+        """Make a trace current for the duration of one request and log its span breakdown as JSON at the end."""
+        trace = Trace(request_id or new_request_id(), self.service)
+        token = _current_trace.set(trace)
+        try:
+            yield trace
+        finally:
+            try:
+                _current_trace.reset(token)
+            except ValueError:
+                pass  # generator-held traces (SSE streams) can be closed from another context
+            total = time.perf_counter() - trace.start
+            self._histogram("total").observe(total)
+            self.requests.inc()
+            trace_logger.info(json.dumps({
+                "request_id": trace.request_id,
+                "service": self.service,
+                "total_ms": round(total * 1000, 3),
+                "stages_ms": {stage: round(seconds * 1000, 3) for stage, seconds in trace.stage_seconds().items()},
+                **trace.attributes,
+            }))
+
+    @contextmanager
+    def span(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+
+    def record(self, stage: str, seconds: float):
+        """Record a stage that was timed elsewhere (e.g. time spent waiting for an in-flight slot)."""
+        self._histogram(stage).observe(seconds)
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.spans.append((stage, seconds))
+
+    def annotate(self, **attributes):
+        """Attach attributes (token counts, chosen agent, ...) to the current request's trace log line."""
+        trace = _current_trace.get()
+        if trace is not None:
+            for key, value in attributes.items():
+                trace.attributes[key] = trace.attributes.get(key, 0) + value if isinstance(value, (int, float)) else value
+
+def register_tracing(app, tracer: Tracer):
+    """Trace every POST handled by a Flask app created by run_server, continuing the caller's X-Request-ID."""
+    def start_trace():
+        if request.method == "POST":
+            g.a2a_trace = tracer.request(request.headers.get(REQUEST_ID_HEADER))
+            g.a2a_request_id = g.a2a_trace.__enter__().request_id
+
+    def add_request_id_header(response):
+        if "a2a_request_id" in g:
+            response.headers[REQUEST_ID_HEADER] = g.a2a_request_id
+        if response.is_streamed and "a2a_trace" in g:
+            # Teardown runs before the body is sent; keep /stream traces open until the stream is closed
+            trace = g.pop("a2a_trace")
+            response.call_on_close(lambda: trace.__exit__(None, None, None))
+        return response
+
+    def end_trace(error=None):
+        trace = g.pop("a2a_trace", None)
+        if trace is not None:
+            trace.__exit__(None, None, None)
+
+    app.before_request(start_trace)
+    app.after_request(add_request_id_header)
+    app.teardown_request(end_trace)
+
+class RequestIdHeaders(dict):
+    """Header mapping for python_a2a clients that adds the current request ID to every call they make.
+
+    python_a2a posts with requests.post(headers=client.headers), and requests reads mappings through items().
+    """
+
+    def items(self):
+        request_id = current_request_id()
+        headers = dict(super().items())
+        if request_id:
+            headers[REQUEST_ID_HEADER] = request_id
+        return headers.items()
+
+def trace_a2a_client(client):
+    """Propagate the current request ID from an A2AClient (agent.ask, AIAgentRouter's LLM calls, ...)."""
+    client.headers = RequestIdHeaders(client.headers)
+    return client
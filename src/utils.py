@@ -1,27 +1,168 @@
+import atexit
+import json
 import logging
+import logging.handlers
 import os
-from datetime import datetime
-import uuid
+import queue
+import random
 import re
 import math
+import sys
+from datetime import datetime, timezone
 from python_a2a import TaskStatus, TaskState
+from src.tracing import current_request_id
+
+# Words that mark a query as a request for code rather than an answer
+CODING_KEYWORDS = ["code", "python", "generate", "script", "program"]
+
+# Logging settings, overridable per process through the environment
+LOG_DIR = os.getenv("LOG_DIR", "logs")
+LOG_LEVEL = os.getenv("LOG_LEVEL", "DEBUG").upper()
+LOG_CONSOLE_LEVEL = os.getenv("LOG_CONSOLE_LEVEL", LOG_LEVEL).upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")  # "json" or "text" for the log files
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", "5"))
+# Fraction of DEBUG records kept (full prompts and responses); INFO and above are always kept
+LOG_DEBUG_SAMPLE_RATE = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "1.0"))
+
+TEXT_LOG_FORMAT = "%(asctime)s - [%(levelname)s] %(name)s: %(message)s"
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message and the request ID when there is one."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if getattr(record, "request_id", None):
+            entry["request_id"] = record.request_id
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry)
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that samples DEBUG records and stamps the request ID before the record leaves the thread."""
+
+    def __init__(self, log_queue, debug_sample_rate: float):
+        super().__init__(log_queue)
+        self.debug_sample_rate = debug_sample_rate
+
+    def emit(self, record: logging.LogRecord):
+        # Dropped before prepare(), so sampled-out payloads are never even formatted
+        if record.levelno <= logging.DEBUG and self.debug_sample_rate < 1.0 and random.random() >= self.debug_sample_rate:
+            return
+        record.request_id = current_request_id()
+        super().emit(record)
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The queue never leaves the process, so the stdlib's copy-and-format (meant for pickling) is skipped;
+        # only %-style args are merged so the listener doesn't see objects mutated after the call
+        if record.args:
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+class BufferedRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """RotatingFileHandler for the queue listener: formats each record once and leaves flushing to the listener.
+
+    The stdlib version formats every record twice (once to check the size) and stats the file on each emit.
+    """
+
+    def __init__(self, filename, maxBytes: int = 0, backupCount: int = 0, encoding: str = None):
+        super().__init__(filename, maxBytes=maxBytes, backupCount=backupCount, encoding=encoding)
+        self._size = os.path.getsize(self.baseFilename) if os.path.exists(self.baseFilename) else 0
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            message = self.format(record) + self.terminator
+            if self.maxBytes > 0 and self._size + len(message) >= self.maxBytes and self._size > 0:
+                self.doRollover()
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.write(message)
+            self._size += len(message)
+        except Exception:
+            self.handleError(record)
+
+    def doRollover(self):
+        super().doRollover()
+        self._size = 0
+
+    def flush(self):
+        pass  # flushed by _FlushingQueueListener when the queue runs dry
+
+    def flush_buffer(self):
+        super().flush()
+
+class _FlushingQueueListener(logging.handlers.QueueListener):
+    """Flushes buffered handlers whenever the queue runs dry: one write per burst of records rather than per line."""
+
+    def dequeue(self, block: bool):
+        if block and self.queue.empty():
+            for handler in self.handlers:
+                if isinstance(handler, BufferedRotatingFileHandler):
+                    handler.flush_buffer()
+        return super().dequeue(block)
+
+    def stop(self):
+        super().stop()
+        for handler in self.handlers:
+            if isinstance(handler, BufferedRotatingFileHandler):
+                handler.flush_buffer()
+
+_listeners = []
+
+def _stop_listeners():
+    # Flushes whatever is still queued before the process exits
+    while _listeners:
+        _listeners.pop().stop()
+
+atexit.register(_stop_listeners)
+
+def queued_handler(handler: logging.Handler, debug_sample_rate: float = LOG_DEBUG_SAMPLE_RATE) -> logging.Handler:
+    """Wrap handler so records are only queued on the logging thread and written by a background listener."""
+    log_queue = queue.SimpleQueue()
+    listener = _FlushingQueueListener(log_queue, handler, respect_handler_level=True)
+    listener.start()
+    _listeners.append(listener)
+    return _QueueHandler(log_queue, debug_sample_rate)
 
 def setup_logging(agent_name: str):
-    """Configure logging to a file for an agent."""
-    log_dir = "logs"
-    os.makedirs(log_dir, exist_ok=True)
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    log_file = os.path.join(log_dir, f"{agent_name}_{timestamp}_{uuid.uuid4()}.log")
-    
+    """Configure logging to a size-rotated file for an agent (logs/<agent_name>.log), written off the request path.
+
+    Worker processes started by src/launcher.py each get their own file (logs/<agent_name>-<worker>.log),
+    since rotating one file from several processes would lose records.
+    """
+    os.makedirs(LOG_DIR, exist_ok=True)
+    worker_id = os.getenv("A2A_WORKER_ID")
+    log_file = os.path.join(LOG_DIR, f"{agent_name}-{worker_id}.log" if worker_id else f"{agent_name}.log")
+
     logger = logging.getLogger(agent_name)
-    logger.setLevel(logging.DEBUG)
+    logger.setLevel(LOG_LEVEL)
     if not logger.handlers:  # Avoid duplicate handlers
-        file_handler = logging.FileHandler(log_file)
-        formatter = logging.Formatter("%(asctime)s - [%(levelname)s] %(name)s: %(message)s")
-        file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
+        file_handler = BufferedRotatingFileHandler(
+            log_file, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding="utf-8"
+        )
+        file_handler.setFormatter(JsonFormatter() if LOG_FORMAT == "json" else logging.Formatter(TEXT_LOG_FORMAT))
+        logger.addHandler(queued_handler(file_handler))
     return logger
 
+def setup_console_logging(level: str = LOG_CONSOLE_LEVEL):
+    """Queued replacement for logging.basicConfig: root logger to stderr, written by a background listener."""
+    root = logging.getLogger()
+    root.setLevel(level)
+    # Libraries (python_a2a among them) call basicConfig on import; their synchronous stderr handler is replaced
+    for handler in list(root.handlers):
+        if type(handler) is logging.StreamHandler and handler.stream is sys.stderr:
+            root.removeHandler(handler)
+    if not any(isinstance(handler, _QueueHandler) for handler in root.handlers):
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s"))
+        root.addHandler(queued_handler(console_handler))
+
 def parse_task_message(task) -> str:
     """Extract text from task message."""
     try:
@@ -32,12 +173,17 @@ def parse_task_message(task) -> str:
         logging.error(f"Error parsing task message: {e}")
         return ""
 
+def normalize_prompt(prompt: str) -> str:
+    """Collapse differences that don't change the answer: case, whitespace and trailing punctuation."""
+    return re.sub(r"\s+", " ", prompt).strip().rstrip("?!. ").casefold()
+
+ANGLE_PATTERN = re.compile(r"([-+]?[0-9]*\.?[0-9]+)\s*(degrees?|deg|°|radians?|rad|π)?")
+
 def parse_angle(query: str) -> tuple[float, bool]:
     """Parse angle and unit (degrees or radians) from query."""
     query = query.lower()
     # Match number with optional decimal and unit
-    pattern = r"([-+]?[0-9]*\.?[0-9]+)\s*(degrees?|deg|°|radians?|rad|π)?"
-    match = re.search(pattern, query)
+    match = ANGLE_PATTERN.search(query)
     if not match:
         return None, None
     
@@ -45,7 +191,7 @@ def parse_angle(query: str) -> tuple[float, bool]:
     unit = match.group(2) or ""
     
     if unit == "π":
-        value *= math.pi
+        angle = value * math.pi
         is_degree = False
     else:
         is_degree = "degree" in unit or "deg" in unit or "°" in unit
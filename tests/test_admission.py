@@ -0,0 +1,124 @@
+import asyncio
+import threading
+import time
+import unittest
+from flask import Flask
+from python_a2a import TaskState, TaskStatus
+from src.admission import PRIORITY_CODE, PRIORITY_LLM, PRIORITY_LOCAL, AdmissionControl, register_admission_control
+from src.batch import register_batch_route
+from src.metrics import MetricsRegistry
+
+def rejected(metrics: MetricsRegistry, reason: str) -> float:
+    return metrics.counter("a2a_tasks_rejected_total", labels={"reason": reason}).value
+
+class AdmissionControlTest(unittest.TestCase):
+    def test_waiters_are_admitted_in_priority_order(self):
+        control, order = AdmissionControl(1, 10, MetricsRegistry()), []
+
+        async def run(priority):
+            self.assertTrue(await control.aacquire(priority))
+            order.append(priority)
+            control.release()
+
+        async def main():
+            self.assertTrue(await control.aacquire())
+            tasks = [asyncio.create_task(run(priority)) for priority in (PRIORITY_CODE, PRIORITY_LLM, PRIORITY_LOCAL, PRIORITY_LLM)]
+            await asyncio.sleep(0.05)
+            self.assertEqual(control.queued.value, 4)
+            control.release()
+            await asyncio.gather(*tasks)
+
+        asyncio.run(main())
+        self.assertEqual(order, [PRIORITY_LOCAL, PRIORITY_LLM, PRIORITY_LLM, PRIORITY_CODE])
+        self.assertEqual((control.in_flight.value, control.queued.value), (0, 0))
+
+    def test_full_queue_sheds_the_least_urgent_task(self):
+        metrics = MetricsRegistry()
+        control = AdmissionControl(1, 1, metrics)
+
+        async def main():
+            self.assertTrue(await control.aacquire())
+            queued = asyncio.create_task(control.aacquire(PRIORITY_LLM))
+            await asyncio.sleep(0.05)
+            self.assertFalse(await control.aacquire(PRIORITY_LLM))  # no room, and it does not outrank the waiter
+            local = asyncio.create_task(control.aacquire(PRIORITY_LOCAL))
+            self.assertFalse(await queued)  # displaced by the more urgent task
+            control.release()
+            self.assertTrue(await local)
+            control.release()
+
+        asyncio.run(main())
+        self.assertEqual((rejected(metrics, "queue_full"), rejected(metrics, "displaced")), (1, 1))
+
+    def test_zero_queue_rejects_instead_of_waiting(self):
+        metrics = MetricsRegistry()
+        control = AdmissionControl(1, 0, metrics)
+        self.assertTrue(control.acquire(PRIORITY_LLM))
+        self.assertFalse(control.acquire(PRIORITY_LOCAL))
+        control.release()
+        self.assertTrue(control.acquire(PRIORITY_LLM))
+        self.assertEqual(rejected(metrics, "queue_full"), 1)
+
+    def test_waiters_are_shed_when_their_wait_runs_out(self):
+        metrics = MetricsRegistry()
+        control = AdmissionControl(1, 10, metrics, max_wait=0.05)
+        self.assertTrue(control.acquire())
+        self.assertFalse(control.acquire())
+        control.release()
+        self.assertEqual((rejected(metrics, "timeout"), control.queued.value, control.in_flight.value), (1, 0, 0))
+
+    def test_threads_are_handed_the_slot(self):
+        control, results = AdmissionControl(1, 10, MetricsRegistry()), []
+        self.assertTrue(control.acquire())
+        thread = threading.Thread(target=lambda: results.append(control.acquire()))
+        thread.start()
+        time.sleep(0.05)
+        control.release()
+        thread.join(5)
+        self.assertEqual((results, control.in_flight.value), ([True], 1))
+        control.release()
+
+    def test_cancelled_waiter_gives_up_its_place(self):
+        control = AdmissionControl(1, 10, MetricsRegistry())
+
+        async def main():
+            self.assertTrue(await control.aacquire())
+            cancelled = asyncio.create_task(control.aacquire(PRIORITY_LOCAL))
+            waiting = asyncio.create_task(control.aacquire(PRIORITY_LLM))
+            await asyncio.sleep(0.05)
+            cancelled.cancel()
+            await asyncio.sleep(0)
+            control.release()
+            self.assertTrue(await waiting)
+            control.release()
+
+        asyncio.run(main())
+        self.assertEqual((control.in_flight.value, control.queued.value), (0, 0))
+
+class FlaskBatchAdmissionTest(unittest.TestCase):
+    def test_each_batch_query_is_admitted_on_its_own(self):
+        class Agent:
+            metrics = MetricsRegistry()
+
+            def task_priority(self, text):
+                return PRIORITY_LLM
+
+            async def handle_task_async(self, task):
+                await asyncio.sleep(0.05)
+                task.artifacts = [{"parts": [{"type": "text", "text": "done"}]}]
+                task.status = TaskStatus(state=TaskState.COMPLETED)
+                return task
+
+        app, agent = Flask(__name__), Agent()
+        control = register_admission_control(app, agent, AdmissionControl(1, 0, agent.metrics))
+        register_batch_route(app, agent, admission=control)
+        with self.assertLogs("src.batch", "ERROR"):
+            response = app.test_client().post("/tasks/batch", json={"queries": ["sin 30°", "cos 60°"]})
+
+        self.assertEqual(response.status_code, 200)
+        states = sorted(result["state"] for result in response.get_json()["results"])
+        self.assertEqual(states, [TaskState.COMPLETED.value, TaskState.FAILED.value])
+        self.assertEqual(control.in_flight.value, 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,21 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from client import read_batch_queries
+
+class BatchInputTest(unittest.TestCase):
+    def test_non_object_lines_do_not_stop_the_batch(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".jsonl", delete=False, encoding="utf-8") as f:
+            f.write('{"query": "sin 30 degrees"}\n42\n[1, 2]\n"cos 0"\nnull\nplain text\n')
+        try:
+            with contextlib.redirect_stdout(io.StringIO()) as output:
+                queries = [query for _, query in read_batch_queries(f.name)]
+        finally:
+            os.unlink(f.name)
+        self.assertEqual(queries, ["sin 30 degrees", None, None, "cos 0", None, "plain text"])
+        self.assertIn(":2: expected a JSON object or string", output.getvalue())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,28 @@
+import unittest
+from src.math_agent.expression_evaluator import evaluate_trig_query
+
+class ExpressionEvaluatorTest(unittest.TestCase):
+    def test_exponent_after_call_applies_to_result(self):
+        self.assertEqual(evaluate_trig_query("sin(30°)^2"), "sin(30°)^2 = 0.25")
+
+    def test_pythagorean_identity_sum(self):
+        self.assertEqual(evaluate_trig_query("sin(30 degrees)^2 + cos(30 degrees)^2"),
+                         "sin(30 degrees)^2 + cos(30 degrees)^2 = 1")
+
+    def test_unparenthesized_fraction_argument_is_declined(self):
+        self.assertIsNone(evaluate_trig_query("sin π/6"))
+        self.assertEqual(evaluate_trig_query("sin(π/6)"), "sin(π/6) = 0.5")
+
+    def test_unitless_angles_are_radians_and_say_so(self):
+        self.assertIsNone(evaluate_trig_query("sin 30"))  # almost certainly meant degrees
+        self.assertEqual(evaluate_trig_query("sin 1"), "sin 1 = 0.8414709848 (angles without a unit are in radians)")
+        self.assertEqual(evaluate_trig_query("cos 0"), "cos 0 = 1")
+        self.assertEqual(evaluate_trig_query("sin 30°"), "sin 30° = 0.5")
+
+    def test_unit_after_call_is_declined(self):
+        self.assertIsNone(evaluate_trig_query("sin(30)°"))
+        self.assertIsNone(evaluate_trig_query("sin(30) degrees"))
+        self.assertEqual(evaluate_trig_query("sin((30 + 15) degrees)"), "sin((30 + 15) degrees) = 0.7071067812")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import asyncio
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from src import http_client
+from src.metrics import MetricsRegistry
+from src.tracing import REQUEST_ID_HEADER, Tracer
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def do_GET(self):
+        self.server.seen.append((self.client_address[1], self.headers.get(REQUEST_ID_HEADER)))
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, *args):
+        pass
+
+class PooledHttpClientTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        cls.server.seen = []
+        cls.url = f"http://127.0.0.1:{cls.server.server_port}/"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.server.seen.clear()
+        self.addCleanup(http_client.close_http_clients)
+
+    def test_sync_client_is_shared_and_keeps_connections_alive(self):
+        clients = []
+        threads = [threading.Thread(target=lambda: clients.append(http_client.get_http_client())) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(set(map(id, clients))), 1)
+
+        for _ in range(3):
+            self.assertEqual(http_client.get_http_client().get(self.url).text, "ok")
+        self.assertEqual(len({port for port, _ in self.server.seen}), 1)  # one connection, reused
+
+    def test_close_replaces_the_sync_client(self):
+        client = http_client.get_http_client()
+        http_client.close_http_clients()
+        self.assertTrue(client.is_closed)
+        self.assertIsNot(http_client.get_http_client(), client)
+
+    def test_one_async_client_per_event_loop(self):
+        async def clients():
+            first, second = http_client.get_async_http_client(), http_client.get_async_http_client()
+            await first.get(self.url)
+            await http_client.aclose_async_http_client()
+            return first, second
+
+        first, second = asyncio.run(clients())
+        self.assertIs(first, second)
+        self.assertTrue(first.is_closed)
+        other, _ = asyncio.run(clients())
+        self.assertIsNot(other, first)
+
+    def test_current_request_id_is_forwarded(self):
+        tracer = Tracer(MetricsRegistry(), "test")
+        with tracer.request("sync-id"):
+            http_client.get_http_client().get(self.url)
+
+        async def call():
+            with tracer.request("async-id"):
+                await http_client.get_async_http_client().get(self.url)
+            await http_client.aclose_async_http_client()
+
+        asyncio.run(call())
+        http_client.get_http_client().get(self.url)
+        self.assertEqual([request_id for _, request_id in self.server.seen], ["sync-id", "async-id", None])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,27 @@
+import unittest
+from src.math_agent.identity_catalog import IdentityIndex
+
+class IdentityCatalogTest(unittest.TestCase):
+    def setUp(self):
+        self.index = IdentityIndex()
+
+    def test_triangle_angle_sum_property_is_not_an_identity(self):
+        self.assertEqual(self.index.match("What is the angle sum property of a triangle"), [])
+        self.assertEqual(self.index.match("What is the pythagorean theorem"), [])
+
+    def test_trig_sum_formulas_still_match(self):
+        self.assertEqual(self.index.match("show me angle sum formulas"), ["sum_difference"])
+        self.assertEqual(self.index.match("what is the formula for sin(a+b)"), ["sum_difference"])
+
+    def test_calculations_are_not_formula_requests(self):
+        self.assertEqual(self.index.match("give me the reciprocal of sin 30"), [])
+        self.assertEqual(self.index.match("what is cos(2x) if cos x = 0.5"), [])
+        self.assertEqual(self.index.match("what is the half angle of 60 degrees in sine"), [])
+        self.assertEqual(self.index.match("given tan x, what is the double angle formula"), [])
+
+    def test_symbolic_arguments_still_match(self):
+        self.assertEqual(self.index.match("what is the formula for sin 2x"), ["double_angle"])
+        self.assertEqual(self.index.match("formula for sin(x/2)"), ["half_angle"])
+
+if __name__ == "__main__":
+    unittest.main()
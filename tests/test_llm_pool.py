@@ -0,0 +1,19 @@
+import logging
+import unittest
+from src.llm_pool import Backend, BackendSpec, LLMPool, NoBackendAvailableError
+from src.metrics import MetricsRegistry
+
+class FailingModel:
+    def invoke(self, messages):
+        raise PermissionError("Incorrect API key provided")
+
+class LLMPoolTest(unittest.TestCase):
+    def test_last_backend_error_is_kept(self):
+        backend = Backend(BackendSpec(provider="fake", name="openai"), MetricsRegistry(), model=FailingModel())
+        with self.assertLogs("src.llm_pool", logging.WARNING), self.assertRaises(NoBackendAvailableError) as raised:
+            LLMPool([backend]).invoke("What is the unit circle?")
+        self.assertIsInstance(raised.exception.__cause__, PermissionError)
+        self.assertIn("Incorrect API key provided", str(raised.exception))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,158 @@
+import json
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+import httpx
+from src import http_client
+from src.metrics import MetricsRegistry
+from src.resilience import (
+    DEGRADED_HEADER, LLM_TIMEOUT_MAX, CircuitBreaker, CircuitOpenError, LatencyTracker, ResilientLLMClient, backoff_delay,
+)
+
+class _LLMHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        status, delay = self.server.replies.pop(0) if self.server.replies else (200, 0)
+        self.server.calls += 1
+        time.sleep(delay)
+        body = json.dumps({"artifacts": [{"parts": [{"type": "text", "text": f"answer {self.server.calls}"}]}]}).encode()
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the client hit its deadline first
+
+    def log_message(self, *args):
+        pass
+
+class CircuitBreakerTest(unittest.TestCase):
+    def setUp(self):
+        self.breaker = CircuitBreaker(MetricsRegistry(), failure_threshold=2, reset_seconds=10)
+        self.now = 1000.0
+        for patcher in (mock.patch("src.resilience.time.monotonic", side_effect=lambda: self.now),
+                        mock.patch("src.resilience.logger.disabled", True)):  # state changes are logged
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_opens_after_consecutive_failures(self):
+        self.breaker.record_failure()
+        self.breaker.record_success()  # resets the count
+        self.breaker.record_failure()
+        self.assertTrue(self.breaker.allow())
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(self.breaker.allow())
+        self.assertEqual((self.breaker.opened.value, self.breaker.rejected.value), (1, 1))
+
+    def test_half_open_lets_one_probe_through(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.now += 10
+        self.assertTrue(self.breaker.allow())
+        self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertFalse(self.breaker.allow())
+        self.breaker.release()  # the probe was cancelled: another may go
+        self.assertTrue(self.breaker.allow())
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_failed_probe_reopens(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.now += 10
+        self.assertTrue(self.breaker.allow())
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.now += 9
+        self.assertFalse(self.breaker.allow())
+
+class DeadlineAndBackoffTest(unittest.TestCase):
+    def test_deadline_follows_recent_latency(self):
+        tracker = LatencyTracker()
+        self.assertEqual(tracker.deadline(), LLM_TIMEOUT_MAX)  # not enough samples yet
+        for _ in range(50):
+            tracker.record(4.0)
+        self.assertEqual(tracker.deadline(), 8.0)
+        for _ in range(50):
+            tracker.record(0.01)
+        with mock.patch("src.resilience.LLM_TIMEOUT_PERCENTILE", 10):
+            self.assertEqual(tracker.deadline(), 5.0)  # clamped to LLM_TIMEOUT_MIN
+
+    def test_backoff_is_jittered_capped_and_honours_retry_after(self):
+        delays = [backoff_delay(10) for _ in range(200)]
+        self.assertTrue(all(0 <= delay <= 2.0 for delay in delays))
+        self.assertGreater(len(set(delays)), 1)
+        self.assertEqual(backoff_delay(0, retry_after=1.5), 1.5)
+
+class ResilientLLMClientTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), _LLMHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.server.replies, self.server.calls = [], 0
+        self.client = ResilientLLMClient(MetricsRegistry(), f"http://127.0.0.1:{self.server.server_port}")
+        for patcher in (mock.patch("src.resilience.LLM_RETRY_BASE_DELAY", 0.001),
+                        mock.patch("src.resilience.logger.disabled", True)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addCleanup(http_client.close_http_clients)
+
+    def post(self):
+        return self.client.post("/tasks/send", {"message": "Explain the unit circle"})
+
+    def test_retryable_errors_are_retried(self):
+        self.server.replies = [(503, 0), (502, 0)]
+        response = self.post()
+        self.assertEqual((response.status_code, self.server.calls, self.client.retries.value), (200, 3, 2))
+        self.assertNotIn(DEGRADED_HEADER, response.headers)
+
+    def test_client_errors_are_not_retried(self):
+        self.server.replies = [(400, 0)]
+        self.assertEqual((self.post().status_code, self.server.calls), (400, 1))
+
+    def test_last_good_answer_is_served_stale(self):
+        self.post()
+        self.server.replies = [(503, 0)] * 3
+        response = self.post()
+        self.assertEqual(response.headers[DEGRADED_HEADER], "stale")
+        self.assertEqual(response.json()["artifacts"][0]["parts"][0]["text"], "answer 1")
+        self.assertEqual(self.client.degraded.value, 1)
+
+    def test_error_is_raised_without_a_stale_answer(self):
+        self.server.replies = [(503, 0)] * 3
+        with self.assertRaises(httpx.HTTPStatusError):
+            self.post()
+
+    def test_open_circuit_fails_fast(self):
+        self.client.breaker.failure_threshold = 3
+        self.server.replies = [(503, 0)] * 3
+        with self.assertRaises(httpx.HTTPStatusError):
+            self.post()
+        with self.assertRaises(CircuitOpenError):
+            self.post()
+        self.assertEqual(self.server.calls, 3)
+
+    def test_attempts_stop_at_the_call_budget(self):
+        self.server.replies = [(200, 1.0)]
+        start = time.monotonic()
+        with mock.patch("src.resilience.LLM_CALL_BUDGET", 0.3), self.assertRaises(httpx.TimeoutException):
+            self.post()
+        self.assertLess(time.monotonic() - start, 1.0)
+        self.assertGreaterEqual(self.client.timeouts.value, 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+from src.local_llm import ResponseCache
+
+class ResponseCacheTest(unittest.TestCase):
+    def test_prompts_are_normalized(self):
+        cache = ResponseCache()
+        cache.put("What is the unit circle?", "a circle of radius 1")
+        self.assertEqual(cache.get("  what is the   unit circle?"), "a circle of radius 1")
+        self.assertEqual((cache.hits.value, cache.misses.value), (1, 0))
+
+    def test_entries_expire(self):
+        cache = ResponseCache(ttl_seconds=10)
+        with mock.patch("src.local_llm.time.time", return_value=1000.0):
+            cache.put("sin 30°", "0.5")
+        with mock.patch("src.local_llm.time.time", return_value=1009.0):
+            self.assertIn("sin 30°", cache)
+            self.assertEqual(cache.get("sin 30°"), "0.5")
+        with mock.patch("src.local_llm.time.time", return_value=1010.0):
+            self.assertNotIn("sin 30°", cache)
+            self.assertIsNone(cache.get("sin 30°"))
+        self.assertEqual((cache.evictions.value, cache.size.value), (1, 0))
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = ResponseCache(max_entries=2)
+        cache.put("a", "1")
+        cache.put("b", "2")
+        cache.get("a")
+        cache.put("c", "3")
+        self.assertEqual([cache.get(prompt) for prompt in ("a", "b", "c")], ["1", None, "3"])
+        self.assertEqual(cache.size.value, 2)
+
+    def test_entries_survive_a_restart(self):
+        with tempfile.TemporaryDirectory() as workdir:
+            path = os.path.join(workdir, "llm_cache.sqlite")
+            cache = ResponseCache(max_entries=2, ttl_seconds=60, persist_path=path)
+            for prompt in ("a", "b", "c"):
+                cache.put(prompt, prompt.upper())
+            cache._db.close()
+
+            reloaded = ResponseCache(max_entries=2, ttl_seconds=60, persist_path=path)
+            self.assertEqual([reloaded.get(prompt) for prompt in ("a", "b", "c")], [None, "B", "C"])
+            reloaded._db.close()
+
+    def test_expired_entries_are_not_reloaded(self):
+        with tempfile.TemporaryDirectory() as workdir:
+            path = os.path.join(workdir, "llm_cache.sqlite")
+            cache = ResponseCache(ttl_seconds=60, persist_path=path)
+            with mock.patch("src.local_llm.time.time", return_value=0.0):
+                cache.put("stale", "old")
+            cache.put("fresh", "new")
+            cache._db.close()
+
+            reloaded = ResponseCache(ttl_seconds=60, persist_path=path)
+            self.assertEqual((reloaded.get("stale"), reloaded.get("fresh")), (None, "new"))
+            self.assertEqual(reloaded._db.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0], 1)
+            reloaded._db.close()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,38 @@
+import unittest
+from src.math_agent.semantic_cache import SemanticCache
+
+class SemanticCacheTest(unittest.TestCase):
+    def test_unitless_and_degree_angles_do_not_collide(self):
+        cache = SemanticCache()
+        cache.put("explain how to compute sin 30 degrees by hand", "degrees answer")
+        self.assertIsNone(cache.get("explain how to compute sin 30 by hand"))
+        self.assertIsNone(cache.get("what is sin 30"))
+        self.assertEqual(cache.get("explain how to compute sin 30° by hand"), "degrees answer")
+
+    def test_numbers_must_match_exactly(self):
+        cache = SemanticCache()
+        cache.put("explain how to compute sin 30 degrees by hand", "30")
+        self.assertIsNone(cache.get("explain how to compute sin 30.5 degrees by hand"))
+        self.assertIsNone(cache.get("explain how to compute sin 60 degrees by hand"))
+
+    def test_sign_of_a_number_is_part_of_the_question(self):
+        cache = SemanticCache()
+        cache.put("solve sin x = 0.5", "positive")
+        self.assertIsNone(cache.get("solve sin x = -0.5"))
+        self.assertIsNone(cache.get("solve sin x = −0.5"))
+        self.assertEqual(cache.get("solve sin x = 0.5"), "positive")
+
+    def test_polarity_words_must_match(self):
+        cache = SemanticCache()
+        cache.put("Why is sin x increasing in the first quadrant?", "increasing")
+        self.assertIsNone(cache.get("Why is sin x decreasing in the first quadrant?"))
+        self.assertIsNone(cache.get("Why is sin x increasing in the second quadrant?"))
+
+    def test_number_words_are_numbers(self):
+        cache = SemanticCache()
+        cache.put("When is sin x equal to zero?", "zero")
+        self.assertIsNone(cache.get("When is sin x equal to one?"))
+        self.assertEqual(cache.get("When is sin x equal to 0?"), "zero")
+
+if __name__ == "__main__":
+    unittest.main()
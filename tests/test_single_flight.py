@@ -0,0 +1,104 @@
+import asyncio
+import threading
+import time
+import unittest
+from src.local_llm import SingleFlight
+
+class SingleFlightTest(unittest.TestCase):
+    def test_concurrent_identical_prompts_share_one_call(self):
+        flight, calls, results = SingleFlight(), [], []
+        release = threading.Event()
+
+        def call():
+            calls.append(1)
+            release.wait(5)
+            return "answer"
+
+        threads = [threading.Thread(target=lambda: results.append(flight.do("Explain the unit circle", call))) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.1)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual((len(calls), results), (1, ["answer"] * 4))
+        self.assertEqual(flight.coalesced.value, 3)
+
+    def test_errors_reach_every_waiter(self):
+        flight = SingleFlight()
+
+        async def main():
+            async def call():
+                await asyncio.sleep(0.05)
+                raise ValueError("upstream failed")
+            return await asyncio.gather(*(flight.do_async("same prompt", call) for _ in range(3)), return_exceptions=True)
+
+        self.assertTrue(all(isinstance(result, ValueError) for result in asyncio.run(main())))
+
+    def test_cancelled_waiter_does_not_cancel_the_others(self):
+        flight = SingleFlight()
+
+        async def main():
+            async def call():
+                await asyncio.sleep(0.1)
+                return "answer"
+            leader = asyncio.create_task(flight.do_async("Explain the unit circle", call))
+            await asyncio.sleep(0)
+            waiters = [asyncio.create_task(flight.do_async("explain the unit circle", call)) for _ in range(3)]
+            await asyncio.sleep(0.02)
+            waiters[0].cancel()
+            return await asyncio.gather(leader, *waiters, return_exceptions=True)
+
+        leader, cancelled, *others = asyncio.run(main())
+        self.assertEqual(leader, "answer")
+        self.assertIsInstance(cancelled, asyncio.CancelledError)
+        self.assertEqual(others, ["answer", "answer"])
+
+    def test_cancelled_leader_fails_the_waiters(self):
+        flight = SingleFlight()
+
+        async def main():
+            async def call():
+                await asyncio.sleep(1)
+            leader = asyncio.create_task(flight.do_async("Explain the unit circle", call))
+            await asyncio.sleep(0)
+            waiter = asyncio.create_task(flight.do_async("Explain the unit circle", call))
+            await asyncio.sleep(0.02)
+            leader.cancel()
+            return await asyncio.gather(leader, waiter, return_exceptions=True)
+
+        leader, waiter = asyncio.run(main())
+        self.assertIsInstance(leader, asyncio.CancelledError)
+        self.assertIsInstance(waiter, RuntimeError)
+
+    def test_threads_and_coroutines_share_a_call(self):
+        flight, calls = SingleFlight(), []
+        release = threading.Event()
+
+        async def call():
+            calls.append(1)
+            await asyncio.to_thread(release.wait, 5)
+            return "answer"
+
+        async def main():
+            leader = asyncio.create_task(flight.do_async("Explain the unit circle", call))
+            await asyncio.sleep(0)
+            thread_result = asyncio.to_thread(flight.do, "Explain the unit circle", lambda: "own call")
+            waiter = asyncio.create_task(thread_result)
+            await asyncio.sleep(0.05)
+            self.assertEqual(flight.in_flight.value, 1)
+            release.set()
+            return await asyncio.gather(leader, waiter)
+
+        self.assertEqual(asyncio.run(main()), ["answer", "answer"])
+        self.assertEqual((len(calls), flight.in_flight.value), (1, 0))
+
+    def test_finished_and_distinct_prompts_are_not_shared(self):
+        flight = SingleFlight()
+        self.assertEqual(flight.do("sin 30°", lambda: "first"), "first")
+        self.assertEqual(flight.do("sin 30°", lambda: "second"), "second")  # the first call already finished
+        self.assertEqual(flight.do("cos 30°", lambda: "third"), "third")
+        self.assertEqual((flight.calls.value, flight.coalesced.value), (3, 0))
+
+if __name__ == "__main__":
+    unittest.main()
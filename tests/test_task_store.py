@@ -0,0 +1,127 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+from python_a2a import Task, TaskState, TaskStatus
+from src.task_store import (
+    InMemoryTaskStore, LocalRedis, RedisTaskStore, SQLiteTaskStore, create_task_store, task_lookup,
+)
+
+def make_task(text: str = "sin 30°") -> Task:
+    task = Task(message={"role": "user", "content": {"type": "text", "text": text}})
+    task.artifacts = [{"parts": [{"type": "text", "text": "0.5"}]}]
+    task.status = TaskStatus(state=TaskState.COMPLETED)
+    return task
+
+class _TaskStoreCases:
+    """Behaviour every backend shares; subclasses build the store in make_store."""
+
+    def make_store(self, **options):
+        raise NotImplementedError
+
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch("src.task_store.time.time", side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.store = self.make_store(ttl_seconds=60)
+
+    def test_tasks_round_trip_through_the_dict_interface(self):
+        task = make_task()
+        self.store[task.id] = task
+        self.assertIn(task.id, self.store)
+        self.assertEqual(self.store[task.id].to_dict(), task.to_dict())
+        self.assertEqual(len(self.store), 1)
+        del self.store[task.id]
+        self.assertIsNone(self.store.get(task.id))
+        with self.assertRaises(KeyError):
+            self.store[task.id]
+        self.assertEqual((self.store.hits.value, self.store.misses.value), (1, 2))
+
+    def test_tasks_expire(self):
+        task = make_task()
+        self.store.put(task)
+        self.now += 59
+        self.assertIsNotNone(self.store.get(task.id))
+        self.now += 1
+        self.assertIsNone(self.store.get(task.id))
+        self.assertNotIn(task.id, self.store)
+        self.assertEqual(len(self.store), 0)
+
+    def test_a_write_renews_the_ttl(self):
+        task = make_task()
+        self.store.put(task)
+        self.now += 50
+        self.store.put(task)
+        self.now += 50
+        self.assertIsNotNone(self.store.get(task.id))
+
+class InMemoryTaskStoreTest(_TaskStoreCases, unittest.TestCase):
+    def make_store(self, **options):
+        return InMemoryTaskStore(**options)
+
+    def test_cleanup_removes_only_expired_tasks(self):
+        old, new = make_task("old"), make_task("new")
+        self.store.put(old)
+        self.now += 30
+        self.store.put(new)
+        self.now += 30
+        self.assertEqual(self.store.cleanup(), 1)
+        self.assertIsNotNone(self.store.get(new.id))
+
+class SQLiteTaskStoreTest(_TaskStoreCases, unittest.TestCase):
+    def make_store(self, **options):
+        workdir = tempfile.TemporaryDirectory()
+        self.addCleanup(workdir.cleanup)
+        self.path = os.path.join(workdir.name, "tasks.db")
+        store = SQLiteTaskStore(self.path, **options)
+        self.addCleanup(store._db.close)
+        return store
+
+    def test_workers_share_the_file(self):
+        task = make_task()
+        self.store.put(task)
+        other = SQLiteTaskStore(self.path, ttl_seconds=60)
+        self.addCleanup(other._db.close)
+        self.assertEqual(other.get(task.id).id, task.id)
+        self.now += 60
+        self.assertEqual(other.cleanup(), 1)
+
+class RedisTaskStoreTest(_TaskStoreCases, unittest.TestCase):
+    def make_store(self, **options):
+        return RedisTaskStore(LocalRedis(), **options)
+
+    def test_clear_deletes_in_batches_and_only_its_own_keys(self):
+        self.store.client.set("other:key", "kept")
+        for number in range(7):
+            self.store.put(make_task(str(number)))
+        with mock.patch.object(self.store.client, "delete", wraps=self.store.client.delete) as delete:
+            self.assertEqual(self.store.clear(batch_size=3), 7)
+        self.assertEqual(delete.call_count, 3)
+        self.assertEqual((len(self.store), self.store.client.get("other:key")), (0, b"kept"))
+
+class TaskStoreFactoryTest(unittest.TestCase):
+    def test_urls_pick_the_backend(self):
+        self.assertIsInstance(create_task_store("memory"), InMemoryTaskStore)
+        self.assertIsInstance(create_task_store("redis+local://"), RedisTaskStore)
+        with tempfile.TemporaryDirectory() as workdir:
+            store = create_task_store(f"sqlite:///{workdir}/tasks.db")
+            self.assertEqual((type(store), store.path), (SQLiteTaskStore, f"{workdir}/tasks.db"))
+            store._db.close()
+        with self.assertRaises(ValueError):
+            create_task_store("postgres://localhost")
+
+    def test_cancel_writes_the_task_back(self):
+        class Agent:
+            tasks = InMemoryTaskStore()
+            _use_google_a2a = False
+
+        task = make_task()
+        Agent.tasks[task.id] = task
+        body, status = task_lookup(Agent, {"id": task.id}, cancel=True)
+        self.assertEqual((status, Agent.tasks[task.id].status.state), (200, TaskState.CANCELED))
+        body, status = task_lookup(Agent, {"jsonrpc": "2.0", "id": 7, "params": {"id": "missing"}})
+        self.assertEqual((status, body["id"], body["error"]["code"]), (404, 7, -32000))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import json
+import unittest
+from flask import Flask
+from src.metrics import MetricsRegistry
+from src.tracing import REQUEST_ID_HEADER, RequestIdHeaders, Tracer, current_request_id, current_trace, register_tracing
+
+class TracerTest(unittest.TestCase):
+    def setUp(self):
+        self.metrics = MetricsRegistry()
+        self.tracer = Tracer(self.metrics, "test")
+
+    def test_spans_are_recorded_on_the_current_trace(self):
+        with self.assertLogs("a2a.trace", "INFO") as logs:
+            with self.tracer.request("abc") as trace:
+                self.assertEqual(current_request_id(), "abc")
+                with self.tracer.span("local"):
+                    pass
+                self.tracer.record("llm_http", 0.25)
+                self.tracer.record("llm_http", 0.25)
+                self.tracer.annotate(prompt_tokens=3, agent="trig")
+                self.tracer.annotate(prompt_tokens=4)
+        self.assertIsNone(current_trace())
+        self.assertEqual(trace.stage_seconds()["llm_http"], 0.5)
+
+        line = json.loads(logs.records[0].getMessage())
+        self.assertEqual((line["request_id"], line["service"]), ("abc", "test"))
+        self.assertEqual((line["stages_ms"]["llm_http"], line["prompt_tokens"], line["agent"]), (500.0, 7, "trig"))
+        self.assertEqual(self.metrics.histogram("a2a_stage_seconds", labels={"stage": "llm_http"}).count, 2)
+        self.assertEqual(self.tracer.requests.value, 1)
+
+    def test_spans_outside_a_request_only_feed_the_histograms(self):
+        with self.tracer.span("local"):
+            pass
+        self.assertIsNone(current_request_id())
+        self.assertEqual(self.metrics.histogram("a2a_stage_seconds", labels={"stage": "local"}).count, 1)
+
+    def test_python_a2a_headers_carry_the_request_id(self):
+        headers = RequestIdHeaders({"Accept": "application/json"})
+        self.assertNotIn(REQUEST_ID_HEADER, dict(headers.items()))
+        with self.assertLogs("a2a.trace", "INFO"), self.tracer.request("abc"):
+            self.assertEqual(dict(headers.items())[REQUEST_ID_HEADER], "abc")
+
+    def test_flask_posts_continue_the_callers_request_id(self):
+        app = Flask(__name__)
+        app.add_url_rule("/tasks/send", "send", lambda: {"request_id": current_request_id()}, methods=["POST"])
+        register_tracing(app, self.tracer)
+        client = app.test_client()
+
+        with self.assertLogs("a2a.trace", "INFO"):
+            response = client.post("/tasks/send", json={}, headers={REQUEST_ID_HEADER: "from-caller"})
+            self.assertEqual((response.get_json()["request_id"], response.headers[REQUEST_ID_HEADER]), ("from-caller", "from-caller"))
+            response = client.post("/tasks/send", json={})
+        self.assertEqual(response.get_json()["request_id"], response.headers[REQUEST_ID_HEADER])
+        self.assertEqual(self.tracer.requests.value, 2)
+
+if __name__ == "__main__":
+    unittest.main()
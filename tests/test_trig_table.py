@@ -0,0 +1,20 @@
+import unittest
+from src.math_agent.trig_table import TrigTableError, parse_table_query
+
+class TableQueryTest(unittest.TestCase):
+    def test_conceptual_questions_over_a_range_are_not_tables(self):
+        for query in ("What is the range of the sine function from 0 to 360 degrees?",
+                      "explain why sin is periodic from 0 to 2π",
+                      "Is sin increasing from 0 to 90 degrees?"):
+            self.assertIsNone(parse_table_query(query), query)
+
+    def test_explicit_table_requests(self):
+        self.assertEqual(parse_table_query("sin and cos for every degree 0–360").rows, 361)
+        self.assertEqual(parse_table_query("table of tan from 0 to π/2 in steps of π/12").rows, 7)
+
+    def test_unreadable_bound_is_rejected(self):
+        with self.assertRaises(TrigTableError):
+            parse_table_query("table of sin from 0 to 1e9 degrees")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+import logging
+import unittest
+from unittest import mock
+import httpx
+from python_a2a import Task, TaskState
+from src.math_agent.trigonometry_agent import TrigonometryAgent
+from src.resilience import DEGRADED_HEADER
+
+QUERY = "Explain the unit circle"
+
+def llm_response(text: str, headers: dict = None) -> httpx.Response:
+    body = {"artifacts": [{"parts": [{"type": "text", "text": text}]}]}
+    return httpx.Response(200, json=body, headers=headers, request=httpx.Request("POST", "http://llm/tasks/send"))
+
+class LLMFallbackTest(unittest.TestCase):
+    def setUp(self):
+        self.agent = TrigonometryAgent()
+        self.agent.logger.disabled = True
+        logging.disable(logging.WARNING)
+        self.addCleanup(logging.disable, logging.NOTSET)
+
+    def ask(self, **post):
+        with mock.patch.object(self.agent.llm_http, "post", **post):
+            return self.agent.handle_task(Task(message={"role": "user", "content": {"type": "text", "text": QUERY}}))
+
+    def test_fresh_answers_are_cached(self):
+        task = self.ask(return_value=llm_response("The unit circle has radius 1."))
+        self.assertEqual(task.status.state, TaskState.COMPLETED)
+        self.assertEqual(self.agent.semantic_cache.get(QUERY), "The unit circle has radius 1.")
+        self.assertEqual(self.agent.llm_fallbacks.value, 1)
+
+    def test_stale_answers_are_served_but_not_cached(self):
+        task = self.ask(return_value=llm_response("The unit circle has radius 1.", {DEGRADED_HEADER: "stale"}))
+        self.assertEqual(task.status.state, TaskState.COMPLETED)
+        self.assertIsNone(self.agent.semantic_cache.get(QUERY))
+
+    def test_failed_calls_are_not_counted(self):
+        task = self.ask(side_effect=httpx.ConnectError("connection refused"))
+        self.assertEqual(task.status.state, TaskState.FAILED)
+        self.assertEqual(self.agent.llm_fallbacks.value, 0)
+
+if __name__ == "__main__":
+    unittest.main()